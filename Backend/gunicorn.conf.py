@@ -2,6 +2,10 @@ import multiprocessing
 
 bind = "0.0.0.0:8000"
 workers = multiprocessing.cpu_count() * 2 + 1
+# ASGI workers: an open notification stream (/api/notifications/stream/) is an
+# idle coroutine instead of a blocked sync worker. Serve sgss_medical_fund.asgi
+# and set NOTIFICATION_STREAM_URL so every worker sees every notification.
+worker_class = "uvicorn_worker.UvicornWorker"
 loglevel = "info"
 accesslog = "-"  # stdout
 errorlog = "-"   # stdout
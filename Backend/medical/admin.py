@@ -2,7 +2,8 @@
 from django.contrib import admin
 from .models import (
     Member, MembershipType, Claim, ClaimItem, ClaimReview,
-    Notification, ReimbursementScale, Setting, ChronicRequest, ClaimAttachment
+    Notification, ReimbursementScale, Setting, ChronicRequest, ClaimAttachment,
+    EmailOutbox, MemberBenefitUsage, ArchiveBatch,
 )
 
 @admin.register(MembershipType)
@@ -38,7 +39,8 @@ class ClaimReviewAdmin(admin.ModelAdmin):
 
 @admin.register(ClaimAttachment)
 class ClaimAttachmentAdmin(admin.ModelAdmin):
-    list_display = ("id", "claim", "uploaded_by", "file", "uploaded_at")
+    list_display = ("id", "claim", "uploaded_by", "file", "status", "uploaded_at")
+    list_filter = ("status",)
     search_fields = ("claim__id", "uploaded_by__email")
 
 @admin.register(Notification)
@@ -62,3 +64,22 @@ class ChronicRequestAdmin(admin.ModelAdmin):
     list_display = ("id", "member", "doctor_name", "total_amount", "member_payable", "status", "created_at")
     list_filter = ("status",)
     search_fields = ("member__user__email", "doctor_name")
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "object_id", "status", "attempts", "created_at", "last_attempt_at", "sent_at")
+    list_filter = ("status", "kind")
+    search_fields = ("object_id",)
+
+@admin.register(MemberBenefitUsage)
+class MemberBenefitUsageAdmin(admin.ModelAdmin):
+    list_display = ("member", "year", "pending_total", "approved_total", "paid_total", "critical_claims", "updated_at")
+    list_filter = ("year",)
+    search_fields = ("member__user__email",)
+    readonly_fields = ("pending_total", "approved_total", "paid_total", "critical_claims")
+
+@admin.register(ArchiveBatch)
+class ArchiveBatchAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "row_count", "oldest", "newest", "created_at")
+    list_filter = ("kind",)
+    readonly_fields = ("kind", "file", "row_count", "oldest", "newest")
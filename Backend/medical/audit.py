@@ -28,16 +28,35 @@ def log_claim_event(*, claim: Claim, actor: Optional[User], action: str,
         )
 
     # 2. Maintain the AuditLog for system-wide forensic auditing
-    return AuditLog.objects.create(
-        action=action,
+    return log_event(
         actor=actor,
+        action=action,
+        obj=claim,
         previous_state=previous_state,
         new_state=new_state,
         meeting=meeting,
         meta={
             "note": note,
             "role": role,
-            "claim_id": claim.id,
+            "claim_id": str(claim.id),
             **(meta or {})
         }
     )
+
+
+def log_event(*, actor: Optional[User], action: str, obj=None,
+              meta: Optional[Dict[str, Any]] = None, **fields) -> AuditLog:
+    """
+    Write one AuditLog row about `obj` (any model instance, optional).
+
+    object_type/object_id are filled from `obj`; the claim FK is set when `obj`
+    is a claim or belongs to one (e.g. a PaymentRecord).
+    """
+    if obj is not None:
+        fields.setdefault("object_type", obj._meta.model_name)
+        fields.setdefault("object_id", str(obj.pk))
+        if isinstance(obj, Claim):
+            fields.setdefault("claim", obj)
+        elif getattr(obj, "claim_id", None):
+            fields.setdefault("claim_id", obj.claim_id)
+    return AuditLog.objects.create(actor=actor, action=action, meta=meta or {}, **fields)
@@ -1,6 +1,9 @@
 # Backend/medical/email_notifications.py
 """
 Email notification service for SGSS Medical Fund Portal
+
+These functions are executed by the outbox worker (medical.tasks); delivery
+errors are re-raised so the task can retry. Return False means "nothing to send".
 """
 from django.core.mail import send_mail
 from django.conf import settings
@@ -52,7 +55,7 @@ def send_member_registration_email(member):
         return True
     except Exception as e:
         print(f"Failed to send registration email: {e}")
-        return False
+        raise
 
 
 def send_member_approved_email(member):
@@ -104,7 +107,7 @@ def send_member_approved_email(member):
         return True
     except Exception as e:
         print(f"Failed to send approval email: {e}")
-        return False
+        raise
 
 
 def send_claim_submitted_email(claim):
@@ -157,7 +160,7 @@ def send_claim_submitted_email(claim):
         return True
     except Exception as e:
         print(f"Failed to send claim submission email: {e}")
-        return False
+        raise
 
 
 def send_claim_status_email(claim, old_status=None):
@@ -238,18 +241,14 @@ def send_claim_status_email(claim, old_status=None):
         return True
     except Exception as e:
         print(f"Failed to send claim status email: {e}")
-        return False
+        raise
 
 
 def send_committee_notification_email(claim, notification_type='new_claim'):
     """Send email to committee members about new claims"""
-    from django.contrib.auth.models import Group
-    
-    committee_group = Group.objects.filter(name="Committee").first()
-    if not committee_group:
-        return False
-    
-    committee_emails = list(committee_group.user_set.values_list('email', flat=True))
+    from medical.services.notifications import committee_emails as get_committee_emails
+
+    committee_emails = get_committee_emails()
     if not committee_emails:
         return False
     
@@ -281,7 +280,7 @@ def send_committee_notification_email(claim, notification_type='new_claim'):
         return True
     except Exception as e:
         print(f"Failed to send committee notification: {e}")
-        return False
+        raise
 
 
 def send_application_rejected_email(member):
@@ -327,18 +326,14 @@ def send_application_rejected_email(member):
         return True
     except Exception as e:
         print(f"Failed to send rejection email: {e}")
-        return False
+        raise
 
 
 def send_new_member_committee_email(member):
     """Send email to committee when a new member registers"""
-    from django.contrib.auth.models import Group
-    
-    committee_group = Group.objects.filter(name="Committee").first()
-    if not committee_group:
-        return False
-    
-    committee_emails = list(committee_group.user_set.values_list('email', flat=True))
+    from medical.services.notifications import committee_emails as get_committee_emails
+
+    committee_emails = get_committee_emails()
     if not committee_emails:
         return False
         
@@ -379,4 +374,4 @@ def send_new_member_committee_email(member):
         return True
     except Exception as e:
         print(f"Failed to send new member committee alert: {e}")
-        return False
+        raise
@@ -0,0 +1,32 @@
+# medical/management/commands/archive_old_records.py
+from django.core.management.base import BaseCommand
+
+from medical.services import retention
+
+
+class Command(BaseCommand):
+    help = "Move read notifications and old audit entries past retention into archive files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--notification-days", type=int, default=None,
+                            help="Archive read notifications older than this (default: settings).")
+        parser.add_argument("--audit-days", type=int, default=None,
+                            help="Archive audit entries older than this (default: settings).")
+        parser.add_argument("--batch-size", type=int, default=retention.BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only report how many rows are due.")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            notifications = retention.notifications_due(options["notification_days"]).count()
+            audit_logs = retention.audit_logs_due(options["audit_days"]).count()
+            self.stdout.write(f"Due for archiving: {notifications} notifications, {audit_logs} audit entries.")
+            return
+
+        result = retention.archive_all(
+            notification_days=options["notification_days"],
+            audit_log_days=options["audit_days"],
+            batch_size=options["batch_size"],
+        )
+        for kind, (batches, rows) in result.items():
+            self.stdout.write(self.style.SUCCESS(f"Archived {kind}: {rows} rows in {batches} files."))
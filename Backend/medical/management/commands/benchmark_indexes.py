@@ -0,0 +1,245 @@
+# medical/management/commands/benchmark_indexes.py
+"""
+Compare plans for the hot Claim / Notification / AuditLog queries with and
+without the Meta.indexes declared on those models.
+
+A synthetic data set (1M claims by default) is seeded inside one transaction
+that is rolled back at the end, so nothing is left behind. Plans are only
+representative on PostgreSQL:
+
+    python manage.py benchmark_indexes --claims 1000000
+"""
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from medical.models import AuditLog, Claim, Member, Notification
+
+User = get_user_model()
+
+INDEXED_MODELS = (Claim, Notification, AuditLog)
+BATCH_SIZE = 5000
+SPREAD_DAYS = 3 * 365
+
+CLAIM_STATUSES = ["draft", "submitted", "reviewed", "approved", "rejected", "paid"]
+CLAIM_STATUS_WEIGHTS = [5, 10, 5, 25, 10, 45]
+CLAIM_TYPES = ["outpatient", "inpatient", "chronic"]
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def _explicit_created_at(*models):
+    """Let bulk_create keep the spread-out created_at values we generate."""
+    fields = [m._meta.get_field("created_at") for m in models]
+    saved = [f.auto_now_add for f in fields]
+    for f in fields:
+        f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, value in zip(fields, saved):
+            f.auto_now_add = value
+
+
+class Command(BaseCommand):
+    help = "Seed a large synthetic data set and report EXPLAIN plans before/after the hot-path indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--claims", type=int, default=1_000_000)
+        parser.add_argument("--members", type=int, default=20_000)
+        parser.add_argument("--notifications", type=int, help="Default: same as --claims.")
+        parser.add_argument("--audit-logs", type=int, help="Default: same as --claims.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                f"Running on {connection.vendor}: plans are only representative on PostgreSQL."
+            ))
+        random.seed(options["seed"])
+
+        try:
+            with transaction.atomic():
+                sample = self._seed(
+                    members=options["members"],
+                    claims=options["claims"],
+                    notifications=options["notifications"] or options["claims"],
+                    audit_logs=options["audit_logs"] or options["claims"],
+                )
+                queries = self._queries(**sample)
+
+                self._drop_indexes()
+                self._analyze()
+                before = self._explain(queries)
+
+                self._create_indexes()
+                self._analyze()
+                after = self._explain(queries)
+
+                self._report(queries, before, after)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS("Done; seeded data rolled back."))
+
+    # ------------------------------------------------------------------
+    # Seeding
+    # ------------------------------------------------------------------
+    def _seed(self, members, claims, notifications, audit_logs):
+        now = timezone.now()
+        tag = uuid.uuid4().hex[:8]
+
+        def created_at():
+            return now - timedelta(minutes=random.randint(0, SPREAD_DAYS * 24 * 60))
+
+        self.stdout.write(f"Seeding {members} members...")
+        users = User.objects.bulk_create(
+            [User(username=f"bench-{tag}-{i}", password="!") for i in range(members)],
+            batch_size=BATCH_SIZE,
+        )
+        member_rows = Member.objects.bulk_create(
+            [Member(user=u, status="active") for u in users], batch_size=BATCH_SIZE
+        )
+        member_ids = [m.pk for m in member_rows]
+        user_ids = [u.pk for u in users]
+
+        self.stdout.write(f"Seeding {claims} claims...")
+        claim_ids = []
+        with _explicit_created_at(Claim, Notification, AuditLog):
+            for start in range(0, claims, BATCH_SIZE):
+                rows = []
+                for _ in range(min(BATCH_SIZE, claims - start)):
+                    total = Decimal(random.randint(500, 300000))
+                    rows.append(Claim(
+                        member_id=random.choice(member_ids),
+                        claim_type=random.choice(CLAIM_TYPES),
+                        status=random.choices(CLAIM_STATUSES, CLAIM_STATUS_WEIGHTS)[0],
+                        total_claimed=total,
+                        total_payable=total * Decimal("0.8"),
+                        member_payable=total * Decimal("0.2"),
+                        created_at=created_at(),
+                    ))
+                Claim.objects.bulk_create(rows)
+                claim_ids.extend(c.pk for c in rows)
+
+            self.stdout.write(f"Seeding {notifications} notifications...")
+            for start in range(0, notifications, BATCH_SIZE):
+                Notification.objects.bulk_create([
+                    Notification(
+                        recipient_id=random.choice(user_ids),
+                        title="Claim Update",
+                        message="benchmark",
+                        type="claim",
+                        read=random.random() < 0.8,
+                        created_at=created_at(),
+                    )
+                    for _ in range(min(BATCH_SIZE, notifications - start))
+                ])
+
+            self.stdout.write(f"Seeding {audit_logs} audit log rows...")
+            for start in range(0, audit_logs, BATCH_SIZE):
+                AuditLog.objects.bulk_create([
+                    AuditLog(
+                        action="claims:UPSERT",
+                        claim_id=claim_id,
+                        object_type="claim",
+                        object_id=str(claim_id),
+                        meta={"claim_id": str(claim_id)},
+                        created_at=created_at(),
+                    )
+                    for claim_id in random.choices(claim_ids, k=min(BATCH_SIZE, audit_logs - start))
+                ])
+
+        claim = Claim.objects.filter(pk=random.choice(claim_ids)).select_related("member").get()
+        return {"member": claim.member, "user_id": claim.member.user_id, "claim_id": str(claim.pk)}
+
+    # ------------------------------------------------------------------
+    # Queries, shaped like the views that issue them
+    # ------------------------------------------------------------------
+    def _queries(self, member, user_id, claim_id):
+        day_start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        year = timezone.localdate().year
+        return [
+            ("ClaimViewSet (member)",
+             Claim.objects.filter(member=member).order_by("-created_at")[:50]),
+            ("member_dashboard_info claim_counts",
+             Claim.objects.filter(member=member).values("status").annotate(count=Count("id"))),
+            ("ClaimViewSet (committee, ?status=submitted)",
+             Claim.objects.filter(status="submitted").order_by("-created_at")[:50]),
+            ("committee_dashboard_info today_new",
+             Claim.objects.filter(created_at__gte=day_start, created_at__lt=day_start + timedelta(days=1))),
+            ("admin_dashboard_summary status_counts",
+             Claim.objects.filter(created_at__year=year).values("status").annotate(count=Count("id"))),
+            ("NotificationViewSet",
+             Notification.objects.filter(recipient_id=user_id).order_by("-created_at")[:50]),
+            ("unread_notifications_count",
+             Notification.objects.filter(recipient_id=user_id, read=False).order_by()),
+            ("claim audit trail",
+             AuditLog.objects.filter(claim_id=claim_id).order_by("created_at")),
+            ("audit_all_logs",
+             AuditLog.objects.order_by("-created_at")[:500]),
+        ]
+
+    # ------------------------------------------------------------------
+    # Index toggling / measuring
+    # ------------------------------------------------------------------
+    def _index_sql(self, action):
+        # Statements are generated, not run, by the schema editor so this also
+        # works inside the outer transaction on SQLite.
+        editor = connection.schema_editor()
+        for model in INDEXED_MODELS:
+            for index in model._meta.indexes:
+                if action == "remove":
+                    yield f"DROP INDEX {connection.ops.quote_name(index.name)}"
+                else:
+                    yield str(index.create_sql(model, editor))
+
+    def _drop_indexes(self):
+        with connection.cursor() as cursor:
+            for sql in self._index_sql("remove"):
+                cursor.execute(sql)
+
+    def _create_indexes(self):
+        self.stdout.write("Creating indexes...")
+        with connection.cursor() as cursor:
+            for sql in self._index_sql("create"):
+                cursor.execute(sql)
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                tables = ", ".join(m._meta.db_table for m in INDEXED_MODELS)
+                cursor.execute(f"ANALYZE {tables}")
+            elif connection.vendor == "sqlite":
+                cursor.execute("ANALYZE")
+
+    def _explain(self, queries):
+        results = []
+        for _, qs in queries:
+            if connection.vendor == "postgresql":
+                plan = qs.explain(analyze=True, buffers=True)
+            else:
+                plan = qs.explain()
+            started = time.perf_counter()
+            list(qs.all())  # fresh clone, so the two passes don't share a result cache
+            results.append(((time.perf_counter() - started) * 1000, plan))
+        return results
+
+    def _report(self, queries, before, after):
+        for (name, _), (t0, plan0), (t1, plan1) in zip(queries, before, after):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n=== {name}: {t0:.1f} ms -> {t1:.1f} ms"))
+            self.stdout.write("--- without indexes")
+            self.stdout.write(plan0)
+            self.stdout.write("--- with indexes")
+            self.stdout.write(plan1)
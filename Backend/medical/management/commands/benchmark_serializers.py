@@ -0,0 +1,137 @@
+# medical/management/commands/benchmark_serializers.py
+"""
+Time the list endpoints' DRF serializers against their flat counterparts
+(medical.services.flat) at several page sizes.
+
+Synthetic rows are seeded inside one transaction that is rolled back at the
+end, so nothing is left behind. Each timing covers the query and the
+serialization, as a list view does, and is the best of --repeat runs:
+
+    python manage.py benchmark_serializers --rows 50 500 5000
+"""
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from medical.models import Claim, DataAccessLog, Member, MemberDependent, MembershipType, Notification
+from medical.serializers import (
+    ClaimFlatSerializer, ClaimListSerializer, DataAccessLogFlatSerializer, DataAccessLogSerializer,
+    MemberFlatSerializer, MemberSerializer, NotificationFlatSerializer, NotificationSerializer,
+)
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare DRF and flat (.values()) serialization of the hot list endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[50, 500, 5000])
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        sizes = sorted(options["rows"])
+        try:
+            with transaction.atomic():
+                viewer = self._seed(max(sizes))
+                # Serializers read request.user (PII redaction) and ?expand=
+                context = {"request": SimpleNamespace(user=viewer, query_params={})}
+                self._report(self._cases(), sizes, context, options["repeat"])
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS("Done; seeded data rolled back."))
+
+    def _seed(self, n):
+        self.stdout.write(f"Seeding {n} rows per model...")
+        membership_type = MembershipType.objects.create(
+            key=f"bench-{time.time_ns()}", name="Benchmark", annual_limit=250000
+        )
+        viewer = User.objects.create(username=f"bench-viewer-{time.time_ns()}", password="!")
+        users = User.objects.bulk_create(
+            [User(username=f"bench-{viewer.pk}-{i}", first_name="Bench", last_name=str(i), password="!")
+             for i in range(n)],
+            batch_size=BATCH_SIZE,
+        )
+        members = Member.objects.bulk_create(
+            [Member(user=u, membership_type=membership_type, status="active") for u in users],
+            batch_size=BATCH_SIZE,
+        )
+        MemberDependent.objects.bulk_create(
+            [MemberDependent(member=m, full_name=f"Dependant {i}", relationship="child")
+             for i, m in enumerate(members)],
+            batch_size=BATCH_SIZE,
+        )
+        claims = Claim.objects.bulk_create(
+            [Claim(member=m, claim_type="outpatient", status="submitted", notes="Malaria",
+                   details={"diagnosis": "Malaria", "consultation_fee": 2000}, total_claimed=2000)
+             for m in members],
+            batch_size=BATCH_SIZE,
+        )
+        Notification.objects.bulk_create(
+            [Notification(recipient=viewer, title="Claim Update", message="benchmark", type="claim")
+             for _ in range(n)],
+            batch_size=BATCH_SIZE,
+        )
+        DataAccessLog.objects.bulk_create(
+            [DataAccessLog(user=viewer, claim=c, reason="Benchmark") for c in claims],
+            batch_size=BATCH_SIZE,
+        )
+        return viewer
+
+    def _cases(self):
+        # (name, queryset as the view builds it, DRF serializer, flat serializer)
+        seeded_at = timezone.now() - timedelta(hours=1)
+        return [
+            ("ClaimViewSet.list",
+             Claim.objects.select_related("member__user", "member__membership_type")
+             .filter(created_at__gte=seeded_at).order_by("-created_at"),
+             ClaimListSerializer, ClaimFlatSerializer),
+            ("NotificationViewSet.list",
+             Notification.objects.filter(created_at__gte=seeded_at).order_by("-created_at"),
+             NotificationSerializer, NotificationFlatSerializer),
+            ("MemberViewSet.list",
+             Member.objects.select_related("user", "membership_type")
+             .filter(created_at__gte=seeded_at).order_by("-created_at"),
+             MemberSerializer, MemberFlatSerializer),
+            ("DataAccessLogViewSet.list",
+             DataAccessLog.objects.select_related("user", "claim", "attachment")
+             .filter(accessed_at__gte=seeded_at),
+             DataAccessLogSerializer, DataAccessLogFlatSerializer),
+        ]
+
+    def _report(self, cases, sizes, context, repeat):
+        for name, queryset, drf_class, flat_class in cases:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n=== {name}"))
+            self.stdout.write(f"{'rows':>8} {'DRF ms':>10} {'flat ms':>10} {'speedup':>8}")
+            for n in sizes:
+                page = queryset.all()[:n]
+
+                def drf():
+                    return drf_class(page.all(), many=True, context=context).data
+
+                def flat():
+                    serializer = flat_class(context=context)
+                    return serializer.many(serializer.values(page.all()))
+
+                slow, fast = self._time(drf, repeat), self._time(flat, repeat)
+                self.stdout.write(f"{n:>8} {slow:>10.1f} {fast:>10.1f} {slow / max(fast, 1e-6):>7.1f}x")
+
+    def _time(self, fn, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,17 @@
+# medical/management/commands/rebuild_benefit_ledger.py
+from django.core.management.base import BaseCommand
+
+from medical.services.ledger import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-member benefit usage ledger from the claims table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, help="Only rebuild this year (default: all years).")
+
+    def handle(self, *args, **options):
+        year = options.get("year")
+        rows = rebuild(year=year)
+        scope = f"year {year}" if year else "all years"
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt benefit ledger for {scope}: {rows} member-year rows."))
@@ -0,0 +1,12 @@
+# medical/management/commands/rebuild_claim_queue.py
+from django.core.management.base import BaseCommand
+
+from medical.services.claim_queue import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized committee claim queue from the claims table."
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt committee claim queue: {rows} claims."))
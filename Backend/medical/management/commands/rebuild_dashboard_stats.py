@@ -0,0 +1,12 @@
+# medical/management/commands/rebuild_dashboard_stats.py
+from django.core.management.base import BaseCommand
+
+from medical.services.dashboard_stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the dashboard counters from the claims, members and chronic requests tables."
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt dashboard counters: {rows} day/metric rows."))
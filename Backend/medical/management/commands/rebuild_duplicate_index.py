@@ -0,0 +1,12 @@
+# medical/management/commands/rebuild_duplicate_index.py
+from django.core.management.base import BaseCommand
+
+from medical.services.duplicates import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the claim duplicate-detection index (ClaimDuplicateKey) from the claims table."
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt duplicate-detection index: {rows} claims."))
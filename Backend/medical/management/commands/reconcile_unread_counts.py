@@ -0,0 +1,18 @@
+# medical/management/commands/reconcile_unread_counts.py
+from django.core.management.base import BaseCommand
+
+from medical.services.unread_counts import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recount unread notifications and correct the per-user unread counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users",
+                            help="Only this user id (repeatable; default: everyone).")
+
+    def handle(self, *args, **options):
+        checked, corrected = reconcile(user_ids=options.get("users"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled unread counters: {checked} checked, {corrected} corrected."
+        ))
@@ -0,0 +1,12 @@
+# medical/management/commands/refresh_report_tables.py
+from django.core.management.base import BaseCommand
+
+from medical.services.reports import refresh_tables
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly claim rollup the finance reports read."
+
+    def handle(self, *args, **options):
+        rows = refresh_tables()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed report tables: {rows} rollup rows."))
@@ -0,0 +1,44 @@
+# medical/management/commands/reprice_claims.py
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from medical.services.pricing import OPEN_STATUSES, reprice, select_claims
+
+
+class Command(BaseCommand):
+    help = "Re-price claims in bulk with the current reimbursement scales and limits."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--status", default=",".join(OPEN_STATUSES),
+            help=f"Comma-separated claim statuses (default: {','.join(OPEN_STATUSES)}).",
+        )
+        parser.add_argument("--year", type=int, help="Only claims created in this year.")
+        parser.add_argument("--type", dest="claim_type", help="Only this claim type (outpatient/inpatient/chronic).")
+        parser.add_argument("--member", help="Only this member's claims (member id).")
+        parser.add_argument("--dry-run", action="store_true", help="Report the changes without saving them.")
+        parser.add_argument("--show", type=int, default=20, help="Number of changed claims to list.")
+
+    def handle(self, *args, **options):
+        try:
+            claims = select_claims(
+                statuses=[s for s in options["status"].split(",") if s],
+                year=options.get("year"),
+                claim_type=options.get("claim_type"),
+                member_id=options.get("member"),
+            )
+        except ValidationError as e:
+            raise CommandError("; ".join(e.messages))
+
+        summary = reprice(claims, dry_run=options["dry_run"], sample=options["show"])
+
+        for change in summary["changes"]:
+            payable = change["total_payable"]
+            self.stdout.write(f"{change['id']}  {change['status']:<10} {payable['old']:>12} -> {payable['new']:>12}")
+
+        verb = "Would change" if summary["dry_run"] else "Changed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {summary['changed']} of {summary['claims']} claims; "
+            f"total payable {summary['total_payable_before']} -> {summary['total_payable_after']} "
+            f"({summary['total_payable_delta']:+})."
+        ))
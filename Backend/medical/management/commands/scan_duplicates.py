@@ -0,0 +1,24 @@
+# medical/management/commands/scan_duplicates.py
+from django.core.management.base import BaseCommand
+
+from medical.services.duplicates import DATE_WINDOW, rebuild, scan
+
+
+class Command(BaseCommand):
+    help = "Report suspected duplicate claims across the whole book in one pass over the duplicate index."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=DATE_WINDOW,
+            help=f"Service dates this many days apart still count as the same visit (default: {DATE_WINDOW}).",
+        )
+        parser.add_argument("--rebuild", action="store_true", help="Rebuild the index before scanning.")
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            rebuild()
+
+        pairs = scan(days=options["days"])
+        for pair in pairs:
+            self.stdout.write(f"{pair['claims'][0]}  {pair['claims'][1]}  {','.join(pair['reasons'])}")
+        self.stdout.write(self.style.SUCCESS(f"{len(pairs)} suspected duplicate pairs."))
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import ExtractYear
+
+
+BUCKETS = {
+    'pending': ('draft', 'submitted', 'reviewed'),
+    'approved': ('approved',),
+    'paid': ('paid',),
+}
+CRITICAL_Q = (
+    Q(status__in=('approved', 'paid'))
+    & Q(claim_type__iexact='inpatient')
+    & (Q(details__critical_illness=True) | Q(total_claimed__gte=200000))
+)
+
+
+def backfill_ledger(apps, schema_editor):
+    # Mirrors medical.services.ledger.rebuild() against the historical models
+    Claim = apps.get_model('medical', 'Claim')
+    MemberBenefitUsage = apps.get_model('medical', 'MemberBenefitUsage')
+
+    totals = (
+        Claim.objects.exclude(status='rejected')
+        .annotate(usage_year=ExtractYear('created_at'))
+        .order_by()
+        .values('member_id', 'usage_year')
+        .annotate(
+            pending=Sum('total_payable', filter=Q(status__in=BUCKETS['pending'])),
+            approved=Sum('total_payable', filter=Q(status='approved')),
+            paid=Sum('total_payable', filter=Q(status='paid')),
+            critical=Count('pk', filter=CRITICAL_Q),
+        )
+    )
+    MemberBenefitUsage.objects.bulk_create([
+        MemberBenefitUsage(
+            member_id=t['member_id'],
+            year=t['usage_year'],
+            pending_total=t['pending'] or 0,
+            approved_total=t['approved'] or 0,
+            paid_total=t['paid'] or 0,
+            critical_claims=t['critical'],
+        )
+        for t in totals
+    ], batch_size=1000)
+
+    for bucket, statuses in BUCKETS.items():
+        Claim.objects.filter(status__in=statuses).update(
+            ledger_bucket=bucket,
+            ledger_amount=F('total_payable'),
+            ledger_critical=Case(When(CRITICAL_Q, then=Value(True)), default=Value(False)),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical', '0015_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='claim',
+            name='ledger_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='claim',
+            name='ledger_bucket',
+            field=models.CharField(blank=True, editable=False, max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='claim',
+            name='ledger_critical',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.CreateModel(
+            name='MemberBenefitUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('pending_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('approved_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('critical_claims', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='benefit_usage', to='medical.member')),
+            ],
+            options={
+                'unique_together': {('member', 'year')},
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
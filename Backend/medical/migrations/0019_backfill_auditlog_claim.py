@@ -0,0 +1,82 @@
+# Backfills AuditLog.claim / object_type / object_id from the JSON meta of
+# existing rows. Runs in chunks, each committed on its own, so a large audit
+# table is never locked or rewritten in one transaction.
+
+import uuid
+
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 2000
+
+# meta key -> object_type, for rows that are not about a claim
+META_OBJECTS = (
+    ('member_id', 'member'),
+    ('meeting_id', 'committeemeeting'),
+    ('payment_id', 'paymentrecord'),
+)
+
+
+def _claim_ref(row):
+    meta = row.meta or {}
+    ref = meta.get('claim_id')
+    # claim_saved wrote {"id": ..., "status": ...} for claims:UPSERT
+    if not ref and row.action.startswith('claims:'):
+        ref = meta.get('id')
+    try:
+        return str(uuid.UUID(str(ref))) if ref else None
+    except ValueError:
+        return None
+
+
+def backfill(apps, schema_editor):
+    AuditLog = apps.get_model('medical', 'AuditLog')
+    Claim = apps.get_model('medical', 'Claim')
+
+    last_pk = None
+    while True:
+        qs = AuditLog.objects.filter(object_type__isnull=True).order_by('pk')
+        if last_pk is not None:
+            qs = qs.filter(pk__gt=last_pk)
+        rows = list(qs.only('pk', 'action', 'meta')[:CHUNK_SIZE])
+        if not rows:
+            break
+        last_pk = rows[-1].pk
+
+        refs = {row.pk: _claim_ref(row) for row in rows}
+        existing = {
+            str(pk) for pk in Claim.objects.filter(
+                pk__in=[r for r in refs.values() if r]
+            ).values_list('pk', flat=True)
+        }
+
+        changed = []
+        for row in rows:
+            ref = refs[row.pk]
+            if ref:
+                row.object_type, row.object_id = 'claim', ref
+                # The claim may since have been deleted
+                row.claim_id = ref if ref in existing else None
+            else:
+                meta = row.meta or {}
+                for key, object_type in META_OBJECTS:
+                    if meta.get(key):
+                        row.object_type, row.object_id = object_type, str(meta[key])
+                        break
+                else:
+                    continue
+            changed.append(row)
+
+        with transaction.atomic():
+            AuditLog.objects.bulk_update(changed, ['claim', 'object_type', 'object_id'])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('medical', '0018_auditlog_claim'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
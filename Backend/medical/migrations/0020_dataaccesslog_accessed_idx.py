@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical', '0019_backfill_auditlog_claim'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dataaccesslog',
+            index=models.Index(fields=['-accessed_at', '-id'], name='dal_accessed_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+CHUNK_SIZE = 2000
+CLAIM_FIELDS = (
+    'claim_type', 'status', 'total_claimed', 'total_payable', 'member_payable',
+    'shif_number', 'created_at', 'submitted_at',
+)
+
+
+def backfill_queue(apps, schema_editor):
+    # Mirrors medical.services.claim_queue.rebuild() against the historical models
+    Claim = apps.get_model('medical', 'Claim')
+    ClaimQueueEntry = apps.get_model('medical', 'ClaimQueueEntry')
+
+    rows = Claim.objects.order_by().values_list(
+        'pk', 'member__user__first_name', 'member__user__last_name', 'member__user__username',
+        'member__membership_type__name', 'member__status', *CLAIM_FIELDS,
+    )
+    batch = []
+    for pk, first_name, last_name, username, membership_type, member_status, *values in rows.iterator(chunk_size=CHUNK_SIZE):
+        fields = dict(zip(CLAIM_FIELDS, values))
+        search = (username, first_name, last_name, fields['shif_number'])
+        batch.append(ClaimQueueEntry(
+            claim_id=pk,
+            member_name=f'{first_name} {last_name}'.strip() or username,
+            member_username=username,
+            membership_type=membership_type,
+            member_status=member_status,
+            search_text=' '.join(s for s in search if s).lower(),
+            **fields,
+        ))
+        if len(batch) >= CHUNK_SIZE:
+            ClaimQueueEntry.objects.bulk_create(batch)
+            batch = []
+    ClaimQueueEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical', '0020_dataaccesslog_accessed_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaimQueueEntry',
+            fields=[
+                ('claim', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='queue_entry', serialize=False, to='medical.claim')),
+                ('member_name', models.CharField(max_length=300)),
+                ('member_username', models.CharField(max_length=150)),
+                ('membership_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('member_status', models.CharField(max_length=20)),
+                ('claim_type', models.CharField(max_length=50)),
+                ('status', models.CharField(max_length=20)),
+                ('total_claimed', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_payable', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('member_payable', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('shif_number', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('search_text', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-created_at'], name='queue_created_idx'), models.Index(fields=['status', '-created_at'], name='queue_status_created_idx'), models.Index(fields=['claim_type', '-created_at'], name='queue_type_created_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_queue, migrations.RunPython.noop),
+    ]
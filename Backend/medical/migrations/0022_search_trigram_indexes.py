@@ -0,0 +1,45 @@
+# pg_trgm GIN indexes for the ?q= searches (medical.services.search).
+# The indexes are on UPPER(column), the expression Django's icontains
+# compares against, so ILIKE-style '%q%' filters use them. PostgreSQL only:
+# other databases skip both operations.
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+TRIGRAM_INDEXES = (
+    ('queue_search_trgm_idx', 'medical_claimqueueentry', 'search_text'),
+    ('user_username_trgm_idx', 'auth_user', 'username'),
+    ('user_first_name_trgm_idx', 'auth_user', 'first_name'),
+    ('user_last_name_trgm_idx', 'auth_user', 'last_name'),
+    ('user_email_trgm_idx', 'auth_user', 'email'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('medical', '0021_claimqueueentry'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
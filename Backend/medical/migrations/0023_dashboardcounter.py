@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:23
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_counters(apps, schema_editor):
+    # Mirrors medical.services.dashboard_stats.rebuild() against the historical models
+    Claim = apps.get_model('medical', 'Claim')
+    Member = apps.get_model('medical', 'Member')
+    ChronicRequest = apps.get_model('medical', 'ChronicRequest')
+    DashboardCounter = apps.get_model('medical', 'DashboardCounter')
+
+    rows = [
+        DashboardCounter(day=r['day'], metric=f"claims:{r['status']}", count=r['n'], amount=r['payable'] or 0)
+        for r in Claim.objects.annotate(day=TruncDate('created_at')).order_by()
+        .values('day', 'status').annotate(n=Count('pk'), payable=Sum('total_payable'))
+    ]
+    for model, metric in ((Member, 'members'), (ChronicRequest, 'chronic_requests')):
+        rows += [
+            DashboardCounter(day=r['day'], metric=metric, count=r['n'])
+            for r in model.objects.annotate(day=TruncDate('created_at')).order_by()
+            .values('day').annotate(n=Count('pk'))
+        ]
+    DashboardCounter.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical', '0022_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('metric', models.CharField(max_length=40)),
+                ('count', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', 'day'], name='dashcounter_metric_day_idx')],
+                'unique_together': {('day', 'metric')},
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:27
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical', '0023_dashboardcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaimReportRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('claim_type', models.CharField(max_length=50)),
+                ('status', models.CharField(max_length=20)),
+                ('membership_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('provider', models.CharField(blank=True, max_length=255, null=True)),
+                ('claims', models.IntegerField(default=0)),
+                ('total_claimed', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_payable', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('paid_claims', models.IntegerField(default=0)),
+                ('turnaround_seconds', models.BigIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month'], name='reportrow_month_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('report', models.CharField(max_length=50)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'Excel'), ('pdf', 'PDF')], default='csv', max_length=10)),
+                ('params_key', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('file', models.FileField(blank=True, null=True, upload_to='reports/%Y/%m/')),
+                ('row_count', models.IntegerField(default=0)),
+                ('data_as_of', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['params_key', '-created_at'], name='reportrun_key_created_idx')],
+            },
+        ),
+    ]
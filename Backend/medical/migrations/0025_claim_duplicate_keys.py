@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical', '0024_reporting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaimDuplicateKey',
+            fields=[
+                ('claim', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='duplicate_key', serialize=False, to='medical.claim')),
+                ('receipt_number', models.CharField(blank=True, max_length=100, null=True)),
+                ('provider', models.CharField(blank=True, max_length=255, null=True)),
+                ('amount', models.BigIntegerField(default=0)),
+                ('service_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='medical.member')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['receipt_number'], name='dupkey_receipt_idx'), models.Index(fields=['member', 'amount', 'service_date'], name='dupkey_member_amount_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:42
+
+import medical.models
+from django.db import migrations, models
+
+
+def mark_existing_ready(apps, schema_editor):
+    # Attachments uploaded before the pipeline existed were stored directly
+    ClaimAttachment = apps.get_model('medical', 'ClaimAttachment')
+    ClaimAttachment.objects.update(status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical', '0025_claim_duplicate_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='claimattachment',
+            name='error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='claimattachment',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='claimattachment',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='claimattachment',
+            name='size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='claimattachment',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('rejected', 'Rejected'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='claimattachment',
+            name='thumbnail',
+            field=models.FileField(blank=True, null=True, upload_to='claim_attachments/thumbnails/'),
+        ),
+        migrations.AlterField(
+            model_name='claimattachment',
+            name='file',
+            field=models.FileField(max_length=255, upload_to=medical.models.attachment_upload_to),
+        ),
+        migrations.RunPython(mark_existing_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:06
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical', '0027_notification_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveBatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('notifications', 'Notifications'), ('audit_logs', 'Audit logs')], max_length=20)),
+                ('file', models.FileField(upload_to='archives/%Y/%m/')),
+                ('row_count', models.IntegerField(default=0)),
+                ('oldest', models.DateTimeField()),
+                ('newest', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['kind', 'newest'], name='archive_kind_newest_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical', '0029_emailoutbox_sending_last_attempt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='claimattachment',
+            name='last_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -22,10 +22,10 @@ class Setting(models.Model):
 
     @staticmethod
     def get(key: str, default=None):
-        try:
-            return Setting.objects.get(key=key).value
-        except Setting.DoesNotExist:
-            return default or {}
+        # Served from the versioned config cache (medical.services.config_cache)
+        from .services.config_cache import get_setting
+        value = get_setting(key)
+        return value if value is not None else (default or {})
 
 
 # ---------------------------
@@ -152,6 +152,12 @@ class ReimbursementScale(models.Model):
     def __str__(self):
         return f"{self.category} ({self.fund_share}/{self.member_share} up to {self.ceiling})"
 
+    @staticmethod
+    def for_category(category: str):
+        """Scale for a claim type (case-insensitive), from the config cache."""
+        from .services.config_cache import get_scale
+        return get_scale(category)
+
 
 # ---------------------------
 # Claims & Items
@@ -191,8 +197,21 @@ class Claim(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # What this claim currently contributes to MemberBenefitUsage
+    # (maintained by medical.services.ledger, never edited directly)
+    ledger_bucket = models.CharField(max_length=10, blank=True, null=True, editable=False)
+    ledger_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    ledger_critical = models.BooleanField(default=False, editable=False)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # member claim lists / counts, committee status queues, date-range dashboards
+            models.Index(fields=['member', '-created_at'], name='claim_member_created_idx'),
+            models.Index(fields=['member', 'status'], name='claim_member_status_idx'),
+            models.Index(fields=['status', '-created_at'], name='claim_status_created_idx'),
+            models.Index(fields=['created_at'], name='claim_created_idx'),
+        ]
 
     # ------- validation according to bylaws -------
     def clean(self):
@@ -220,10 +239,23 @@ class Claim(models.Model):
                 raise ValidationError("Claims exceeding KSh 150,000 require Board of Trustees ratification before approval/payment.")
 
         # 4) Appeal Freeze
-        if self.appeals.filter(status='pending').exists():
+        if self.has_pending_appeal():
             if self.status not in ['draft', 'submitted', 'rejected']:
                 raise ValidationError("Claim is currently under appeal and cannot be modified or processed by the committee.")
 
+    # ------- governance lookups (served from prefetched rows when present) -------
+    def latest_locked_link(self):
+        """The most recent ClaimMeetingLink whose meeting is locked, or None."""
+        if "meeting_links" in getattr(self, "_prefetched_objects_cache", {}):
+            links = [l for l in self.meeting_links.all() if l.meeting.status == "locked"]
+            return max(links, key=lambda l: l.pk, default=None)
+        return self.meeting_links.filter(meeting__status="locked").select_related("meeting").last()
+
+    def has_pending_appeal(self):
+        if "appeals" in getattr(self, "_prefetched_objects_cache", {}):
+            return any(a.status == "pending" for a in self.appeals.all())
+        return self.appeals.filter(status='pending').exists()
+
     # -------------------------------------------------------------------
     # SGSS BYELAW RULE ENGINE HELPERS
     # -------------------------------------------------------------------
@@ -271,36 +303,16 @@ class Claim(models.Model):
 
     def enforce_annual_limit(self):
         """Enforce annual limit (250k + 200k critical top-up)."""
-        from django.db.models import Sum
-        year = timezone.now().year
-
-        previous = (
-            Claim.objects.filter(
-                member=self.member,
-                status__in=["approved", "paid"],
-                submitted_at__year=year
-            ).aggregate(Sum("total_payable"))["total_payable__sum"]
-            or 0
-        )
-
-        base_limit = 250000
-        critical_boost = 200000 if (
-            self.claim_type == "inpatient" and
-            (self.details or {}).get("critical_illness")
-        ) else 0
-
-        limit = base_limit + critical_boost
-
-        if float(previous) + float(self.total_payable or 0) > limit:
-            raise ValidationError("Annual limit exceeded.")
+        from .services.rules import enforce_annual_limit
+        enforce_annual_limit(self)
 
     @transaction.atomic
-    def recalc_total(self):
+    def recalc_total(self, skip_save=False, include_items=True):
         """Safely recompute claim total from items OR details (fallback)."""
         items_total = (
             self.items.aggregate(sum=models.Sum(models.F('amount') * models.F('quantity')))['sum']
             or 0
-        )
+        ) if include_items else 0
         
         # If items exist, they are authoritative.
         # If no items, we check if there's data in 'details' (legacy or simplified forms)
@@ -310,7 +322,8 @@ class Claim(models.Model):
         else:
             self.total_claimed = items_total
 
-        super().save(update_fields=['total_claimed'])
+        if not skip_save:
+            super().save(update_fields=['total_claimed'])
 
     @transaction.atomic
     def compute_payable(self, skip_save=False):
@@ -340,7 +353,7 @@ class Claim(models.Model):
             "clinic_outpatient_percent": 100
         })
 
-        scale = ReimbursementScale.objects.filter(category__iexact=self.claim_type).first()
+        scale = ReimbursementScale.for_category(self.claim_type)
         fund_share_percent = float(scale.fund_share) if scale else float(general.get('fund_share_percent', 80))
         ceiling = float(scale.ceiling) if scale else float(general.get('annual_limit', 50000))
 
@@ -363,14 +376,11 @@ class Claim(models.Model):
             member_share_amount = float(self.total_claimed) - fund_share_amount - shif_amount - other_ins
 
         # Annual membership limit (per membership type limit)
+        # (the member's other claims this year, read from the benefit usage ledger)
+        from .services.ledger import usage_for, own_share, claim_year
         membership_limit = float(self.member.membership_type.annual_limit or 0)
-        year = timezone.now().year
-        spent = (
-            Claim.objects.filter(member=self.member, created_at__year=year)
-            .exclude(pk=self.pk)
-            .aggregate(sum=models.Sum('total_payable'))['sum'] or 0
-        )
-        spent = float(spent)
+        usage = usage_for(self.member_id, claim_year(self))
+        spent = float(usage.committed_total - own_share(self))
         if spent + fund_share_amount > membership_limit:
             fund_share_amount = max(0, membership_limit - spent)
             member_share_amount = float(self.total_claimed) - fund_share_amount - shif_amount - other_ins
@@ -385,6 +395,182 @@ class Claim(models.Model):
         return f"Claim {self.id} ({self.status})"
 
 
+# ---------------------------
+# Benefit usage ledger
+# ---------------------------
+class MemberBenefitUsage(models.Model):
+    """
+    Running per-member, per-year totals of claim payables by bucket.
+
+    Kept in step with claim saves by medical.services.ledger and rebuilt in
+    bulk by `manage.py rebuild_benefit_ledger`. Years follow Claim.created_at.
+    """
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='benefit_usage')
+    year = models.PositiveIntegerField()
+    pending_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)   # draft/submitted/reviewed
+    approved_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    critical_claims = models.PositiveIntegerField(default=0)  # approved/paid critical-illness inpatient claims
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('member', 'year')
+
+    @property
+    def used_total(self):
+        """Approved + paid: what counts against the annual benefit."""
+        return self.approved_total + self.paid_total
+
+    @property
+    def committed_total(self):
+        """Everything not rejected, including claims still in review."""
+        return self.pending_total + self.approved_total + self.paid_total
+
+    @property
+    def critical_topup(self):
+        return self.critical_claims > 0
+
+    def __str__(self):
+        return f"{self.member} {self.year}: {self.used_total} used"
+
+
+# ---------------------------
+# Committee claim queue (read model)
+# ---------------------------
+class ClaimQueueEntry(models.Model):
+    """
+    One denormalized row per claim for the committee queue: the member's
+    display name, membership type and status are copied in so listing and
+    searching the queue reads this table alone.
+
+    Kept current by medical.services.claim_queue (refreshed after commit when
+    a claim, member, user or membership type changes); rebuilt in bulk by
+    `manage.py rebuild_claim_queue`.
+    """
+    claim = models.OneToOneField(Claim, on_delete=models.CASCADE, primary_key=True, related_name='queue_entry')
+    member_name = models.CharField(max_length=300)
+    member_username = models.CharField(max_length=150)
+    membership_type = models.CharField(max_length=100, blank=True, null=True)
+    member_status = models.CharField(max_length=20)
+    claim_type = models.CharField(max_length=50)
+    status = models.CharField(max_length=20)
+    total_claimed = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_payable = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    member_payable = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    shif_number = models.CharField(max_length=100, blank=True, null=True)
+    created_at = models.DateTimeField()
+    submitted_at = models.DateTimeField(blank=True, null=True)
+    # lower-cased username, first/last name and SHIF number for ?q= search
+    search_text = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='queue_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='queue_status_created_idx'),
+            models.Index(fields=['claim_type', '-created_at'], name='queue_type_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Queue {self.claim_id} ({self.status})"
+
+
+# ---------------------------
+# Dashboard statistics
+# ---------------------------
+class DashboardCounter(models.Model):
+    """
+    Per-day counters behind the dashboards: one row per local day and
+    metric, e.g. "claims:submitted" (count + total payable of the claims
+    created that day now in that status), "members", "chronic_requests".
+
+    Updated incrementally by medical.services.dashboard_stats and rebuilt
+    nightly (`manage.py rebuild_dashboard_stats`).
+    """
+    day = models.DateField()
+    metric = models.CharField(max_length=40)
+    count = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('day', 'metric')
+        indexes = [
+            models.Index(fields=['metric', 'day'], name='dashcounter_metric_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.metric}: {self.count}"
+
+
+# ---------------------------
+# Reporting
+# ---------------------------
+class ClaimReportRow(models.Model):
+    """
+    Monthly claim rollup the finance reports read instead of the claims
+    table: one row per month (of created_at), claim type, status, membership
+    type and provider. Rebuilt by medical.services.reports.refresh_tables().
+    """
+    month = models.DateField()
+    claim_type = models.CharField(max_length=50)
+    status = models.CharField(max_length=20)
+    membership_type = models.CharField(max_length=100, blank=True, null=True)
+    provider = models.CharField(max_length=255, blank=True, null=True)  # details.hospital_name
+    claims = models.IntegerField(default=0)
+    total_claimed = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_payable = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    paid_claims = models.IntegerField(default=0)  # paid claims with a known submit and pay date
+    turnaround_seconds = models.BigIntegerField(default=0)  # sum of submitted -> paid
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['month'], name='reportrow_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.claim_type} {self.status}: {self.claims}"
+
+
+class ReportRun(models.Model):
+    """
+    One generated report file. Runs with the same report, parameters and
+    format are reused while the rollup they were built from is current.
+    """
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel'),
+        ('pdf', 'PDF'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    report = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    params_key = models.CharField(max_length=64)  # sha256 of report + params + format
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    file = models.FileField(upload_to='reports/%Y/%m/', blank=True, null=True)
+    row_count = models.IntegerField(default=0)
+    data_as_of = models.DateTimeField(blank=True, null=True)  # rollup refresh the file was built from
+    error = models.TextField(blank=True, null=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['params_key', '-created_at'], name='reportrun_key_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.report} ({self.format}, {self.status})"
+
+
 class ClaimItem(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     claim = models.ForeignKey(Claim, on_delete=models.CASCADE, related_name='items')
@@ -419,7 +605,7 @@ class ClaimReview(models.Model):
         amount = self.claim.override_amount or self.claim.total_payable
         if amount and float(amount) > 150000:
             # Check for linked locked meeting type
-            latest_link = self.claim.meeting_links.filter(meeting__status="locked").last()
+            latest_link = self.claim.latest_locked_link()
             if latest_link and latest_link.meeting.meeting_type != 'emergency':
                 raise ValidationError("Claims exceeding Ksh 150,000 require ratification in an EMERGENCY meeting.")
             
@@ -453,6 +639,25 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at'], name='notif_recipient_created_idx'),
+            # unread counts / mark-all-read only ever touch unread rows
+            models.Index(fields=['recipient'], condition=models.Q(read=False), name='notif_unread_idx'),
+        ]
+
+
+class NotificationCounter(models.Model):
+    """
+    Unread notifications per user, so the notification bell reads one row
+    (behind a cache) instead of counting.
+
+    Moved in the same transaction as notification inserts and mark-read
+    updates by medical.services.unread_counts; reconciled nightly
+    (`manage.py reconcile_unread_counts`).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    unread = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class AuditLog(models.Model):
@@ -465,9 +670,57 @@ class AuditLog(models.Model):
     previous_state = models.JSONField(blank=True, null=True)
     new_state = models.JSONField(blank=True, null=True)
     meeting = models.ForeignKey('CommitteeMeeting', on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs')
+
+    # What the entry is about (see medical.audit.log_event). Claim entries
+    # also get the FK so a claim's history is an index range scan.
+    claim = models.ForeignKey(Claim, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs', db_index=False)
+    object_type = models.CharField(max_length=50, blank=True, null=True)  # model_name, e.g. "member"
+    object_id = models.CharField(max_length=64, blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['claim', 'created_at'], name='audit_claim_created_idx'),
+            models.Index(fields=['object_type', 'object_id'], name='audit_object_idx'),
+            models.Index(fields=['-created_at'], name='audit_created_idx'),
+        ]
+
+
+class EmailOutbox(models.Model):
+    """
+    Transactional outbox for outgoing email.
+
+    Rows are written inside the same transaction as the change that triggers
+    the email, and handed to Celery only once that transaction commits.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50)  # e.g. "claim_submitted"
+    object_id = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_attempt_at = models.DateTimeField(blank=True, null=True)  # when a worker last claimed the row
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='outbox_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} -> {self.object_id} ({self.status})"
+
 
 class DataAccessLog(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -479,6 +732,37 @@ class DataAccessLog(models.Model):
 
     class Meta:
         ordering = ['-accessed_at']
+        indexes = [
+            models.Index(fields=['-accessed_at', '-id'], name='dal_accessed_idx'),
+        ]
+
+
+class ArchiveBatch(models.Model):
+    """
+    One gzipped JSON-lines file of rows moved out of a hot table
+    (read notifications, old audit entries) by medical.services.retention.
+    The rows are deleted in the same transaction that records the batch.
+    """
+    KIND_CHOICES = [
+        ('notifications', 'Notifications'),
+        ('audit_logs', 'Audit logs'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    file = models.FileField(upload_to='archives/%Y/%m/')
+    row_count = models.IntegerField(default=0)
+    oldest = models.DateTimeField()  # created_at range of the archived rows
+    newest = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['kind', 'newest'], name='archive_kind_newest_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.row_count} rows ({self.oldest:%Y-%m-%d} - {self.newest:%Y-%m-%d})"
 
 
 # ---------------------------
@@ -570,6 +854,34 @@ class ClaimFingerprint(models.Model):
         return f"Fingerprint for {self.claim_id}"
 
 
+class ClaimDuplicateKey(models.Model):
+    """
+    Normalized duplicate-detection components of a claim: receipt number,
+    provider, amount in whole shillings and service date. Lookups for the
+    same receipt across members, or the same member and amount within a few
+    days, are index range scans here instead of hashing the claims table.
+
+    Kept current by medical.services.duplicates (refreshed after commit when
+    a claim changes); backfilled by `manage.py rebuild_duplicate_index`.
+    """
+    claim = models.OneToOneField(Claim, on_delete=models.CASCADE, primary_key=True, related_name='duplicate_key')
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='+')
+    receipt_number = models.CharField(max_length=100, blank=True, null=True)
+    provider = models.CharField(max_length=255, blank=True, null=True)
+    amount = models.BigIntegerField(default=0)
+    service_date = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['receipt_number'], name='dupkey_receipt_idx'),
+            models.Index(fields=['member', 'amount', 'service_date'], name='dupkey_member_amount_idx'),
+        ]
+
+    def __str__(self):
+        return f"Duplicate key for {self.claim_id}"
+
+
 class ChronicRequest(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='chronic_requests')
@@ -583,14 +895,37 @@ class ChronicRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
 
+def attachment_upload_to(instance, filename):
+    # New uploads are staged until medical.services.attachments has checked them
+    if instance.status == 'pending':
+        return f"claim_attachments/staging/{uuid.uuid4().hex}/{filename}"
+    return f"claim_attachments/{filename}"
+
+
 class ClaimAttachment(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),        # staged, waiting for the processing pipeline
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('rejected', 'Rejected'),      # failed validation; the file was removed
+        ('failed', 'Failed'),          # processing kept erroring
+    ]
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     claim = models.ForeignKey(Claim, on_delete=models.CASCADE, related_name='attachments')
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
-    file = models.FileField(upload_to='claim_attachments/')
+    file = models.FileField(upload_to=attachment_upload_to, max_length=255)
     content_type = models.CharField(max_length=100, blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    # Filled in by the processing pipeline (medical.services.attachments)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True, null=True)
+    size = models.BigIntegerField(blank=True, null=True)
+    page_count = models.PositiveIntegerField(blank=True, null=True)
+    thumbnail = models.FileField(upload_to='claim_attachments/thumbnails/', blank=True, null=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    last_attempt_at = models.DateTimeField(blank=True, null=True)  # when a worker last claimed it
+
 class PaymentRecord(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     claim = models.OneToOneField(Claim, on_delete=models.CASCADE, related_name='payment_record')
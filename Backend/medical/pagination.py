@@ -0,0 +1,122 @@
+# Backend/medical/pagination.py
+"""
+Keyset (cursor) pagination on (created_at, id), newest first.
+
+Each page is fetched with `WHERE (created_at, id) < (cursor) ORDER BY
+created_at DESC, id DESC LIMIT n+1`, so deep pages cost the same as the
+first one: no COUNT(*) and no OFFSET scan.
+
+    GET /api/claims/?pagination=cursor           -> {"next": url, "results": [...]}
+    GET /api/claims/?cursor=<opaque>&page_size=100
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, replace_query_param
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    ordering_field = "created_at"
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        field = self.ordering_field
+        size = self.get_page_size(request)
+
+        queryset = queryset.order_by(f"-{field}", "-pk")
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            value, pk = position
+            queryset = queryset.filter(Q(**{f"{field}__lt": value}) | Q(**{field: value, "pk__lt": pk}))
+
+        rows = list(queryset[:size + 1])
+        page = rows[:size]
+        self.next_position = self._position(page[-1]) if len(rows) > size else None
+        return page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _position(self, row):
+        # Works for model instances and .values() dicts alike
+        if isinstance(row, dict):
+            return row[self.ordering_field], row.get("pk", row.get("id"))
+        return getattr(row, self.ordering_field), row.pk
+
+    def encode_cursor(self, position):
+        value, pk = position
+        raw = f"{value.isoformat()}|{pk}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode()
+            value, pk = raw.split("|", 1)
+            return datetime.fromisoformat(value), model._meta.pk.to_python(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class CreatedAtPagination(PageNumberPagination):
+    """
+    Page numbers by default, so existing clients keep working; keyset mode
+    when the request carries `?cursor=` or `?pagination=cursor`.
+    """
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.keyset_class.cursor_query_param in params or params.get("pagination") == "cursor":
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class AccessedAtKeysetPagination(KeysetPagination):
+    ordering_field = "accessed_at"
+
+
+class AccessedAtPagination(CreatedAtPagination):
+    keyset_class = AccessedAtKeysetPagination
@@ -1,14 +1,16 @@
 # medical/permissions.py
 from rest_framework import permissions
 
+from .services.roles import has_any_group
+
 
 def _in_group(user, names: list[str]) -> bool:
     if not user or not user.is_authenticated:
         return False
     if user.is_superuser:
         return True
-    groups = set(user.groups.values_list("name", flat=True))
-    return any(name in groups for name in names)
+    # Resolved once per request (see medical.services.roles)
+    return has_any_group(user, names)
 
 
 class IsAdmin(permissions.BasePermission):
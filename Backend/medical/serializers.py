@@ -4,10 +4,15 @@ from django.contrib.auth import get_user_model, models as auth_models
 from django.utils import timezone
 from datetime import datetime, date
 from django.contrib.auth.models import Group
+from django.urls import reverse
+from rest_framework.fields import SkipField
+from .services.flat import FlatSerializer
+from .services.roles import has_any_group, primary_group
 from .models import (
     Member, MembershipType, Claim, ClaimItem, ClaimReview, AuditLog,
     Notification, ReimbursementScale, Setting, ChronicRequest, ClaimAttachment, MemberDependent,
-    CommitteeMeeting, MeetingAttendance, ClaimMeetingLink, ClaimAppeal, PaymentRecord, DataAccessLog
+    CommitteeMeeting, MeetingAttendance, ClaimMeetingLink, ClaimAppeal, PaymentRecord, DataAccessLog,
+    ReportRun,
 )
 
 User = get_user_model()
@@ -127,7 +132,7 @@ class ClaimItemSerializer(serializers.ModelSerializer):
 # medical/serializers.py
 class ClaimReviewSerializer(serializers.ModelSerializer):
     reviewer = serializers.SerializerMethodField()
-    role = serializers.CharField(source="reviewer.groups.first.name", read_only=True)
+    role = serializers.SerializerMethodField()
 
     def get_reviewer(self, obj):
         if not obj.reviewer:
@@ -138,6 +143,10 @@ class ClaimReviewSerializer(serializers.ModelSerializer):
             "name": f"{obj.reviewer.first_name} {obj.reviewer.last_name}".strip() or obj.reviewer.username,
         }
 
+    def get_role(self, obj):
+        # Reviewer's first group, resolved through the role cache
+        return primary_group(obj.reviewer) if obj.reviewer else None
+
     class Meta:
         model = ClaimReview
         fields = ["id", "claim", "role", "action", "note", "byelaw_reference", "created_at", "reviewer"]
@@ -174,10 +183,30 @@ class ClaimAttachmentSerializer(serializers.ModelSerializer):
             "file",
             "content_type",
             "uploaded_at",
+            "status",
+            "error",
+            "size",
+            "page_count",
+            "thumbnail",
+            "processed_at",
             "label",
             "is_summary",
         ]
-        read_only_fields = ["id", "uploaded_at", "uploaded_by_email", "label", "is_summary"]
+        read_only_fields = [
+            "id", "uploaded_at", "uploaded_by_email", "label", "is_summary",
+            "status", "error", "size", "page_count", "thumbnail", "processed_at",
+        ]
+
+    def validate_file(self, value):
+        # Content checks (MIME, image integrity, virus scan) run on a worker
+        # after upload; see medical.services.attachments
+        from django.core.exceptions import ValidationError as DjangoValidationError
+        from medical.validators import validate_upload_basics
+        try:
+            validate_upload_basics(value)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return value
 
     def _file_name(self, obj):
         try:
@@ -206,6 +235,39 @@ class ClaimAttachmentSerializer(serializers.ModelSerializer):
 # CLEAN + LAW-COMPLIANT CLAIM SERIALIZER
 # -------------------------------
 
+def redact_claim_pii(data, user, owner_id):
+    """
+    PHASE 2C: PII masking of a serialized claim, in place. Shared by
+    ClaimSerializer and ClaimFlatSerializer.
+    """
+    # Logic: Only Medical Reviewers (handled via specific group or admin) see full notes.
+    # For general Committee members, redact the 'notes' (diagnosis) field.
+    # Admin and Owner see it.
+
+    is_owner = owner_id == user.pk
+    is_admin = user.is_superuser
+
+    # Check if user is in "Committee" but NOT specifically "MedicalReviewer" (if role exists)
+    # For now, if role is just "Committee", we redact if they are not the owner/admin.
+    # Group names are resolved once per request (medical.services.roles),
+    # not once per serialized claim.
+    is_committee = has_any_group(user, ["Committee"]) or is_admin
+
+    # Determine if they should see PII
+    # In a real system, we'd have a 'MedicalReviewer' group for this.
+    can_see_pii = is_owner or is_admin or has_any_group(user, ["MedicalReviewer"])
+
+    if is_committee and not can_see_pii:
+        if data.get("notes"):
+            data["notes"] = "[REDACTED - MEDICAL PRIVACY]"
+        if data.get("details"):
+            # Mask sensitive fields in JSON
+            if "diagnosis" in data["details"]:
+                data["details"]["diagnosis"] = "[REDACTED]"
+
+    return data
+
+
 class ClaimSerializer(serializers.ModelSerializer):
     items = ClaimItemSerializer(many=True, read_only=True)
     attachments = ClaimAttachmentSerializer(many=True, read_only=True)
@@ -241,35 +303,7 @@ class ClaimSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         if not request:
             return data
-            
-        user = request.user
-        # Logic: Only Medical Reviewers (handled via specific group or admin) see full notes.
-        # For general Committee members, redact the 'notes' (diagnosis) field.
-        # Admin and Owner see it.
-        
-        is_owner = instance.member.user == user
-        is_admin = user.is_superuser
-        
-        # Check if user is in "Committee" but NOT specifically "MedicalReviewer" (if role exists)
-        # For now, if role is just "Committee", we redact if they are not the owner/admin.
-        # We need _in_group which is in permissions.py, but we can't easily import it here 
-        # without circularity if views/permissions import serializers.
-        # Let's use user.groups.filter instead.
-        is_committee = user.groups.filter(name="Committee").exists() or is_admin
-        
-        # Determine if they should see PII
-        # In a real system, we'd have a 'MedicalReviewer' group for this.
-        can_see_pii = is_owner or is_admin or user.groups.filter(name="MedicalReviewer").exists()
-
-        if is_committee and not can_see_pii:
-            if data.get("notes"):
-                data["notes"] = "[REDACTED - MEDICAL PRIVACY]"
-            if data.get("details"):
-                 # Mask sensitive fields in JSON
-                 if "diagnosis" in data["details"]:
-                     data["details"]["diagnosis"] = "[REDACTED]"
-        
-        return data
+        return redact_claim_pii(data, request.user, instance.member.user_id)
 
     # -----------------------
     # SAFE DATE PARSER
@@ -284,6 +318,16 @@ class ClaimSerializer(serializers.ModelSerializer):
         except Exception:
             return None
 
+    @staticmethod
+    def _default_notes(claim_type, details):
+        if claim_type == "outpatient":
+            return details.get("diagnosis") or "Outpatient treatment"
+        if claim_type == "inpatient":
+            return details.get("hospital_name") or "Inpatient treatment"
+        if claim_type == "chronic":
+            return "Chronic medication request"
+        return None
+
     # -----------------------
     # CREATE CLAIM
     # -----------------------
@@ -303,16 +347,13 @@ class ClaimSerializer(serializers.ModelSerializer):
             validated_data["date_of_first_visit"] = self._parse_date(
                 details.get("date_of_first_visit")
             )
-            validated_data["notes"] = details.get("diagnosis") or "Outpatient treatment"
-
         elif claim_type == "inpatient":
             validated_data["date_of_discharge"] = self._parse_date(
                 details.get("date_of_discharge")
             )
-            validated_data["notes"] = details.get("hospital_name") or "Inpatient treatment"
-
-        elif claim_type == "chronic":
-            validated_data["notes"] = "Chronic medication request"
+        notes = self._default_notes(claim_type, details)
+        if notes:
+            validated_data["notes"] = notes
 
         # Auto-submission timestamp
         if validated_data.get("status") == "submitted":
@@ -386,6 +427,14 @@ class ClaimSerializer(serializers.ModelSerializer):
         # Duplicate Detection (Phase 2B)
         # -------------------------------------------------------
         if status == "submitted":
+            # The fingerprint covers notes and total_claimed: fill them in as
+            # saving will, or the hash never matches the registered one
+            if candidate._state.adding:
+                candidate.notes = self._default_notes(claim_type, candidate.details) or candidate.notes
+                candidate.total_claimed = candidate.calculate_total_claimed()
+            else:
+                candidate.recalc_total(skip_save=True)
+
             from medical.services.verification import check_for_duplicate
             _, is_duplicate = check_for_duplicate(candidate)
             if is_duplicate:
@@ -396,6 +445,32 @@ class ClaimSerializer(serializers.ModelSerializer):
         return attrs
 
 
+CLAIM_EXPANDABLE = ("items", "attachments", "reviews")
+
+
+def requested_expansions(request):
+    """Nested claim relations asked for with ?expand=items,reviews (or ?expand=all)."""
+    raw = request.query_params.get("expand", "") if request is not None else ""
+    names = {name.strip() for name in raw.split(",") if name.strip()}
+    if "all" in names:
+        return set(CLAIM_EXPANDABLE)
+    return names & set(CLAIM_EXPANDABLE)
+
+
+class ClaimListSerializer(ClaimSerializer):
+    """
+    Claim list rows: ClaimSerializer without the nested items, attachments
+    and reviews unless the request names them in ?expand=. The view only
+    prefetches what is expanded (ClaimViewSet.get_queryset).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = requested_expansions(self.context.get("request"))
+        for name in CLAIM_EXPANDABLE:
+            if name not in expand:
+                self.fields.pop(name)
+
 
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
@@ -456,7 +531,7 @@ class AuditLogSerializer(serializers.ModelSerializer):
             return obj.meta.get("role")
         # First group name or fallback
         try:
-            return obj.actor.groups.values_list("name", flat=True).first() or ("admin" if obj.actor.is_superuser else "member")
+            return primary_group(obj.actor) or ("admin" if obj.actor.is_superuser else "member")
         except Exception:
             return "member"
 
@@ -535,3 +610,99 @@ class PaymentRecordSerializer(serializers.ModelSerializer):
             "reconciled_by_name", "reconciled_at"
         ]
         read_only_fields = ["id", "reconciled", "reconciled_by_name", "reconciled_at"]
+
+
+class ReportRunSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportRun
+        fields = [
+            "id", "report", "params", "format", "status", "row_count",
+            "data_as_of", "error", "created_at", "finished_at", "download_url",
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != "done":
+            return None
+        url = reverse("reports-download", args=[obj.pk])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+
+# -------------------------------
+# FLAT LIST SERIALIZERS (medical.services.flat)
+# Same output as the serializers above, built from .values() rows
+# -------------------------------
+
+def _full_name(first, last):
+    # User.get_full_name()
+    return f"{first or ''} {last or ''}".strip()
+
+
+class ClaimFlatSerializer(FlatSerializer):
+    """ClaimListSerializer rows without ?expand=."""
+    serializer_class = ClaimSerializer
+    exclude = CLAIM_EXPANDABLE
+    extra_lookups = ("member__user_id",)
+
+    def to_representation(self, row):
+        data = super().to_representation(row)
+        request = self.context.get("request")
+        if not request:
+            return data
+        return redact_claim_pii(data, request.user, row["member__user_id"])
+
+
+class NotificationFlatSerializer(FlatSerializer):
+    serializer_class = NotificationSerializer
+
+
+class DataAccessLogFlatSerializer(FlatSerializer):
+    serializer_class = DataAccessLogSerializer
+    extra_lookups = ("user__first_name", "user__last_name")
+
+    def get_user_name(self, row):
+        if row["user"] is None:
+            raise SkipField  # user.get_full_name can't be read: DRF omits the key
+        return _full_name(row["user__first_name"], row["user__last_name"])
+
+
+class MemberDependentFlatSerializer(FlatSerializer):
+    serializer_class = MemberDependentSerializer
+    extra_lookups = ("member",)
+
+
+class MemberFlatSerializer(FlatSerializer):
+    serializer_class = MemberSerializer
+    extra_lookups = (
+        "user__first_name", "user__last_name", "user__username", "user__email",
+        "membership_type__name", "membership_type__annual_limit",
+    )
+
+    def prepare(self, rows):
+        # All dependants of the page in one query
+        dependants = MemberDependentFlatSerializer()
+        self._dependants = {}
+        qs = MemberDependent.objects.filter(member_id__in=[row["id"] for row in rows])
+        for row in dependants.values(qs):
+            self._dependants.setdefault(row["member"], []).append(dependants.to_representation(row))
+
+    def get_user_full_name(self, row):
+        return _full_name(row["user__first_name"], row["user__last_name"]) or row["user__username"]
+
+    def get_email(self, row):
+        return row["user__email"]
+
+    def get_membership_type_details(self, row):
+        if row["membership_type"] is None:
+            return None
+        return {
+            "id": row["membership_type"],
+            "name": row["membership_type__name"],
+            "annual_limit": row["membership_type__annual_limit"],
+        }
+
+    def get_dependants(self, row):
+        return self._dependants.get(row["id"], [])
@@ -0,0 +1,159 @@
+# medical/services/attachments.py
+"""
+Claim attachment processing pipeline.
+
+Upload requests only check size and extension
+(medical.validators.validate_upload_basics) and store the file under
+claim_attachments/staging/ with status "pending"; a post_save signal hands
+new attachments to a Celery worker once the upload commits. The worker
+(`process()`):
+
+    1. sniffs the MIME type from the content (must agree with the extension)
+    2. verifies images and renders a JPEG thumbnail
+    3. counts PDF pages
+    4. calls the virus-scan hook, settings.ATTACHMENT_VIRUS_SCANNER (a dotted
+       path to `scan(file, name)` that raises ValidationError), when set
+    5. moves the file out of staging and marks the attachment "ready"
+
+A file failing a check is deleted and the attachment marked "rejected" with
+the reason, audited and reported to the uploader. Unexpected errors are
+retried by the task (see medical.tasks.process_attachment); the periodic
+sweeper re-dispatches attachments left pending, e.g. when the broker was
+down at commit time, and those left processing by a worker that died.
+"""
+import io
+import logging
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from medical import validators
+
+logger = logging.getLogger(__name__)
+
+FINAL_DIR = "claim_attachments"
+THUMBNAIL_SIZE = (320, 320)
+
+# Page objects in an uncompressed PDF page tree ("/Type /Pages" is the tree node)
+PDF_PAGE = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+
+
+def enqueue(attachment):
+    """Process `attachment` on a worker once the current transaction commits."""
+    attachment_id = str(attachment.pk)
+    transaction.on_commit(lambda: dispatch([attachment_id]))
+
+
+def dispatch(attachment_ids):
+    """Hand attachments to Celery. Broker errors leave them pending for the sweeper."""
+    from medical.tasks import process_attachment
+
+    for attachment_id in attachment_ids:
+        try:
+            process_attachment.delay(str(attachment_id))
+        except Exception as e:
+            logger.warning("Could not dispatch attachment %s: %s", attachment_id, e)
+
+
+def inspect(data, name):
+    """
+    Run the content checks on the raw bytes of an upload named `name`.
+    Returns {"mime", "page_count", "thumbnail"} or raises ValidationError.
+    """
+    if len(data) > validators.MAX_UPLOAD_SIZE:
+        raise ValidationError("File too large (max 5MB)")
+
+    mime = validators.sniff_mime(io.BytesIO(data), name)
+    page_count = thumbnail = None
+    if mime.startswith("image/"):
+        validators.verify_image(io.BytesIO(data))
+        thumbnail = _thumbnail(data)
+    elif mime == "application/pdf":
+        page_count = len(PDF_PAGE.findall(data)) or None
+
+    scanner = getattr(settings, "ATTACHMENT_VIRUS_SCANNER", None)
+    if scanner:
+        import_string(scanner)(io.BytesIO(data), name)
+
+    return {"mime": mime, "page_count": page_count, "thumbnail": thumbnail}
+
+
+def _thumbnail(data):
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(data))
+    img.thumbnail(THUMBNAIL_SIZE)
+    buf = io.BytesIO()
+    img.convert("RGB").save(buf, format="JPEG", quality=80)
+    return buf.getvalue()
+
+
+def process(attachment):
+    """Check a staged attachment and publish or reject it. Returns the new status."""
+    storage = attachment.file.storage
+    staged = attachment.file.name
+    name = os.path.basename(staged)
+
+    with storage.open(staged, "rb") as f:
+        data = f.read()
+    try:
+        result = inspect(data, name)
+    except ValidationError as e:
+        reject(attachment, " ".join(e.messages))
+        return "rejected"
+
+    final = storage.save(f"{FINAL_DIR}/{name}", ContentFile(data))
+    thumbnail = None
+    try:
+        attachment.file.name = final
+        if result["thumbnail"]:
+            stem = os.path.splitext(name)[0]
+            attachment.thumbnail.save(f"{stem}.jpg", ContentFile(result["thumbnail"]), save=False)
+            thumbnail = attachment.thumbnail.name
+        attachment.content_type = result["mime"]
+        attachment.page_count = result["page_count"]
+        attachment.size = len(data)
+        attachment.status, attachment.error = "ready", None
+        attachment.processed_at = timezone.now()
+        attachment.save(update_fields=[
+            "file", "thumbnail", "content_type", "page_count", "size", "status", "error", "processed_at",
+        ])
+    except Exception:
+        # The row still points at the staged file; a retry makes new copies
+        storage.delete(final)
+        if thumbnail:
+            attachment.thumbnail.storage.delete(thumbnail)
+        attachment.file.name = staged
+        raise
+    storage.delete(staged)
+    return "ready"
+
+
+def reject(attachment, reason):
+    """Delete the staged file and record why the upload was refused."""
+    from medical.audit import log_event
+    from medical.services.notifications import notify_users
+
+    name = os.path.basename(attachment.file.name or "")
+    if attachment.file.name:
+        attachment.file.storage.delete(attachment.file.name)
+        attachment.file.name = ""
+    attachment.status, attachment.error = "rejected", reason[:2000]
+    attachment.processed_at = timezone.now()
+    attachment.save(update_fields=["file", "status", "error", "processed_at"])
+
+    log_event(actor=None, action="attachment:REJECTED", obj=attachment, meta={"name": name, "error": reason})
+    if attachment.uploaded_by_id:
+        notify_users(
+            [attachment.uploaded_by_id],
+            "Attachment rejected",
+            f"{name} could not be accepted: {reason}",
+            link=f"/dashboard/member/claims/{attachment.claim_id}",
+            type_="claim",
+        )
@@ -0,0 +1,156 @@
+# medical/services/claim_queue.py
+"""
+Committee claim queue read model (ClaimQueueEntry).
+
+Each claim has one queue row holding everything the committee list shows,
+member details included. Changes are recorded with `schedule()` and applied
+once the transaction commits: the affected claims are re-read with a single
+joined query and upserted, so a transaction touching many claims (or a member
+with many claims) costs one refresh. The dashboard claim counters are moved
+by the difference between the old and new rows in the same transaction.
+
+    schedule(claim_ids=[claim.pk])        # a claim changed
+    schedule(member_ids=[member.pk])      # name/type/status shown on its claims
+    rebuild()                             # manage.py rebuild_claim_queue
+"""
+import threading
+
+from django.db import transaction
+from django.db.models import Q
+
+from medical.models import Claim, ClaimQueueEntry
+from medical.services import dashboard_stats
+
+CHUNK_SIZE = 2000
+
+# Copied onto the queue row as-is
+CLAIM_FIELDS = (
+    "claim_type", "status", "total_claimed", "total_payable", "member_payable",
+    "shif_number", "created_at", "submitted_at",
+)
+ENTRY_FIELDS = (
+    "member_name", "member_username", "membership_type", "member_status",
+    *CLAIM_FIELDS, "search_text",
+)
+# What each kind of id in schedule()/refresh() selects
+SCOPES = {
+    "claim_ids": "pk__in",
+    "member_ids": "member_id__in",
+    "user_ids": "member__user_id__in",
+    "membership_type_ids": "member__membership_type_id__in",
+}
+
+_state = threading.local()
+
+
+def display_name(first_name, last_name, username):
+    return f"{first_name} {last_name}".strip() or username
+
+
+def _rows(claims):
+    return claims.order_by().values_list(
+        "pk", "member__user__first_name", "member__user__last_name", "member__user__username",
+        "member__membership_type__name", "member__status", *CLAIM_FIELDS,
+    )
+
+
+def _entry(row):
+    pk, first_name, last_name, username, membership_type, member_status, *values = row
+    entry = ClaimQueueEntry(
+        claim_id=pk,
+        member_name=display_name(first_name, last_name, username),
+        member_username=username,
+        membership_type=membership_type,
+        member_status=member_status,
+        **dict(zip(CLAIM_FIELDS, values)),
+    )
+    search = (username, first_name, last_name, entry.shif_number)
+    entry.search_text = " ".join(s for s in search if s).lower()
+    return entry
+
+
+def refresh(**ids):
+    """Re-project the claims selected by `ids` (see SCOPES). Returns the row count."""
+    q = Q()
+    for scope, values in ids.items():
+        if values:
+            q |= Q(**{SCOPES[scope]: list(values)})
+    if not q:
+        return 0
+
+    with transaction.atomic():
+        # Lock the claims before reading them, in pk order: a refresh of the
+        # same claims waits here and then reads what this one has upserted
+        claim_ids = list(
+            Claim.objects.filter(q).select_for_update(of=("self",)).order_by("pk").values_list("pk", flat=True)
+        )
+        entries = [
+            _entry(row)
+            for row in _rows(Claim.objects.filter(pk__in=claim_ids)).iterator(chunk_size=CHUNK_SIZE)
+        ]
+        # The rows being replaced are what the dashboard counters hold now
+        old = _stats_rows(
+            ClaimQueueEntry.objects.select_for_update().filter(pk__in=[e.claim_id for e in entries])
+        )
+        for start in range(0, len(entries), CHUNK_SIZE):
+            ClaimQueueEntry.objects.bulk_create(
+                entries[start:start + CHUNK_SIZE],
+                update_conflicts=True,
+                unique_fields=["claim"],
+                update_fields=ENTRY_FIELDS,
+            )
+        new = {e.claim_id: (e.created_at, e.status, e.total_payable) for e in entries}
+        dashboard_stats.apply(dashboard_stats.claim_deltas(old, new))
+    return len(entries)
+
+
+def removed(claim_ids):
+    """Take claims about to be deleted out of the dashboard counters."""
+    old = _stats_rows(ClaimQueueEntry.objects.filter(pk__in=list(claim_ids)))
+    dashboard_stats.apply(dashboard_stats.claim_deltas(old, {}))
+
+
+def _stats_rows(entries):
+    return {
+        pk: (created_at, status, payable)
+        for pk, created_at, status, payable in entries.values_list(
+            "pk", "created_at", "status", "total_payable"
+        )
+    }
+
+
+def schedule(**ids):
+    """Refresh the given claims/members/users/membership types after commit."""
+    pending = getattr(_state, "pending", None)
+    if pending is None:
+        pending = _state.pending = {scope: set() for scope in SCOPES}
+    for scope, values in ids.items():
+        pending[scope].update(values)
+    # Every call registers a callback; the first one to run drains the set
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    pending = getattr(_state, "pending", None)
+    _state.pending = None
+    if pending:
+        refresh(**pending)
+
+
+def rebuild():
+    """Recreate the whole queue from the claims table. Returns the row count."""
+    count = 0
+    with transaction.atomic():
+        ClaimQueueEntry.objects.all().delete()
+        batch = []
+        for row in _rows(Claim.objects.all()).iterator(chunk_size=CHUNK_SIZE):
+            batch.append(_entry(row))
+            if len(batch) >= CHUNK_SIZE:
+                ClaimQueueEntry.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        ClaimQueueEntry.objects.bulk_create(batch)
+        count += len(batch)
+    # The claim counters follow the queue rows, so realign them too
+    dashboard_stats.rebuild()
+    return count
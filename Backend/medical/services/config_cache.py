@@ -0,0 +1,126 @@
+# medical/services/config_cache.py
+"""
+Cached reads of the rule-engine configuration tables (Setting and
+ReimbursementScale).
+
+Both tables are small and rarely edited, so each is loaded whole and kept in
+two layers:
+
+* an in-process LRU, so the claim rule engine reads config without queries
+  or cache round trips;
+* Django's cache, shared by all processes, keyed by a config version.
+
+Saving or deleting a Setting/ReimbursementScale bumps the version (see
+medical.signals); every process sees the new version within
+VERSION_CHECK_INTERVAL seconds and reloads.
+
+When the cache isn't shared between processes (see
+medical.services.shared_cache) a version bump would only reach the process
+that saved, so the version is read from the tables instead: their latest
+updated_at and row count.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from medical.services.shared_cache import is_shared
+
+VERSION_KEY = "medical:config:version"
+VERSION_CHECK_INTERVAL = 5  # seconds a process trusts its last-seen version
+SHARED_TTL = 60 * 60 * 24
+LOCAL_MAX_ENTRIES = 32
+
+_lock = threading.Lock()
+_local = OrderedDict()  # (version, name) -> value
+_version = {"value": None, "checked_at": 0.0}
+
+
+def _current_version():
+    now = time.monotonic()
+    if _version["value"] is not None and now - _version["checked_at"] < VERSION_CHECK_INTERVAL:
+        return _version["value"]
+
+    version = _shared_version() if is_shared() else _table_version()
+    _version.update(value=version, checked_at=now)
+    return version
+
+
+def _shared_version():
+    # Seeded from the clock so a flushed cache never reuses an old version
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _table_version():
+    from medical.models import ReimbursementScale, Setting
+
+    return tuple(
+        tuple(model.objects.aggregate(at=Max("updated_at"), n=Count("pk")).values())
+        for model in (Setting, ReimbursementScale)
+    )
+
+
+def _cached(name, loader):
+    version = _current_version()
+    key = (version, name)
+    with _lock:
+        if key in _local:
+            _local.move_to_end(key)
+            return _local[key]
+
+    if is_shared():
+        shared_key = f"medical:config:{version}:{name}"
+        value = cache.get(shared_key)
+        if value is None:
+            value = loader()
+            cache.set(shared_key, value, SHARED_TTL)
+    else:
+        value = loader()
+
+    with _lock:
+        _local[key] = value
+        while len(_local) > LOCAL_MAX_ENTRIES:
+            _local.popitem(last=False)
+    return value
+
+
+def _load_settings():
+    from medical.models import Setting
+    return dict(Setting.objects.values_list("key", "value"))
+
+
+def _load_scales():
+    from medical.models import ReimbursementScale
+    return {s.category.lower(): s for s in ReimbursementScale.objects.all()}
+
+
+def get_setting(key, default=None):
+    """Setting value for `key` (a copy, safe to mutate) or `default`."""
+    settings = _cached("settings", _load_settings)
+    if key not in settings:
+        return default
+    return copy.deepcopy(settings[key])
+
+
+def get_scale(category):
+    """ReimbursementScale for `category` (case-insensitive) or None."""
+    return _cached("scales", _load_scales).get((category or "").lower())
+
+
+def invalidate():
+    """Drop cached config in this process and move every process to a new version."""
+    if is_shared():
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, int(time.time() * 1000), None)
+    with _lock:
+        _local.clear()
+        _version.update(value=None, checked_at=0.0)
@@ -0,0 +1,216 @@
+# medical/services/dashboard_stats.py
+"""
+Dashboard statistics store (DashboardCounter).
+
+Counters are kept per local day and metric:
+
+    claims:<status>    claims created that day now in <status>: count, total payable
+    members            members registered that day
+    chronic_requests   chronic requests made that day
+
+Claim counters move with the committee queue projection: when
+medical.services.claim_queue re-projects a claim, the difference between
+its old and new queue row (day, status, payable) is applied here in the same
+transaction. Member and chronic request counters move on create/delete
+(see medical.signals). `rebuild()` recomputes everything from the source
+tables and runs nightly to absorb any drift.
+
+Dashboards read the counters through a short-TTL cache, so a page view costs
+at most a couple of small queries over day rows, whatever the claim volume.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from medical.models import ChronicRequest, Claim, DashboardCounter, Member
+
+CLAIMS_PREFIX = "claims:"
+MEMBERS = "members"
+CHRONIC_REQUESTS = "chronic_requests"
+
+CACHE_KEY = "medical:dashboard:{}"
+CACHE_TTL = 60
+
+ZERO = Decimal("0")
+
+
+def claim_metric(status):
+    return f"{CLAIMS_PREFIX}{status}"
+
+
+def local_day(when):
+    return timezone.localtime(when or timezone.now()).date()
+
+
+# ---------------------------------------------------------------------------
+# Incremental updates
+# ---------------------------------------------------------------------------
+def claim_deltas(old_rows, new_rows):
+    """
+    Counter deltas between two projections of the same claims.
+
+    Both arguments map claim id -> (created_at, status, total_payable); a
+    claim missing from one side was created/deleted.
+    """
+    deltas = defaultdict(lambda: [0, ZERO])
+    for pk in set(old_rows) | set(new_rows):
+        old, new = old_rows.get(pk), new_rows.get(pk)
+        if old == new:
+            continue
+        for row, sign in ((old, -1), (new, 1)):
+            if row is None:
+                continue
+            created_at, status, payable = row
+            delta = deltas[(local_day(created_at), claim_metric(status))]
+            delta[0] += sign
+            delta[1] += sign * Decimal(payable or 0)
+    return deltas
+
+
+def apply(deltas):
+    """Add {(day, metric): [count, amount]} to the counters."""
+    for (day, metric), (count, amount) in deltas.items():
+        if not count and not amount:
+            continue
+        qs = DashboardCounter.objects.filter(day=day, metric=metric)
+        if qs.update(count=F("count") + count, amount=F("amount") + amount):
+            continue
+        try:
+            with transaction.atomic():
+                DashboardCounter.objects.create(day=day, metric=metric, count=count, amount=amount)
+        except IntegrityError:
+            # Row was created concurrently
+            qs.update(count=F("count") + count, amount=F("amount") + amount)
+
+
+def bump(metric, when, count=1):
+    """One member/chronic request created (count=1) or deleted (count=-1)."""
+    apply({(local_day(when), metric): [count, ZERO]})
+
+
+# ---------------------------------------------------------------------------
+# Rebuild
+# ---------------------------------------------------------------------------
+def rebuild():
+    """Recompute every counter from the source tables. Returns the row count."""
+    rows = defaultdict(lambda: DashboardCounter(count=0, amount=ZERO))
+
+    claims = (
+        Claim.objects.annotate(day=TruncDate("created_at"))
+        .order_by()
+        .values("day", "status")
+        .annotate(n=Count("pk"), payable=Sum("total_payable"))
+    )
+    for r in claims:
+        row = rows[(r["day"], claim_metric(r["status"]))]
+        row.count, row.amount = r["n"], r["payable"] or ZERO
+
+    for model, metric in ((Member, MEMBERS), (ChronicRequest, CHRONIC_REQUESTS)):
+        per_day = (
+            model.objects.annotate(day=TruncDate("created_at"))
+            .order_by()
+            .values("day")
+            .annotate(n=Count("pk"))
+        )
+        for r in per_day:
+            rows[(r["day"], metric)].count = r["n"]
+
+    for (day, metric), row in rows.items():
+        row.day, row.metric = day, metric
+
+    with transaction.atomic():
+        DashboardCounter.objects.all().delete()
+        DashboardCounter.objects.bulk_create(rows.values(), batch_size=1000)
+    invalidate()
+    return len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Reads (cached)
+# ---------------------------------------------------------------------------
+def _cached(name, build):
+    key = CACHE_KEY.format(name)
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, CACHE_TTL)
+    return value
+
+
+def invalidate():
+    cache.delete_many([CACHE_KEY.format(n) for n in ("committee", f"admin:{timezone.localdate().year}")])
+
+
+def committee_summary():
+    """Queue counts for the committee dashboard."""
+    def build():
+        today = timezone.localdate()
+        counts = defaultdict(int)
+        rows = DashboardCounter.objects.filter(
+            metric__in=[claim_metric(s) for s in ("submitted", "reviewed")]
+        ).values("metric").annotate(n=Sum("count"))
+        for r in rows:
+            counts[r["metric"]] = r["n"] or 0
+        today_new = DashboardCounter.objects.filter(
+            day=today, metric__startswith=CLAIMS_PREFIX
+        ).aggregate(n=Sum("count"))["n"] or 0
+        return {
+            "pending_total": counts[claim_metric("submitted")],
+            "today_new": today_new,
+            "reviewed_total": counts[claim_metric("reviewed")],
+        }
+    return _cached("committee", build)
+
+
+def admin_summary(year):
+    """Year overview for the admin dashboard (same shape as before the counters)."""
+    def build():
+        status_counts = defaultdict(int)
+        monthly = defaultdict(lambda: [0, ZERO])
+        pending = paid = ZERO
+        chronic = 0
+
+        rows = DashboardCounter.objects.filter(day__year=year).values_list("day", "metric", "count", "amount")
+        for day, metric, count, amount in rows:
+            if metric == CHRONIC_REQUESTS:
+                chronic += count
+                continue
+            if not metric.startswith(CLAIMS_PREFIX) or not count:
+                continue
+            status = metric[len(CLAIMS_PREFIX):]
+            status_counts[status] += count
+            month = monthly[date(day.year, day.month, 1)]
+            month[0] += count
+            month[1] += amount
+            if status == "paid":
+                paid += amount
+            elif status != "rejected":
+                pending += amount
+
+        total_members = DashboardCounter.objects.filter(metric=MEMBERS).aggregate(n=Sum("count"))["n"] or 0
+        return {
+            "year": year,
+            "total_members": total_members,
+            "total_claims": sum(status_counts.values()),
+            "status_counts": {s: n for s, n in status_counts.items() if n},
+            "total_payable_pending": float(pending),
+            "total_paid_out": float(paid),
+            "chronic_requests": chronic,
+            "monthly": [
+                {
+                    "month": month.strftime("%Y-%m-01"),
+                    "month_label": month.strftime("%b"),
+                    "claims": count,
+                    "total_payable": float(amount),
+                }
+                for month, (count, amount) in sorted(monthly.items())
+                if count
+            ],
+        }
+    return _cached(f"admin:{year}", build)
@@ -0,0 +1,165 @@
+# medical/services/direct_uploads.py
+"""
+Direct-to-storage attachment uploads and downloads.
+
+Files go between the client and storage without passing through an app
+worker:
+
+    1. upload_ticket(claim, user, filename, content_type, size)
+       -> where and how to send the bytes, plus a signed `token`
+    2. the client sends the file to `upload_url` with the returned `method`:
+       PUT with `headers`, or a multipart POST of `fields` followed by the
+       `file` part
+    3. confirm(token, user) registers the ClaimAttachment (status "pending",
+       so the processing pipeline in medical.services.attachments checks the
+       content before it is published)
+
+    download_url(attachment) -> a short-lived URL to fetch the file
+
+With S3 storage (django-storages; MinIO via AWS_S3_ENDPOINT_URL) uploads
+are presigned POSTs, whose policy holds the file to MAX_UPLOAD_SIZE, and
+downloads presigned URLs. Any other storage (the local filesystem in
+development and tests) gets a stand-in: signed, expiring URLs to
+local_upload/local_download views that read and write the storage directly.
+"""
+import os
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.text import get_valid_filename
+
+from medical import validators
+from medical.models import ClaimAttachment
+
+UPLOAD_SALT = "medical.attachments.upload"
+DOWNLOAD_SALT = "medical.attachments.download"
+
+UPLOAD_TTL = getattr(settings, "ATTACHMENT_UPLOAD_URL_TTL", 15 * 60)
+DOWNLOAD_TTL = getattr(settings, "ATTACHMENT_DOWNLOAD_URL_TTL", 5 * 60)
+
+STAGING_DIR = "claim_attachments/staging"
+
+
+def _s3(storage):
+    try:
+        from storages.backends.s3 import S3Storage
+    except ImportError:
+        return False
+    return isinstance(storage, S3Storage)
+
+
+class _Declared:
+    """What the client says it will upload, in the shape validate_upload_basics expects."""
+
+    def __init__(self, name, size):
+        self.name, self.size = name, size
+
+
+def upload_ticket(claim, user, filename, content_type, size, request=None):
+    """
+    Where and how to upload a new attachment for `claim`. The declared name
+    and size are checked now; the content is checked after confirm().
+    """
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise ValidationError("size must be the file size in bytes.")
+    name = get_valid_filename(os.path.basename(filename or ""))
+    validators.validate_upload_basics(_Declared(name, size))
+    content_type = content_type or "application/octet-stream"
+
+    # The ticket id becomes the attachment's primary key, so confirm() can
+    # recognise a repeat even after the pipeline has moved the file
+    ticket_id = uuid.uuid4()
+    key = f"{STAGING_DIR}/{ticket_id.hex}/{name}"
+    token = signing.dumps(
+        {"id": str(ticket_id), "key": key, "claim": str(claim.pk), "user": user.pk,
+         "content_type": content_type},
+        salt=UPLOAD_SALT,
+    )
+
+    if _s3(default_storage):
+        # A presigned PUT can't bound the body; the POST policy can
+        post = default_storage.bucket.meta.client.generate_presigned_post(
+            default_storage.bucket_name,
+            default_storage._normalize_name(key),
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, validators.MAX_UPLOAD_SIZE],
+            ],
+            ExpiresIn=UPLOAD_TTL,
+        )
+        upload = {"upload_url": post["url"], "method": "POST", "fields": post["fields"], "headers": {}}
+    else:
+        upload = {
+            "upload_url": _absolute(reverse("attachment-local-upload", args=[token]), request),
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+        }
+
+    return {**upload, "token": token, "expires_in": UPLOAD_TTL}
+
+
+def read_ticket(token, max_age=None):
+    try:
+        return signing.loads(token, salt=UPLOAD_SALT, max_age=max_age or UPLOAD_TTL)
+    except signing.SignatureExpired:
+        raise ValidationError("Upload link expired.")
+    except signing.BadSignature:
+        raise ValidationError("Invalid upload token.")
+
+
+def confirm(token, user):
+    """
+    Register the file uploaded with `token` as a ClaimAttachment. Confirming
+    the same upload twice returns the existing attachment. Returns
+    (attachment, created).
+    """
+    # Allow for a slow upload that started just before the link expired
+    ticket = read_ticket(token, max_age=UPLOAD_TTL * 2)
+    if ticket["user"] != user.pk:
+        raise ValidationError("This upload belongs to another user.")
+
+    existing = ClaimAttachment.objects.filter(pk=ticket["id"]).first()
+    if existing is not None:
+        return existing, False
+
+    if not default_storage.exists(ticket["key"]):
+        raise ValidationError("File not uploaded yet.")
+    if default_storage.size(ticket["key"]) > validators.MAX_UPLOAD_SIZE:
+        default_storage.delete(ticket["key"])
+        raise ValidationError("File too large (max 5MB)")
+
+    attachment = ClaimAttachment.objects.create(
+        id=ticket["id"],
+        claim_id=ticket["claim"],
+        uploaded_by=user,
+        file=ticket["key"],
+        content_type=ticket["content_type"],
+    )
+    return attachment, True
+
+
+def download_url(attachment, request=None):
+    """A URL that serves `attachment`'s file for DOWNLOAD_TTL seconds."""
+    name = attachment.file.name
+    if _s3(default_storage):
+        return default_storage.url(name, expire=DOWNLOAD_TTL)
+    token = signing.dumps({"key": name}, salt=DOWNLOAD_SALT)
+    return _absolute(reverse("attachment-local-download", args=[token]), request)
+
+
+def read_download(token):
+    try:
+        return signing.loads(token, salt=DOWNLOAD_SALT, max_age=DOWNLOAD_TTL)["key"]
+    except signing.BadSignature:
+        raise ValidationError("Invalid or expired download link.")
+
+
+def _absolute(path, request):
+    return request.build_absolute_uri(path) if request is not None else path
@@ -0,0 +1,246 @@
+# medical/services/duplicates.py
+"""
+Near-duplicate claim detection (ClaimDuplicateKey).
+
+Each claim keeps one key row with its normalized components:
+
+    receipt_number  receipt/invoice number, upper-cased, letters and digits only
+    provider        hospital name, lower-cased, punctuation and filler words dropped
+    amount          total claimed in whole shillings
+    service_date    date of first visit (outpatient) or discharge (inpatient)
+
+A claim is a suspected duplicate of another (non-draft) claim when
+
+    receipt         both carry the same receipt number, whichever member; or
+    amount_date     same member, same amount, service dates within DATE_WINDOW days.
+
+`find()` checks one claim (saved or not) with a single indexed query,
+`scan()` reports every suspected pair across the book in one pass over the
+key table. Keys are refreshed after commit whenever a claim changes
+(`schedule()`), and rebuilt with `manage.py rebuild_duplicate_index`.
+
+The exact-match fingerprint in medical.services.verification still blocks
+resubmission of an identical claim; matches found here are for review.
+"""
+import re
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Q
+
+from medical.models import Claim, ClaimDuplicateKey
+
+CHUNK_SIZE = 2000
+DATE_WINDOW = 7
+
+# Receipt "numbers" shorter than this ("1", "NA") are too common to compare
+MIN_RECEIPT_LENGTH = 3
+
+PROVIDER_FILLER = frozenset({
+    "the", "hospital", "hosp", "clinic", "medical", "centre", "center",
+    "ltd", "limited", "and", "of",
+})
+
+KEY_FIELDS = ("member", "receipt_number", "provider", "amount", "service_date")
+
+_state = threading.local()
+
+
+# ---------------------------------------------------------------------------
+# Normalization
+# ---------------------------------------------------------------------------
+def normalize_receipt(value):
+    receipt = re.sub(r"[^A-Z0-9]", "", str(value or "").upper())
+    return receipt[:100] if len(receipt) >= MIN_RECEIPT_LENGTH else None
+
+
+def normalize_provider(value):
+    words = re.sub(r"[^a-z0-9]+", " ", str(value or "").lower()).split()
+    return " ".join(w for w in words if w not in PROVIDER_FILLER)[:255] or None
+
+
+def whole_amount(value):
+    return int(Decimal(str(value or 0)).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def components(claim):
+    """The key values of `claim` (saved or not) as a dict of KEY_FIELDS."""
+    details = claim.details or {}
+    return {
+        "member": claim.member_id,
+        "receipt_number": normalize_receipt(details.get("receipt_number") or details.get("invoice_number")),
+        "provider": normalize_provider(details.get("hospital_name")),
+        "amount": whole_amount(claim.total_claimed),
+        "service_date": claim.date_of_first_visit or claim.date_of_discharge,
+    }
+
+
+def _key(claim):
+    values = components(claim)
+    return ClaimDuplicateKey(claim_id=claim.pk, member_id=values.pop("member"), **values)
+
+
+# ---------------------------------------------------------------------------
+# Maintenance
+# ---------------------------------------------------------------------------
+_CLAIM_FIELDS = (
+    "id", "member_id", "details", "total_claimed", "date_of_first_visit", "date_of_discharge",
+)
+
+
+def refresh(claim_ids):
+    """Re-key the given claims. Returns the row count."""
+    claims = Claim.objects.filter(pk__in=list(claim_ids)).only(*_CLAIM_FIELDS).order_by()
+    keys = [_key(c) for c in claims.iterator(chunk_size=CHUNK_SIZE)]
+    for start in range(0, len(keys), CHUNK_SIZE):
+        ClaimDuplicateKey.objects.bulk_create(
+            keys[start:start + CHUNK_SIZE],
+            update_conflicts=True,
+            unique_fields=["claim"],
+            update_fields=[*KEY_FIELDS, "updated_at"],
+        )
+    return len(keys)
+
+
+def schedule(claim_ids):
+    """Re-key the given claims after commit (their totals are final by then)."""
+    pending = getattr(_state, "pending", None)
+    if pending is None:
+        pending = _state.pending = set()
+    pending.update(claim_ids)
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    pending = getattr(_state, "pending", None)
+    _state.pending = None
+    if pending:
+        refresh(pending)
+
+
+def rebuild():
+    """Recreate every key from the claims table. Returns the row count."""
+    count = 0
+    with transaction.atomic():
+        ClaimDuplicateKey.objects.all().delete()
+        batch = []
+        for claim in Claim.objects.only(*_CLAIM_FIELDS).order_by().iterator(chunk_size=CHUNK_SIZE):
+            batch.append(_key(claim))
+            if len(batch) >= CHUNK_SIZE:
+                ClaimDuplicateKey.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        ClaimDuplicateKey.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Lookups
+# ---------------------------------------------------------------------------
+def _reasons(a, b, days):
+    """Why key values `a` and `b` (dicts of KEY_FIELDS) look like the same claim."""
+    reasons = []
+    if a["receipt_number"] and a["receipt_number"] == b["receipt_number"]:
+        reasons.append("receipt")
+    if (
+        a["member"] == b["member"] and a["amount"] and a["amount"] == b["amount"]
+        and a["service_date"] and b["service_date"]
+        and abs((a["service_date"] - b["service_date"]).days) <= days
+    ):
+        reasons.append("amount_date")
+    return reasons
+
+
+def find(claim, days=DATE_WINDOW):
+    """
+    Non-draft claims that look like duplicates of `claim`:
+    [{"claim_id", "member_id", "reasons", "provider", "amount", "service_date"}, ...]
+    """
+    values = components(claim)
+    q = Q()
+    if values["receipt_number"]:
+        q |= Q(receipt_number=values["receipt_number"])
+    if values["amount"] and values["service_date"]:
+        q |= Q(
+            member_id=values["member"],
+            amount=values["amount"],
+            service_date__range=(
+                values["service_date"] - timedelta(days=days),
+                values["service_date"] + timedelta(days=days),
+            ),
+        )
+    if not q:
+        return []
+
+    candidates = (
+        ClaimDuplicateKey.objects.filter(q)
+        .exclude(claim__status="draft")
+        .order_by("service_date", "pk")
+    )
+    if claim.pk:
+        candidates = candidates.exclude(pk=claim.pk)
+
+    matches = []
+    for key in candidates:
+        other = {f: getattr(key, f"{f}_id" if f == "member" else f) for f in KEY_FIELDS}
+        reasons = _reasons(values, other, days)
+        if reasons:
+            matches.append({
+                "claim_id": str(key.claim_id),
+                "member_id": str(key.member_id),
+                "reasons": reasons,
+                "provider": key.provider,
+                "amount": key.amount,
+                "service_date": key.service_date,
+            })
+    return matches
+
+
+def scan(days=DATE_WINDOW):
+    """
+    Every suspected duplicate pair among non-draft claims, in one pass over
+    the key table: [{"claims": [claim id, claim id], "reasons": [...]}, ...]
+    """
+    keys = (
+        ClaimDuplicateKey.objects.exclude(claim__status="draft")
+        .order_by("member", "amount", "service_date", "pk")
+        .values_list("claim_id", *[f"{f}_id" if f == "member" else f for f in KEY_FIELDS])
+    )
+
+    pairs = defaultdict(set)
+    by_receipt = defaultdict(list)
+    window = []  # earlier keys of the current member + amount, within `days`
+    for claim_id, *values in keys.iterator(chunk_size=CHUNK_SIZE):
+        row = (claim_id, dict(zip(KEY_FIELDS, values)))
+        key = row[1]
+        if key["receipt_number"]:
+            by_receipt[key["receipt_number"]].append(row)
+
+        if not (key["amount"] and key["service_date"]):
+            continue
+        window = [
+            (pk, other) for pk, other in window
+            if other["member"] == key["member"] and other["amount"] == key["amount"]
+            and (key["service_date"] - other["service_date"]).days <= days
+        ]
+        for pk, _ in window:
+            pairs[_pair(pk, claim_id)].add("amount_date")
+        window.append(row)
+
+    for rows in by_receipt.values():
+        for i, (a, _) in enumerate(rows):
+            for b, _ in rows[i + 1:]:
+                pairs[_pair(a, b)].add("receipt")
+
+    return [
+        {"claims": [a, b], "reasons": sorted(reasons)}
+        for (a, b), reasons in sorted(pairs.items(), key=lambda p: p[0])
+    ]
+
+
+def _pair(a, b):
+    return tuple(sorted((str(a), str(b))))
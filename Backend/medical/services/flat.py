@@ -0,0 +1,144 @@
+# medical/services/flat.py
+"""
+Flat, read-only serialization for hot list endpoints.
+
+A FlatSerializer renders the same rows as a DRF ModelSerializer, but from a
+`.values()` query instead of model instances. The DRF serializer is
+inspected once per class ("compiled") into a list of columns:
+
+    plain model fields      -> field.to_representation(row[lookup])
+    dotted sources          -> the joined lookup, e.g. member.user.email
+                               -> member__user__email
+    FK primary keys         -> the raw id, as PrimaryKeyRelatedField returns
+    get_<name>(row)         -> defined on the flat class, for method fields,
+                               nested serializers and model methods (raise
+                               SkipField to leave the key out, as DRF does)
+
+so a page of 500 rows costs one query plus a dict per row, with no model
+instances and no serializer instances per row.
+
+    class NotificationFlatSerializer(FlatSerializer):
+        serializer_class = NotificationSerializer
+
+    flat = NotificationFlatSerializer(context={"request": request})
+    data = flat.many(flat.values(queryset))
+
+Fields a flat class can't produce must be listed in `exclude`;
+compilation fails loudly otherwise so the two outputs can't drift apart.
+Views opt in with FlatListMixin.
+"""
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.response import Response
+
+
+class FlatSerializer:
+    serializer_class = None   # the DRF serializer whose output is reproduced
+    exclude = ()              # its fields this flat serializer leaves out
+    extra_lookups = ()        # more .values() lookups that get_<name> methods read
+
+    def __init__(self, context=None):
+        self.context = context or {}
+
+    # ---- compilation (once per class) ----
+
+    @classmethod
+    def compiled(cls):
+        if "_compiled" not in cls.__dict__:
+            cls._compiled = cls._compile()
+        return cls._compiled
+
+    @classmethod
+    def _compile(cls):
+        drf = cls.serializer_class()
+        model = drf.Meta.model
+        lookups = {"pk": None}  # keyset pagination reads row["pk"]
+        columns = []
+        for name, field in drf.fields.items():
+            if name in cls.exclude or field.write_only:
+                continue
+            if hasattr(cls, f"get_{name}"):
+                columns.append((name, None, None))
+                continue
+            if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField,
+                                  serializers.ManyRelatedField)):
+                raise ImproperlyConfigured(f"{cls.__name__}: define get_{name}() or exclude {name!r}.")
+            lookup = _lookup(model, field.source, cls.__name__, name)
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                convert = field.pk_field.to_representation if field.pk_field is not None else None
+            else:
+                convert = field.to_representation
+            lookups[lookup] = None
+            columns.append((name, lookup, convert))
+        for lookup in cls.extra_lookups:
+            lookups[lookup] = None
+        return list(lookups), columns
+
+    # ---- rendering ----
+
+    def values(self, queryset):
+        """`queryset` reduced to the columns this serializer reads."""
+        lookups, _ = self.compiled()
+        return queryset.prefetch_related(None).values(*lookups)
+
+    def to_representation(self, row):
+        data = {}
+        for name, lookup, convert in self.compiled()[1]:
+            if lookup is None:
+                try:
+                    data[name] = getattr(self, f"get_{name}")(row)
+                except SkipField:  # left out, as DRF does
+                    pass
+                continue
+            value = row[lookup]
+            data[name] = value if value is None or convert is None else convert(value)
+        return data
+
+    def prepare(self, rows):
+        """Hook: batch-load anything the rows need (one query per relation)."""
+
+    def many(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        return [self.to_representation(row) for row in rows]
+
+
+def _lookup(model, source, owner, name):
+    """The .values() lookup for a dotted serializer source, e.g. member.user.email."""
+    parts = source.split(".")
+    for i, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(f"{owner}: {source!r} is not a model field; define get_{name}().")
+        if field.is_relation and i < len(parts) - 1:
+            model = field.related_model
+        elif field.is_relation:
+            return field.name  # the FK column: .values() gives the id
+    return "__".join(parts)
+
+
+class FlatListMixin:
+    """
+    ViewSet mixin: `list` renders through `flat_serializer_class` when
+    get_flat_serializer() returns one, and through the normal serializer
+    otherwise. Filtering and pagination are unchanged.
+    """
+    flat_serializer_class = None
+
+    def get_flat_serializer(self):
+        if self.flat_serializer_class is None:
+            return None
+        return self.flat_serializer_class(context=self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        flat = self.get_flat_serializer()
+        if flat is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = flat.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(flat.many(page))
+        return Response(flat.many(rows))
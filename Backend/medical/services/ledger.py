@@ -0,0 +1,250 @@
+# medical/services/ledger.py
+"""
+Per-member, per-year benefit usage ledger (MemberBenefitUsage).
+
+Every claim records on its own row what it currently contributes to the
+ledger (ledger_bucket / ledger_amount / ledger_critical). Syncing a claim
+compares that with what it should contribute now and applies only the
+difference to the member's ledger row, so annual limit checks read a single
+row instead of summing the member's claims for the year.
+
+`rebuild()` recomputes everything from the claims table in a few bulk
+statements (see `manage.py rebuild_benefit_ledger`).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
+
+from medical.models import Claim, MemberBenefitUsage
+
+BUCKETS = {
+    "draft": "pending",
+    "submitted": "pending",
+    "reviewed": "pending",
+    "approved": "approved",
+    "paid": "paid",
+}  # rejected claims don't count
+BUCKET_FIELDS = {
+    "pending": "pending_total",
+    "approved": "approved_total",
+    "paid": "paid_total",
+}
+LEDGER_FIELDS = ("ledger_bucket", "ledger_amount", "ledger_critical")
+
+CRITICAL_ILLNESS_THRESHOLD = 200000
+
+# SQL twin of is_critical(), used by rebuild()
+CRITICAL_Q = (
+    Q(status__in=("approved", "paid"))
+    & Q(claim_type__iexact="inpatient")
+    & (Q(details__critical_illness=True) | Q(total_claimed__gte=CRITICAL_ILLNESS_THRESHOLD))
+)
+
+ZERO = Decimal("0.00")
+
+
+def _dec(value):
+    return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+
+
+def is_critical(claim):
+    """Approved/paid inpatient claim that earns the critical-illness top-up."""
+    return (
+        claim.status in ("approved", "paid")
+        and (claim.claim_type or "").lower() == "inpatient"
+        and (
+            (claim.details or {}).get("critical_illness") is True
+            or _dec(claim.total_claimed) >= CRITICAL_ILLNESS_THRESHOLD
+        )
+    )
+
+
+def claim_year(claim):
+    when = claim.created_at or timezone.now()
+    return timezone.localtime(when).year
+
+
+def contribution(claim):
+    """(bucket, amount, critical) this claim should contribute right now."""
+    bucket = BUCKETS.get(claim.status)
+    if bucket is None:
+        return None, ZERO, False
+    return bucket, _dec(claim.total_payable), is_critical(claim)
+
+
+def usage_for(member_id, year):
+    """The member's ledger row for `year` (an unsaved zero row if none yet)."""
+    return (
+        MemberBenefitUsage.objects.filter(member_id=member_id, year=year).first()
+        or MemberBenefitUsage(member_id=member_id, year=year)
+    )
+
+
+def own_share(claim, buckets=None):
+    """What `claim` itself already contributes to its ledger row."""
+    if claim.ledger_bucket and (buckets is None or claim.ledger_bucket in buckets):
+        return _dec(claim.ledger_amount)
+    return ZERO
+
+
+def lock_applied(claims):
+    """
+    Reload the applied ledger state of saved claims, locking their rows so
+    concurrent transitions of the same claim can't apply the same delta twice.
+    """
+    claims = [c for c in claims if c.pk]
+    if not claims:
+        return
+    rows = {
+        pk: rest
+        for pk, *rest in Claim.objects.select_for_update()
+        .filter(pk__in=[c.pk for c in claims])
+        .values_list("pk", *LEDGER_FIELDS)
+    }
+    for claim in claims:
+        if claim.pk in rows:
+            claim.ledger_bucket, claim.ledger_amount, claim.ledger_critical = rows[claim.pk]
+
+
+def sync(claims):
+    """
+    Apply the difference between each claim's applied and current
+    contribution to the ledger.
+
+    The instances' ledger_* attributes are updated in place; the caller
+    persists them. Returns the claims whose contribution changed.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    changed = []
+    for claim in claims:
+        old = (claim.ledger_bucket or None, _dec(claim.ledger_amount), bool(claim.ledger_critical))
+        new = contribution(claim)
+        if old == new:
+            continue
+
+        delta = deltas[(claim.member_id, claim_year(claim))]
+        if old[0]:
+            delta[BUCKET_FIELDS[old[0]]] -= old[1]
+        if new[0]:
+            delta[BUCKET_FIELDS[new[0]]] += new[1]
+        delta["critical_claims"] += int(new[2]) - int(old[2])
+
+        claim.ledger_bucket, claim.ledger_amount, claim.ledger_critical = new
+        changed.append(claim)
+
+    for (member_id, year), delta in deltas.items():
+        _apply(member_id, year, {f: v for f, v in delta.items() if v})
+    return changed
+
+
+def _apply(member_id, year, delta):
+    if not delta:
+        return
+    qs = MemberBenefitUsage.objects.filter(member_id=member_id, year=year)
+    updates = {f: F(f) + v for f, v in delta.items()}
+    if qs.update(updated_at=timezone.now(), **updates):
+        return
+    try:
+        with transaction.atomic():
+            MemberBenefitUsage.objects.create(member_id=member_id, year=year, **delta)
+    except IntegrityError:
+        # Row was created concurrently
+        qs.update(updated_at=timezone.now(), **updates)
+
+
+def removed(claims):
+    """Take claims that are being deleted back out of the ledger (call inside the delete's transaction)."""
+    claims = list(claims)
+    lock_applied(claims)
+    deltas = defaultdict(lambda: defaultdict(int))
+    for claim in claims:
+        if not claim.ledger_bucket:
+            continue
+        delta = deltas[(claim.member_id, claim_year(claim))]
+        delta[BUCKET_FIELDS[claim.ledger_bucket]] -= _dec(claim.ledger_amount)
+        delta["critical_claims"] -= int(bool(claim.ledger_critical))
+        claim.ledger_bucket, claim.ledger_amount, claim.ledger_critical = None, ZERO, False
+
+    for (member_id, year), delta in deltas.items():
+        updates = {f: F(f) + v for f, v in delta.items() if v}
+        if updates:
+            MemberBenefitUsage.objects.filter(member_id=member_id, year=year).update(
+                updated_at=timezone.now(), **updates
+            )
+
+
+def resync(claim_ids):
+    """Sync claims whose status/payable were changed with queryset.update()."""
+    with transaction.atomic():
+        claims = list(
+            Claim.objects.select_for_update()
+            .filter(pk__in=claim_ids)
+            .only(
+                "id", "member_id", "created_at", "status", "claim_type",
+                "details", "total_claimed", "total_payable", *LEDGER_FIELDS,
+            )
+        )
+        changed = sync(claims)
+        if changed:
+            Claim.objects.bulk_update(changed, LEDGER_FIELDS)
+    return len(changed)
+
+
+def rebuild(year=None):
+    """
+    Recompute the ledger and every claim's applied state from scratch.
+
+    Returns the number of ledger rows written.
+    """
+    claims = Claim.objects.all()
+    usage = MemberBenefitUsage.objects.all()
+    if year:
+        claims = claims.filter(created_at__year=year)
+        usage = usage.filter(year=year)
+
+    with transaction.atomic():
+        usage.delete()
+
+        totals = (
+            claims.filter(status__in=list(BUCKETS))
+            .annotate(usage_year=ExtractYear("created_at"))
+            .order_by()
+            .values("member_id", "usage_year")
+            .annotate(
+                pending=Sum("total_payable", filter=Q(status__in=_statuses("pending"))),
+                approved=Sum("total_payable", filter=Q(status="approved")),
+                paid=Sum("total_payable", filter=Q(status="paid")),
+                critical=Count("pk", filter=CRITICAL_Q),
+            )
+        )
+        rows = [
+            MemberBenefitUsage(
+                member_id=t["member_id"],
+                year=t["usage_year"],
+                pending_total=t["pending"] or 0,
+                approved_total=t["approved"] or 0,
+                paid_total=t["paid"] or 0,
+                critical_claims=t["critical"],
+            )
+            for t in totals
+        ]
+        MemberBenefitUsage.objects.bulk_create(rows, batch_size=1000)
+
+        for bucket in BUCKET_FIELDS:
+            claims.filter(status__in=_statuses(bucket)).update(
+                ledger_bucket=bucket,
+                ledger_amount=F("total_payable"),
+                ledger_critical=Case(When(CRITICAL_Q, then=Value(True)), default=Value(False)),
+            )
+        claims.exclude(status__in=list(BUCKETS)).update(
+            ledger_bucket=None, ledger_amount=0, ledger_critical=False
+        )
+    return len(rows)
+
+
+def _statuses(bucket):
+    return [s for s, b in BUCKETS.items() if b == bucket]
@@ -4,6 +4,7 @@ from django.utils import timezone
 from django.contrib.auth.models import Group
 from medical.models import Member
 from medical.views import notify
+from medical.services.outbox import enqueue_email
 
 def approve_member(member: Member):
     """Centralized approval logic for Committee/Admin."""
@@ -30,12 +31,8 @@ def approve_member(member: Member):
         link="/dashboard/member",
     )
     
-    # Send approval email
-    try:
-        from medical.email_notifications import send_member_approved_email
-        send_member_approved_email(member)
-    except Exception as e:
-        print(f"Failed to send approval email: {e}")
+    # Send approval email (after commit, via outbox)
+    enqueue_email("member_approved", member)
 
     return member
 
@@ -0,0 +1,233 @@
+# medical/services/notification_stream.py
+"""
+Push channel for in-app notifications (server-sent events).
+
+The notification creation path (medical.services.notifications) publishes
+each new notification to its recipient's channel once the transaction
+commits. GET /api/notifications/stream/ (an async view, served by the ASGI
+app in sgss_medical_fund/asgi.py) subscribes to that channel and relays:
+
+    event: unread         data: {"unread": 3}          on connect / after mark-read
+    event: notification   data: {"notification": {...}}
+
+plus a comment line every HEARTBEAT seconds to keep proxies from closing
+the connection. A waiting client costs no queries.
+
+Brokers:
+    settings.NOTIFICATION_STREAM_URL = "redis://..."  Redis pub/sub, shared by
+                                                      every web and worker process
+    unset                                             in-process (development,
+                                                      tests, single process)
+
+`unavailable_reason(request)` says when the stream can't work (a WSGI
+server, or the in-process broker with more than one process); the view then
+answers 503 and clients poll instead.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "medical:notifications:{}"
+HEARTBEAT = 25  # seconds
+RETRY_MS = 5000  # client reconnect delay
+
+
+class LocalBroker:
+    """Fan-out to subscribers in this process; publishing is thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # user_id -> {(loop, queue)}
+
+    def publish(self, user_id, message):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, ()))
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:  # the subscriber's loop has closed
+                pass
+
+    def subscribe(self, user_id):
+        """
+        An async context manager: subscribed to `user_id` inside the block,
+        where it iterates the messages published meanwhile.
+        """
+        return _LocalSubscription(self, user_id)
+
+    def _add(self, user_id, entry):
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(entry)
+
+    def _remove(self, user_id, entry):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.discard(entry)
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def subscriber_count(self, user_id):
+        with self._lock:
+            return len(self._subscribers.get(user_id, ()))
+
+
+class RedisBroker:
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, user_id, message):
+        self._client.publish(CHANNEL.format(user_id), message)
+
+    def subscribe(self, user_id):
+        """See LocalBroker.subscribe()."""
+        return _RedisSubscription(self.url, CHANNEL.format(user_id))
+
+
+# Plain classes rather than @asynccontextmanager generators: a stream dropped
+# without aclose() is finalized by the event loop, and an inner generator
+# finalized first would break the outer one's exit
+class _LocalSubscription:
+    def __init__(self, broker, user_id):
+        self._broker, self._user_id = broker, user_id
+        self._entry = None
+
+    async def __aenter__(self):
+        self._entry = (asyncio.get_running_loop(), asyncio.Queue())
+        self._broker._add(self._user_id, self._entry)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._broker._remove(self._user_id, self._entry)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._entry[1].get()
+
+
+class _RedisSubscription:
+    def __init__(self, url, channel):
+        self._url, self._channel = url, channel
+        self._client = self._pubsub = None
+
+    async def __aenter__(self):
+        import redis.asyncio
+
+        self._client = redis.asyncio.Redis.from_url(self._url)
+        self._pubsub = self._client.pubsub()
+        await self._pubsub.subscribe(self._channel)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._pubsub.unsubscribe()
+        await self._pubsub.aclose()
+        await self._client.aclose()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            item = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+            if item and item["type"] == "message":
+                data = item["data"]
+                return data.decode() if isinstance(data, bytes) else data
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = getattr(settings, "NOTIFICATION_STREAM_URL", None)
+                _broker = RedisBroker(url) if url else LocalBroker()
+    return _broker
+
+
+def unavailable_reason(request):
+    """Why the stream can't be served for `request`, or None if it can."""
+    from django.core.handlers.asgi import ASGIRequest
+
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the endless response would be drained into a list,
+        # holding a worker until it times out
+        return "The notification stream needs an ASGI server."
+    if not getattr(settings, "NOTIFICATION_STREAM_URL", None) and not getattr(
+        settings, "NOTIFICATION_STREAM_LOCAL", False
+    ):
+        return "The notification stream needs NOTIFICATION_STREAM_URL when running more than one process."
+    return None
+
+
+def _publish(user_id, event, payload):
+    message = json.dumps({"event": event, "data": payload}, cls=JSONEncoder)
+    try:
+        get_broker().publish(user_id, message)
+    except Exception as e:
+        # Clients still catch up from the REST endpoints on reconnect
+        logger.warning("Could not publish %s to user %s: %s", event, user_id, e)
+
+
+def publish_notifications(rows):
+    """Push saved Notification instances to their recipients."""
+    from medical.serializers import NotificationSerializer
+
+    for row in rows:
+        _publish(row.recipient_id, "notification", {"notification": NotificationSerializer(row).data})
+
+
+def publish_unread(user_id, unread):
+    _publish(user_id, "unread", {"unread": unread})
+
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, cls=JSONEncoder)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def stream(user_id, unread, heartbeat=HEARTBEAT):
+    """
+    The SSE body for one client: the current unread count (awaited from the
+    `unread` coroutine function), then each message published to the user,
+    with heartbeats while idle.
+    """
+    yield f"retry: {RETRY_MS}\n\n"
+
+    async with get_broker().subscribe(user_id) as messages:
+        # Subscribed before the count is read, so nothing created in between is missed
+        yield format_event("unread", {"unread": await unread()})
+
+        pending = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(messages.__anext__())
+                done, _ = await asyncio.wait({pending}, timeout=heartbeat)
+                if not done:
+                    yield ": keepalive\n\n"
+                    continue
+                message, pending = json.loads(pending.result()), None
+                data = message["data"]
+                yield format_event(message["event"], data, event_id=(data.get("notification") or {}).get("id"))
+        finally:
+            if pending is not None:
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
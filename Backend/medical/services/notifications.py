@@ -0,0 +1,90 @@
+# medical/services/notifications.py
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from medical.models import Notification
+from medical.services.shared_cache import is_shared
+
+User = get_user_model()
+
+COMMITTEE_GROUP = "Committee"
+COMMITTEE_RECIPIENTS_CACHE_KEY = "medical:committee_recipients"
+COMMITTEE_RECIPIENTS_TTL = 60 * 60
+
+
+def committee_recipients():
+    """
+    Committee members as a list of {"id", "email"} dicts.
+
+    Resolved with one query and, when the cache is shared between processes,
+    cached; the cache is cleared whenever group membership or a user record
+    changes (see medical.signals). Shared by the in-app fan-out and the
+    committee email path.
+    """
+    shared = is_shared()
+    recipients = cache.get(COMMITTEE_RECIPIENTS_CACHE_KEY) if shared else None
+    if recipients is None:
+        recipients = list(
+            User.objects.filter(groups__name=COMMITTEE_GROUP)
+            .order_by("id")
+            .values("id", "email")
+        )
+        if shared:
+            cache.set(COMMITTEE_RECIPIENTS_CACHE_KEY, recipients, COMMITTEE_RECIPIENTS_TTL)
+    return recipients
+
+
+def committee_emails():
+    return [r["email"] for r in committee_recipients() if r["email"]]
+
+
+def invalidate_committee_recipients():
+    cache.delete(COMMITTEE_RECIPIENTS_CACHE_KEY)
+
+
+def notify_users(recipients, title, message, link=None, type_="system", actor=None, metadata=None):
+    """
+    Create one Notification per recipient in a single INSERT.
+
+    `recipients` may be User instances or user ids.
+    """
+    rows = [
+        Notification(
+            recipient_id=getattr(r, "pk", r),
+            title=title,
+            message=message,
+            link=link,
+            type=type_,
+            actor=actor,
+            metadata=metadata or {},
+        )
+        for r in recipients
+        if r
+    ]
+    return create_notifications(rows)
+
+
+def create_notifications(rows):
+    """
+    Save unsaved Notification instances (each with its own recipient and
+    text) in a single INSERT. notify_users() and the bulk claim transitions
+    both end up here, so this is also where recipients' unread counters move
+    and the rows are pushed to their notification streams.
+    """
+    from medical.services import unread_counts
+    from medical.services.notification_stream import publish_notifications
+
+    rows = list(rows)
+    if rows:
+        Notification.objects.bulk_create(rows)
+        unread_counts.created(rows)
+        transaction.on_commit(lambda: publish_notifications(rows))
+    return rows
+
+
+def notify_committee(title, message, link=None, type_="system", actor=None, metadata=None):
+    return notify_users(
+        [r["id"] for r in committee_recipients()],
+        title, message, link=link, type_=type_, actor=actor, metadata=metadata,
+    )
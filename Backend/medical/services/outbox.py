@@ -0,0 +1,86 @@
+# medical/services/outbox.py
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from medical.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# kind -> (model name in the medical app, function in medical.email_notifications)
+EMAIL_KINDS = {
+    "member_registration": ("Member", "send_member_registration_email"),
+    "member_approved": ("Member", "send_member_approved_email"),
+    "application_rejected": ("Member", "send_application_rejected_email"),
+    "new_member_committee": ("Member", "send_new_member_committee_email"),
+    "claim_submitted": ("Claim", "send_claim_submitted_email"),
+    "claim_status": ("Claim", "send_claim_status_email"),
+    "committee_claim": ("Claim", "send_committee_notification_email"),
+}
+
+
+def enqueue_email(kind, obj, **kwargs):
+    """
+    Record an email in the outbox and schedule delivery once the surrounding
+    transaction commits. `kwargs` are passed through to the email function.
+    """
+    return enqueue_emails([(kind, obj, kwargs)])[0]
+
+
+def enqueue_emails(entries):
+    """
+    Bulk variant of enqueue_email: `entries` is an iterable of
+    (kind, obj, kwargs) tuples. All rows are written with one INSERT.
+    """
+    rows = []
+    for kind, obj, kwargs in entries:
+        if kind not in EMAIL_KINDS:
+            raise ValueError(f"Unknown email kind: {kind}")
+        rows.append(EmailOutbox(kind=kind, object_id=str(obj.pk), payload=kwargs or {}))
+
+    if not rows:
+        return rows
+
+    EmailOutbox.objects.bulk_create(rows)
+    ids = [str(r.id) for r in rows]
+    transaction.on_commit(lambda: dispatch(ids))
+    return rows
+
+
+def dispatch(outbox_ids):
+    """Hand outbox rows to Celery. Broker errors leave rows pending for the sweeper."""
+    from medical.tasks import send_outbox_email
+
+    for outbox_id in outbox_ids:
+        try:
+            send_outbox_email.delay(str(outbox_id))
+        except Exception as e:
+            logger.warning("Could not dispatch outbox email %s: %s", outbox_id, e)
+
+
+def deliver(outbox: EmailOutbox):
+    """
+    Render and send a single outbox row. Raises on delivery failure so the
+    calling task can retry; returns the final status otherwise.
+    """
+    from django.apps import apps
+    from medical import email_notifications
+
+    model_name, func_name = EMAIL_KINDS[outbox.kind]
+    model = apps.get_model("medical", model_name)
+
+    obj = model.objects.filter(pk=outbox.object_id).first()
+    if obj is None:
+        status = "skipped"
+    else:
+        sent = getattr(email_notifications, func_name)(obj, **(outbox.payload or {}))
+        status = "sent" if sent else "skipped"
+
+    EmailOutbox.objects.filter(pk=outbox.pk).update(
+        status=status,
+        sent_at=timezone.now(),
+        attempts=outbox.attempts + 1,
+        last_error=None,
+    )
+    return status
@@ -0,0 +1,273 @@
+# medical/services/pricing.py
+"""
+Batch claim pricing.
+
+Re-prices many claims at once (e.g. after a ReimbursementScale or
+general_limits change) with the same rules as Claim.recalc_total() and
+Claim.compute_payable(), without looping saves. Everything the rules need is
+read up front in a fixed number of queries: the claims with their member's
+annual limit, item totals, the ledger rows of the affected members, and the
+cached scales/settings. Pricing then runs in memory with Decimal arithmetic,
+and the results go back with bulk_update, the benefit usage ledger synced in
+the same transaction.
+
+Annual limits follow the ledger rule of Claim.compute_payable(): a claim may
+use what is left of the limit after everything else its member-year commits
+(the ledger total less the claim's own share). Within a member-year the batch
+is priced oldest claim first, each claim's share moving in the running total
+as its save would move the ledger, so the result is the same as saving the
+claims one by one in that order.
+
+    summary = reprice(select_claims(statuses=["submitted"]), dry_run=True)
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Sum
+
+from medical.models import Claim, ClaimItem, MemberBenefitUsage, ReimbursementScale, Setting
+from medical.services import claim_queue, duplicates, ledger
+
+OPEN_STATUSES = ("draft", "submitted", "reviewed")
+PRICED_FIELDS = ("total_claimed", "total_payable", "member_payable")
+BATCH_SIZE = 500
+
+# Same fallback as Claim.compute_payable()
+GENERAL_DEFAULTS = {
+    "annual_limit": 250000,
+    "critical_addon": 200000,
+    "fund_share_percent": 80,
+    "clinic_outpatient_percent": 100,
+}
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0")
+HUNDRED = Decimal("100")
+
+
+def _dec(value):
+    return Decimal(str(value or 0))
+
+
+def select_claims(statuses=None, year=None, claim_type=None, member_id=None):
+    """Claims to re-price; open (not yet approved) claims unless `statuses` says otherwise."""
+    statuses = list(statuses or OPEN_STATUSES)
+    unknown = set(statuses) - set(dict(Claim.STATUS_CHOICES))
+    if unknown:
+        raise ValidationError(f"Unknown status: {', '.join(sorted(unknown))}")
+
+    qs = Claim.objects.filter(status__in=statuses)
+    if year:
+        try:
+            qs = qs.filter(created_at__year=int(year))
+        except (TypeError, ValueError):
+            raise ValidationError("year must be a number.")
+    if claim_type:
+        qs = qs.filter(claim_type__iexact=claim_type)
+    if member_id:
+        qs = qs.filter(member_id=member_id)
+    return qs
+
+
+def reprice(claims=None, dry_run=False, actor=None, sample=50):
+    """
+    Re-price `claims` (a Claim queryset, default: every open claim) and save
+    the new amounts unless `dry_run`. Returns a summary of what changed (or
+    would change), with up to `sample` per-claim differences.
+    """
+    if claims is None:
+        claims = select_claims()
+
+    with transaction.atomic():
+        batch = _load(claims, lock=not dry_run)
+        changes = _price(batch)
+        changed = [claim for claim, _ in changes]
+
+        if changed and not dry_run:
+            _save(changed, changed)
+            from medical.audit import log_event
+            log_event(actor=actor, action="claims:REPRICE", meta={
+                "claims": len(batch.claims),
+                "changed": len(changed),
+            })
+
+    return _summary(batch, changes, dry_run, sample)
+
+
+def price_claims(claims):
+    """
+    Re-price `claims` (a Claim queryset) after a change the caller records
+    itself, e.g. bulk status transitions: amounts and the ledger follow the
+    claims' current statuses, and no claims:REPRICE entry is written.
+    Returns the claims whose amounts changed.
+    """
+    with transaction.atomic():
+        batch = _load(claims, lock=True)
+        changed = [claim for claim, _ in _price(batch)]
+        _save(batch.claims, changed)
+    return changed
+
+
+def _save(claims, changed):
+    """Sync the ledger for `claims` and write them where amounts or ledger state moved."""
+    synced = ledger.sync(claims)
+    rows = list({claim.pk: claim for claim in (*changed, *synced)}.values())
+    if not rows:
+        return
+    Claim.objects.bulk_update(
+        rows, (*PRICED_FIELDS, *ledger.LEDGER_FIELDS), batch_size=BATCH_SIZE
+    )
+    claim_queue.schedule(claim_ids=[claim.pk for claim in rows])
+    duplicates.schedule([claim.pk for claim in rows])
+
+
+class _Batch:
+    """Everything the pricing pass reads, loaded in bulk."""
+
+    def __init__(self, claims, item_totals, usage, general):
+        self.claims = claims
+        self.item_totals = item_totals
+        self.usage = usage
+        self.general = general
+
+
+def _load(claims, lock):
+    qs = (
+        claims.order_by("created_at", "pk")
+        .annotate(member_annual_limit=F("member__membership_type__annual_limit"))
+        .only(
+            "id", "member_id", "claim_type", "status", "notes", "details",
+            "override_amount", "excluded", "other_insurance", "created_at",
+            *PRICED_FIELDS, *ledger.LEDGER_FIELDS,
+        )
+    )
+    if lock:
+        qs = qs.select_for_update(of=("self",))
+    rows = list(qs)
+
+    ids = [c.pk for c in rows]
+    item_totals = {}
+    usage = {}
+    if rows:
+        item_totals = dict(
+            ClaimItem.objects.filter(claim_id__in=ids)
+            .order_by()
+            .values("claim_id")
+            .annotate(total=Sum(F("amount") * F("quantity")))
+            .values_list("claim_id", "total")
+        )
+        years = {ledger.claim_year(c) for c in rows}
+        usage = {
+            (u.member_id, u.year): u
+            for u in MemberBenefitUsage.objects.filter(
+                member_id__in={c.member_id for c in rows}, year__in=years
+            )
+        }
+
+    general = Setting.get("general_limits", GENERAL_DEFAULTS)
+    return _Batch(rows, item_totals, usage, general)
+
+
+def _price(batch):
+    """
+    Compute new amounts in place. Returns [(claim, (old amounts)), ...] for
+    the claims whose amounts changed.
+    """
+    general = batch.general
+    default_share = _dec(general.get("fund_share_percent", 80))
+    default_ceiling = _dec(general.get("annual_limit", 50000))
+    clinic_percent = _dec(general.get("clinic_outpatient_percent", 100))
+
+    by_member_year = defaultdict(list)
+    for claim in batch.claims:
+        by_member_year[(claim.member_id, ledger.claim_year(claim))].append(claim)
+
+    changes = []
+    for key, claims in by_member_year.items():
+        # What the member-year's ledger row commits, kept current as we go
+        usage = batch.usage.get(key)
+        committed = usage.committed_total if usage else ZERO
+
+        for claim in claims:  # oldest first
+            old = tuple(getattr(claim, f) for f in PRICED_FIELDS)
+
+            items_total = _dec(batch.item_totals.get(claim.pk))
+            claimed = items_total or _dec(claim.calculate_total_claimed())
+            fund, member = _shares(
+                claim, claimed, default_share, default_ceiling, clinic_percent
+            )
+
+            limited = claim.override_amount is None and not claim.excluded
+            if limited:
+                limit = _dec(
+                    claim.member_annual_limit
+                    if claim.member_annual_limit is not None
+                    else general.get("annual_limit", 250000)
+                )
+                spent = committed - ledger.own_share(claim)
+                if spent + fund > limit:
+                    insurance = claimed - fund - member
+                    fund = max(ZERO, limit - spent)
+                    member = claimed - fund - insurance
+
+            new = tuple(v.quantize(CENT) for v in (claimed, fund, member))
+            counted = new[1] if ledger.BUCKETS.get(claim.status) else ZERO
+            committed += counted - ledger.own_share(claim)
+            if new != tuple(_dec(v).quantize(CENT) for v in old):
+                for field, value in zip(PRICED_FIELDS, new):
+                    setattr(claim, field, value)
+                changes.append((claim, old))
+    return changes
+
+
+def _shares(claim, claimed, default_share, default_ceiling, clinic_percent):
+    """(fund, member) shares of `claimed` before the annual limit."""
+    if claim.override_amount is not None:
+        override = _dec(claim.override_amount)
+        return override, max(ZERO, claimed - override)
+    if claim.excluded:
+        return ZERO, claimed
+
+    scale = ReimbursementScale.for_category(claim.claim_type)
+    share = _dec(scale.fund_share) if scale else default_share
+    ceiling = _dec(scale.ceiling) if scale else default_ceiling
+
+    # 100% outpatient rule for SGN clinic
+    if (claim.claim_type or "").lower() == "outpatient" and "siri guru nanak clinic" in (claim.notes or "").lower():
+        fund = claimed * clinic_percent / HUNDRED
+    else:
+        fund = claimed * share / HUNDRED
+
+    insurance = claim.other_insurance or {}
+    shif = _dec(insurance.get("shif", insurance.get("nhif", 0)))
+    other = _dec(insurance.get("other", 0))
+
+    fund = min(max(ZERO, fund - shif - other), ceiling)
+    return fund, claimed - fund - shif - other
+
+
+def _summary(batch, changes, dry_run, sample):
+    before = sum((_dec(old[1]) for _, old in changes), ZERO)
+    after = sum((claim.total_payable for claim, _ in changes), ZERO)
+    return {
+        "dry_run": dry_run,
+        "claims": len(batch.claims),
+        "changed": len(changes),
+        "total_payable_before": before,
+        "total_payable_after": after,
+        "total_payable_delta": after - before,
+        "changes": [
+            {
+                "id": str(claim.pk),
+                "member_id": str(claim.member_id),
+                "status": claim.status,
+                **{
+                    field: {"old": _dec(value).quantize(CENT), "new": getattr(claim, field)}
+                    for field, value in zip(PRICED_FIELDS, old)
+                },
+            }
+            for claim, old in changes[:sample]
+        ],
+    }
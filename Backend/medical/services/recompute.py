@@ -0,0 +1,123 @@
+# medical/services/recompute.py
+"""
+Claim recompute unit of work.
+
+Saving a claim, its items or changing its status all need the claim's totals
+and payable amounts recomputed. Inside `claim_recompute()` those requests are
+only recorded; when the outermost block exits each touched claim is computed
+once, its benefit usage ledger delta applied, and written with a single
+UPDATE. Outside a block a request is applied
+immediately, so admin/shell saves behave as before.
+
+    with transaction.atomic(), claim_recompute():
+        claim = serializer.save()
+        ...
+    # claim.total_claimed / total_payable / member_payable are final here
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from medical.models import Claim
+from medical.services import claim_queue, duplicates, ledger
+
+COMPUTED_FIELDS = frozenset({"total_claimed", "total_payable", "member_payable"})
+
+_state = threading.local()
+
+
+class _Pending:
+    __slots__ = ("instances", "totals", "items", "created")
+
+    def __init__(self):
+        self.instances = []
+        self.totals = False
+        self.items = False
+        self.created = False
+
+
+def _pending():
+    return getattr(_state, "pending", None)
+
+
+@contextmanager
+def claim_recompute():
+    """Coalesce all claim recomputes requested inside the block."""
+    outermost = _pending() is None
+    if outermost:
+        _state.pending = {}
+    try:
+        yield
+        if outermost:
+            pending = _state.pending
+            _state.pending = None
+            flush(pending.values())
+    finally:
+        if outermost:
+            _state.pending = None
+
+
+def request_recompute(claim, totals=False, items=False, created=False):
+    """
+    Ask for `claim` to be recomputed.
+
+    totals:  also recompute total_claimed (items or details), not only payables
+    items:   claim items changed, so the items aggregate must be re-read
+    created: the claim row was inserted in this unit (it cannot have items
+             unless `items` is also requested)
+    """
+    pending = _pending()
+    if pending is None:
+        entry = _Pending()
+        _merge(entry, claim, totals, items, created)
+        flush([entry])
+        return
+
+    entry = pending.get(claim.pk)
+    if entry is None:
+        entry = pending[claim.pk] = _Pending()
+    _merge(entry, claim, totals, items, created)
+
+
+def _merge(entry, claim, totals, items, created):
+    if not any(i is claim for i in entry.instances):
+        entry.instances.append(claim)
+    entry.totals |= totals or items
+    entry.items |= items
+    entry.created |= created
+
+
+def is_computed_only_save(update_fields):
+    """True for the internal saves that only write computed amounts."""
+    return bool(update_fields) and set(update_fields) <= COMPUTED_FIELDS
+
+
+def flush(entries):
+    """Compute every pending claim once and persist it with one UPDATE each."""
+    entries = list(entries)
+    with transaction.atomic():
+        # Claims inserted in this unit have nothing in the ledger yet
+        ledger.lock_applied([e.instances[0] for e in entries if not e.created])
+
+        for entry in entries:
+            claim = entry.instances[0]
+            if entry.totals:
+                claim.recalc_total(
+                    skip_save=True,
+                    include_items=entry.items or not entry.created,
+                )
+            claim.compute_payable(skip_save=True)
+
+        ledger.sync([e.instances[0] for e in entries])
+
+        for entry in entries:
+            claim = entry.instances[0]
+            values = {f: getattr(claim, f) for f in (*COMPUTED_FIELDS, *ledger.LEDGER_FIELDS)}
+            Claim.objects.filter(pk=claim.pk).update(**values)
+            for other in entry.instances[1:]:
+                for field, value in values.items():
+                    setattr(other, field, value)
+
+        claim_queue.schedule(claim_ids=[e.instances[0].pk for e in entries])
+        duplicates.schedule([e.instances[0].pk for e in entries])
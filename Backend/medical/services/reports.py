@@ -0,0 +1,345 @@
+# medical/services/reports.py
+"""
+Finance reporting.
+
+Reports read ClaimReportRow, a monthly rollup of the claims table rebuilt
+off-peak by `refresh_tables()` (nightly Celery beat task, or
+`manage.py refresh_report_tables`), never the live claims table.
+
+Asking for a report creates a ReportRun that a Celery worker renders to a
+CSV, XLSX or PDF file. Runs are keyed by report + parameters + format: a
+request matching a run that is still in progress, or one built from the
+current rollup, gets that run back instead of a new one.
+
+    run, created = request_report("top_providers", {"limit": 10}, "pdf", user)
+"""
+import csv
+import hashlib
+import io
+import json
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Max, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from medical.models import Claim, ClaimReportRow, ClaimReview, ReportRun
+
+CHUNK_SIZE = 2000
+FORMATS = ("csv", "xlsx", "pdf")
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# An unfinished run older than this is assumed lost (worker died)
+PENDING_REUSE = timedelta(hours=1)
+
+DEFAULT_PROVIDER_LIMIT = 20
+MAX_PROVIDER_LIMIT = 100
+
+
+# ---------------------------------------------------------------------------
+# Rollup
+# ---------------------------------------------------------------------------
+def _month(when):
+    day = timezone.localtime(when).date()
+    return date(day.year, day.month, 1)
+
+
+def _provider(details_name):
+    name = " ".join(str(details_name).split()) if details_name else ""
+    return name[:255] or None
+
+
+def refresh_tables():
+    """Rebuild ClaimReportRow from the claims table in one pass. Returns the row count."""
+    paid_review_at = (
+        ClaimReview.objects.filter(claim=OuterRef("pk"), action="paid")
+        .order_by("-created_at")
+        .values("created_at")[:1]
+    )
+    claims = (
+        Claim.objects.order_by()
+        .annotate(paid_review_at=Subquery(paid_review_at))
+        .values_list(
+            "created_at", "claim_type", "status", "member__membership_type__name",
+            "details__hospital_name", "total_claimed", "total_payable",
+            "submitted_at", "payment_record__payment_date", "paid_review_at",
+        )
+    )
+
+    rows = defaultdict(lambda: [0, Decimal("0"), Decimal("0"), 0, 0])
+    for (created_at, claim_type, status, membership_type, hospital,
+         claimed, payable, submitted_at, payment_date, paid_review_at) in claims.iterator(chunk_size=CHUNK_SIZE):
+        key = (_month(created_at), (claim_type or "").lower(), status, membership_type, _provider(hospital))
+        row = rows[key]
+        row[0] += 1
+        row[1] += claimed or 0
+        row[2] += payable or 0
+        paid_at = payment_date or paid_review_at
+        if status == "paid" and submitted_at and paid_at and paid_at >= submitted_at:
+            row[3] += 1
+            row[4] += int((paid_at - submitted_at).total_seconds())
+
+    now = timezone.now()
+    objs = [
+        ClaimReportRow(
+            month=month, claim_type=claim_type, status=status,
+            membership_type=membership_type, provider=provider,
+            claims=n, total_claimed=claimed, total_payable=payable,
+            paid_claims=paid, turnaround_seconds=seconds, refreshed_at=now,
+        )
+        for (month, claim_type, status, membership_type, provider), (n, claimed, payable, paid, seconds)
+        in rows.items()
+    ]
+    with transaction.atomic():
+        ClaimReportRow.objects.all().delete()
+        ClaimReportRow.objects.bulk_create(objs, batch_size=1000)
+    return len(objs)
+
+
+def refreshed_at():
+    """When the rollup was last rebuilt (None if never)."""
+    return ClaimReportRow.objects.aggregate(at=Max("refreshed_at"))["at"]
+
+
+# ---------------------------------------------------------------------------
+# Report definitions
+# ---------------------------------------------------------------------------
+def _rollup(params):
+    qs = ClaimReportRow.objects.all()
+    if params.get("date_from"):
+        qs = qs.filter(month__gte=params["date_from"])
+    if params.get("date_to"):
+        qs = qs.filter(month__lte=params["date_to"])
+    if params.get("claim_type"):
+        qs = qs.filter(claim_type=params["claim_type"])
+    return qs
+
+
+def _claims_by_month(params):
+    qs = (
+        _rollup(params).values("month", "claim_type", "status")
+        .annotate(n=Sum("claims"), claimed=Sum("total_claimed"), payable=Sum("total_payable"))
+        .order_by("month", "claim_type", "status")
+    )
+    return [
+        [r["month"].strftime("%Y-%m"), r["claim_type"], r["status"], r["n"], r["claimed"], r["payable"]]
+        for r in qs
+    ]
+
+
+def _payout_by_membership_type(params):
+    qs = (
+        _rollup(params).filter(status="paid").values("membership_type")
+        .annotate(n=Sum("claims"), payable=Sum("total_payable"))
+        .order_by("-payable", "membership_type")
+    )
+    return [[r["membership_type"] or "Unassigned", r["n"], r["payable"]] for r in qs]
+
+
+def _top_providers(params):
+    qs = (
+        _rollup(params).exclude(status="rejected").exclude(provider=None).values("provider")
+        .annotate(n=Sum("claims"), claimed=Sum("total_claimed"), payable=Sum("total_payable"))
+        .order_by("-payable", "provider")
+    )
+    return [
+        [r["provider"], r["n"], r["claimed"], r["payable"]]
+        for r in qs[:params.get("limit", DEFAULT_PROVIDER_LIMIT)]
+    ]
+
+
+def _turnaround(params):
+    qs = (
+        _rollup(params).filter(paid_claims__gt=0).values("month", "claim_type")
+        .annotate(paid=Sum("paid_claims"), seconds=Sum("turnaround_seconds"))
+        .order_by("month", "claim_type")
+    )
+    return [
+        [r["month"].strftime("%Y-%m"), r["claim_type"], r["paid"], round(r["seconds"] / r["paid"] / 86400, 1)]
+        for r in qs
+    ]
+
+
+REPORTS = {
+    "claims_by_month": {
+        "title": "Claims by type, month and status",
+        "columns": ["Month", "Type", "Status", "Claims", "Total Claimed", "Total Payable"],
+        "build": _claims_by_month,
+    },
+    "payout_by_membership_type": {
+        "title": "Payout by membership type",
+        "columns": ["Membership Type", "Paid Claims", "Total Paid"],
+        "build": _payout_by_membership_type,
+    },
+    "top_providers": {
+        "title": "Top providers",
+        "columns": ["Provider", "Claims", "Total Claimed", "Total Payable"],
+        "build": _top_providers,
+    },
+    "turnaround": {
+        "title": "Average turnaround, submitted to paid",
+        "columns": ["Month", "Type", "Paid Claims", "Average Days"],
+        "build": _turnaround,
+    },
+}
+
+
+# ---------------------------------------------------------------------------
+# Requests & generation
+# ---------------------------------------------------------------------------
+def clean_params(report, params):
+    """
+    Validated, normalized parameters (so equal requests share a key):
+    date_from/date_to (YYYY-MM or YYYY-MM-DD, by month), claim_type, and
+    limit for top_providers.
+    """
+    if report not in REPORTS:
+        raise ValidationError({"report": f"Unknown report. Choose from: {', '.join(REPORTS)}."})
+
+    if not isinstance(params, dict):
+        raise ValidationError({"params": "Must be an object."})
+
+    clean = {}
+    for name in ("date_from", "date_to"):
+        value = params.get(name)
+        if not value:
+            continue
+        try:
+            day = parse_date(value if len(value) > 7 else f"{value}-01") if isinstance(value, str) else None
+        except ValueError:  # well formed but not a real date, e.g. 2024-13
+            day = None
+        if day is None:
+            raise ValidationError({name: "Use YYYY-MM or YYYY-MM-DD."})
+        clean[name] = day.replace(day=1)
+    if params.get("claim_type"):
+        clean["claim_type"] = str(params["claim_type"]).lower()
+    if report == "top_providers" and params.get("limit"):
+        try:
+            clean["limit"] = max(1, min(int(params["limit"]), MAX_PROVIDER_LIMIT))
+        except (TypeError, ValueError):
+            raise ValidationError({"limit": "Must be a number."})
+    return clean
+
+
+def params_key(report, params, fmt):
+    raw = json.dumps([report, params, fmt], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def request_report(report, params, fmt, user=None):
+    """
+    The run for this report/parameters/format: a reusable existing one, or a
+    new one queued for generation after commit. Returns (run, created).
+    """
+    if fmt not in FORMATS:
+        raise ValidationError({"format": f"Choose from: {', '.join(FORMATS)}."})
+    params = clean_params(report, params)
+    key = params_key(report, params, fmt)
+
+    reusable = Q(status__in=("pending", "running"), created_at__gte=timezone.now() - PENDING_REUSE)
+    as_of = refreshed_at()
+    if as_of is not None:
+        reusable |= Q(status="done", data_as_of=as_of)
+    run = ReportRun.objects.filter(reusable, params_key=key).first()
+    if run is not None:
+        return run, False
+
+    run = ReportRun.objects.create(
+        report=report, params=json.loads(json.dumps(params, default=str)),
+        format=fmt, params_key=key, requested_by=user,
+    )
+    from medical.tasks import generate_report
+    transaction.on_commit(lambda: generate_report.delay(str(run.pk)))
+    return run, True
+
+
+def generate(run):
+    """Render `run` to its file. Failures are recorded on the run and re-raised."""
+    ReportRun.objects.filter(pk=run.pk).update(status="running")
+    try:
+        as_of = refreshed_at()
+        if as_of is None:
+            # First report ever: build the rollup once
+            refresh_tables()
+            as_of = refreshed_at()
+
+        definition = REPORTS[run.report]
+        params = clean_params(run.report, run.params)
+        rows = definition["build"](params)
+        data = RENDERERS[run.format](definition, params, rows, as_of)
+
+        run.file.save(f"{run.report}-{run.pk}.{run.format}", ContentFile(data), save=False)
+        run.status, run.row_count, run.data_as_of = "done", len(rows), as_of
+        run.finished_at = timezone.now()
+        run.save(update_fields=["file", "status", "row_count", "data_as_of", "finished_at"])
+    except Exception as e:
+        ReportRun.objects.filter(pk=run.pk).update(
+            status="failed", error=str(e)[:2000], finished_at=timezone.now()
+        )
+        raise
+    return run
+
+
+# ---------------------------------------------------------------------------
+# Renderers
+# ---------------------------------------------------------------------------
+def _subtitle(params, as_of):
+    parts = [f"{k.replace('_', ' ')}: {v}" for k, v in sorted(params.items())]
+    if as_of:
+        parts.append(f"data as of {timezone.localtime(as_of):%Y-%m-%d %H:%M}")
+    return "; ".join(parts)
+
+
+def _csv(definition, params, rows, as_of):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(definition["columns"])
+    writer.writerows(rows)
+    return buf.getvalue().encode()
+
+
+def _xlsx(definition, params, rows, as_of):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Report")
+    sheet.append(definition["columns"])
+    for row in rows:
+        sheet.append(row)
+    buf = io.BytesIO()
+    workbook.save(buf)
+    return buf.getvalue()
+
+
+def _pdf(definition, params, rows, as_of):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    buf = io.BytesIO()
+    styles = getSampleStyleSheet()
+    doc = SimpleDocTemplate(buf, pagesize=landscape(A4), title=definition["title"])
+    table = Table([definition["columns"], *[[str(v) for v in row] for row in rows]], repeatRows=1)
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+    ]))
+    doc.build([
+        Paragraph(definition["title"], styles["Title"]),
+        Paragraph(_subtitle(params, as_of), styles["Normal"]),
+        Spacer(1, 12),
+        table,
+    ])
+    return buf.getvalue()
+
+
+RENDERERS = {"csv": _csv, "xlsx": _xlsx, "pdf": _pdf}
+
+CONTENT_TYPES = {"csv": "text/csv", "xlsx": XLSX_CONTENT_TYPE, "pdf": "application/pdf"}
@@ -0,0 +1,112 @@
+# medical/services/retention.py
+"""
+Retention for the append-only tables.
+
+Notification and AuditLog grow with every claim submission and save. Rows
+past their retention window are moved, a batch at a time, into gzipped
+JSON-lines files on the default storage (one ArchiveBatch per file) and
+deleted from the hot table:
+
+    notifications   read, older than settings.NOTIFICATION_RETENTION_DAYS
+    audit_logs      older than settings.AUDIT_LOG_RETENTION_DAYS, unless
+                    about a claim that is still open (its history endpoint
+                    keeps reading them)
+
+Unread notifications are never archived, so unread counters don't move.
+Runs nightly (Celery beat) or `manage.py archive_old_records`; archived
+rows can be read back with `read_archive(batch)`.
+"""
+import gzip
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from medical.models import ArchiveBatch, AuditLog, Notification
+
+BATCH_SIZE = 5000
+
+DEFAULT_NOTIFICATION_DAYS = 90
+DEFAULT_AUDIT_LOG_DAYS = 365
+
+# Audit rows about claims in these states can go; the rest stay with the claim
+CLOSED_CLAIM_STATUSES = ("paid", "rejected")
+
+
+def _cutoff(days):
+    return timezone.now() - timedelta(days=days)
+
+
+def notifications_due(days=None):
+    if days is None:
+        days = getattr(settings, "NOTIFICATION_RETENTION_DAYS", DEFAULT_NOTIFICATION_DAYS)
+    return Notification.objects.filter(read=True, created_at__lt=_cutoff(days))
+
+
+def audit_logs_due(days=None):
+    if days is None:
+        days = getattr(settings, "AUDIT_LOG_RETENTION_DAYS", DEFAULT_AUDIT_LOG_DAYS)
+    return AuditLog.objects.filter(
+        Q(claim__isnull=True) | Q(claim__status__in=CLOSED_CLAIM_STATUSES),
+        created_at__lt=_cutoff(days),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Archiving
+# ---------------------------------------------------------------------------
+def archive(kind, queryset, batch_size=BATCH_SIZE):
+    """
+    Move every row of `queryset` into ArchiveBatch files of up to
+    `batch_size` rows. Returns (batches written, rows archived).
+    """
+    fields = [f.attname for f in queryset.model._meta.concrete_fields]
+    batches = rows = 0
+    while True:
+        # Unordered: the oldest rows sit first in the heap, so the scan stops early
+        chunk = list(queryset.order_by().values(*fields)[:batch_size])
+        if not chunk:
+            return batches, rows
+        _write_batch(kind, queryset.model, chunk)
+        batches += 1
+        rows += len(chunk)
+        if len(chunk) < batch_size:
+            return batches, rows
+
+
+def _write_batch(kind, model, chunk):
+    created = [row["created_at"] for row in chunk]
+    batch = ArchiveBatch(kind=kind, row_count=len(chunk), oldest=min(created), newest=max(created))
+    data = gzip.compress(b"".join(
+        json.dumps(row, cls=DjangoJSONEncoder).encode() + b"\n" for row in chunk
+    ))
+    batch.file.save(f"{kind}-{batch.pk}.jsonl.gz", ContentFile(data), save=False)
+    try:
+        with transaction.atomic():
+            batch.save()
+            model.objects.filter(pk__in=[row["id"] for row in chunk]).delete()
+    except Exception:
+        # Rows are still in the table; don't leave a file that duplicates them
+        batch.file.delete(save=False)
+        raise
+    return batch
+
+
+def archive_all(notification_days=None, audit_log_days=None, batch_size=BATCH_SIZE):
+    """Archive everything past retention. Returns {kind: (batches, rows)}."""
+    return {
+        "notifications": archive("notifications", notifications_due(notification_days), batch_size),
+        "audit_logs": archive("audit_logs", audit_logs_due(audit_log_days), batch_size),
+    }
+
+
+def read_archive(batch):
+    """The archived rows of `batch`, as dicts of raw column values (JSON types)."""
+    with batch.file.open("rb") as f, gzip.open(f, "rt") as lines:
+        for line in lines:
+            yield json.loads(line)
@@ -0,0 +1,90 @@
+# medical/services/roles.py
+"""
+Group-membership (role) resolver.
+
+A user's group names are resolved once and memoized on the user object,
+which lives for one request, so permission classes, views and serializers
+can ask as often as they like. Across requests the names are also cached,
+stamped with a roles version; group edits bump the version and membership
+changes drop the user's entry (see medical.signals and
+admin_update_user_roles). That layer is only used when the cache is shared
+by every process (medical.services.shared_cache): otherwise a revoked role
+would live on in the other workers' caches.
+"""
+import time
+
+from django.core.cache import cache
+
+from medical.services.shared_cache import is_shared
+
+ROLES_VERSION_KEY = "medical:roles:version"
+ROLES_KEY = "medical:roles:user:{}"
+ROLES_TTL = 60 * 15
+
+_MEMO_ATTR = "_medical_group_names"
+
+
+def user_groups(user):
+    """Names of the user's groups, ordered by group id (a tuple)."""
+    if user is None or not getattr(user, "is_authenticated", False):
+        return ()
+    names = getattr(user, _MEMO_ATTR, None)
+    if names is not None:
+        return names
+
+    names = _cached_groups(user) if is_shared() else _load_groups(user)
+    setattr(user, _MEMO_ATTR, names)
+    return names
+
+
+def _load_groups(user):
+    return tuple(user.groups.order_by("id").values_list("name", flat=True))
+
+
+def _cached_groups(user):
+    key = ROLES_KEY.format(user.pk)
+    cached = cache.get_many([ROLES_VERSION_KEY, key])
+    version = cached.get(ROLES_VERSION_KEY)
+    entry = cached.get(key)
+    if version is not None and entry is not None and entry[0] == version:
+        return entry[1]
+
+    names = _load_groups(user)
+    if version is None:
+        version = _reset_version()
+    cache.set(key, (version, names), ROLES_TTL)
+    return names
+
+
+def has_any_group(user, names):
+    """True if the user is in any of `names` (superuser status not considered)."""
+    groups = user_groups(user)
+    return any(name in groups for name in names)
+
+
+def primary_group(user):
+    """The user's first group (lowest id), like user.groups.first().name; None if none."""
+    groups = user_groups(user)
+    return groups[0] if groups else None
+
+
+def invalidate_user(user):
+    """Forget the cached groups of one user (a User instance or id)."""
+    user_id = getattr(user, "pk", user)
+    cache.delete(ROLES_KEY.format(user_id))
+    if hasattr(user, _MEMO_ATTR):
+        delattr(user, _MEMO_ATTR)
+
+
+def invalidate_all():
+    """Forget every user's cached groups (e.g. a group was renamed or deleted)."""
+    try:
+        cache.incr(ROLES_VERSION_KEY)
+    except ValueError:
+        cache.set(ROLES_VERSION_KEY, int(time.time() * 1000), None)
+
+
+def _reset_version():
+    # Seeded from the clock so a flushed cache never reuses an old version
+    cache.add(ROLES_VERSION_KEY, int(time.time() * 1000), None)
+    return cache.get(ROLES_VERSION_KEY)
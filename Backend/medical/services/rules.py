@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
@@ -21,3 +23,28 @@ def validate_claim_before_submit(claim):
         raise ValidationError("Your waiting period has not ended.")
 
     return True
+
+
+def annual_limit(member, critical=False):
+    """Annual benefit limit: membership type limit plus the critical-illness top-up."""
+    from medical.models import Setting
+
+    general = Setting.get("general_limits", {})
+    base = getattr(member.membership_type, "annual_limit", None) or general.get("annual_limit", 250000)
+    addon = general.get("critical_addon", 200000) if critical else 0
+    return Decimal(str(base)) + Decimal(str(addon))
+
+
+def enforce_annual_limit(claim):
+    """Reject approving/paying `claim` if it takes the member over the limit."""
+    from medical.services import ledger
+
+    usage = ledger.usage_for(claim.member_id, ledger.claim_year(claim))
+    spent = usage.used_total - ledger.own_share(claim, ("approved", "paid"))
+    critical = usage.critical_topup or (
+        (claim.claim_type or "").lower() == "inpatient"
+        and (claim.details or {}).get("critical_illness") is True
+    )
+
+    if spent + Decimal(str(claim.total_payable or 0)) > annual_limit(claim.member, critical):
+        raise ValidationError("Annual limit exceeded.")
@@ -0,0 +1,55 @@
+# medical/services/search.py
+"""
+Case-insensitive substring search over a few text columns, shared by the
+committee claim queue and the admin user list.
+
+On PostgreSQL the searched columns carry pg_trgm GIN indexes on
+UPPER(column) (migration 0022), which serve Django's `icontains`
+(`UPPER(col) LIKE UPPER('%q%')`) without a sequential scan, and matches are
+ranked by trigram word similarity. Other databases (SQLite in tests) run the
+same filter unindexed and rank exact > prefix > substring matches.
+
+    qs = search(User.objects.all(), "jane", USER_FIELDS).order_by("-search_rank")
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+# Columns searched by each endpoint (each has a trigram index on PostgreSQL)
+USER_FIELDS = ("username", "first_name", "last_name", "email")
+CLAIM_QUEUE_FIELDS = ("search_text",)
+
+
+def search(queryset, q, fields, rank=True):
+    """
+    Rows of `queryset` where any of `fields` contains `q`, annotated with
+    `search_rank` (higher is better) unless `rank` is False. A blank `q`
+    returns the queryset unchanged.
+    """
+    q = (q or "").strip()
+    if not q:
+        return queryset
+    queryset = queryset.filter(reduce(or_, (Q(**{f"{f}__icontains": q}) for f in fields)))
+    if rank:
+        queryset = queryset.annotate(search_rank=_rank(q, fields, connections[queryset.db].vendor))
+    return queryset
+
+
+def _rank(q, fields, vendor):
+    if vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        scores = [TrigramWordSimilarity(q, f) for f in fields]
+    else:
+        scores = [
+            Case(
+                When(**{f"{f}__iexact": q}, then=Value(1.0)),
+                When(**{f"{f}__istartswith": q}, then=Value(0.6)),
+                default=Value(0.3),
+                output_field=FloatField(),
+            )
+            for f in fields
+        ]
+    return Greatest(*scores) if len(scores) > 1 else scores[0]
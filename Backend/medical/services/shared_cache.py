@@ -0,0 +1,20 @@
+# medical/services/shared_cache.py
+"""
+Whether Django's default cache is shared by every process.
+
+Cross-request caches (committee recipients, roles, rule config, unread
+counts) are invalidated by deleting or versioning cache keys, which only
+reaches other workers through a shared backend (CACHE_URL=redis://...).
+With per-process local memory they'd serve stale data, so callers check
+`is_shared()` and read from the database instead.
+"""
+from django.conf import settings
+
+LOCAL_BACKENDS = ("django.core.cache.backends.locmem.LocMemCache",)
+
+
+def is_shared():
+    shared = getattr(settings, "CACHE_SHARED", None)
+    if shared is None:
+        shared = settings.CACHES["default"]["BACKEND"] not in LOCAL_BACKENDS
+    return shared
@@ -0,0 +1,238 @@
+# medical/services/transitions.py
+"""
+Bulk claim status transitions.
+
+`apply_transitions({claim_id: status, ...}, actor)` moves many claims through
+the same governance rules as ClaimViewSet.set_status in a fixed number of
+queries, whatever the batch size:
+
+- the claims are loaded and locked once, with their member, payment record,
+  meeting links (and meetings) and appeals prefetched, and every claim is
+  checked in memory: conflict of interest, the locked meeting decision for
+  approvals/rejections, the reconciled payment for payouts, Claim.clean()
+  (submission window, membership, 150k cap, appeal freeze) and, for review
+  actions, ClaimReview.clean() (emergency meeting above 150k);
+- claims that pass are written with one bulk_update, re-priced by
+  pricing.price_claims() (the annual limit charged as compute_payable() does,
+  so the amounts are those of set_status on each claim, oldest first), the
+  benefit ledger and committee queue brought in line, and fingerprints
+  registered for submissions;
+- ClaimReview, AuditLog and Notification rows are bulk-created and the
+  status emails queued in one outbox INSERT.
+
+Claims that fail a check are left untouched; the result lists the outcome of
+every requested claim:
+
+    result = apply_transitions({claim.pk: "approved"}, request.user)
+    # {"updated": 1, "unchanged": 0, "failed": 0, "results": [...]}
+
+`apply_meeting_decisions(meeting, actor)` feeds every approve/reject decision
+recorded at a locked meeting through the same engine.
+"""
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from medical.audit import log_event
+from medical.models import AuditLog, Claim, ClaimMeetingLink, ClaimReview, Notification
+from medical.services import claim_queue, pricing
+from medical.services.notifications import create_notifications
+from medical.services.outbox import enqueue_emails
+from medical.services.roles import primary_group
+from medical.services.verification import register_claim_fingerprints
+
+STATUSES = dict(Claim.STATUS_CHOICES)
+REVIEW_ACTIONS = {a for a, _ in ClaimReview.ACTIONS}
+EMAIL_STATUSES = ("approved", "rejected", "paid")
+BATCH_SIZE = 500
+
+
+def apply_transitions(changes, actor, note=None, meeting=None):
+    """
+    Move each claim in `changes` ({claim id: new status}) to its status.
+    All accepted transitions are written in one transaction; see the module
+    docstring for the result shape. Audit rows point at `meeting` when given,
+    otherwise at the meeting whose decision an approval/rejection follows.
+    """
+    results = {}
+    wanted = {}
+    for raw_id, status in changes.items():
+        try:
+            pk = uuid.UUID(str(raw_id))
+        except ValueError:
+            results[str(raw_id)] = _result(raw_id, None, status, "failed", "Claim not found.")
+            continue
+        if status not in STATUSES:
+            results[str(pk)] = _result(pk, None, status, "failed", "Invalid status.")
+            continue
+        wanted[pk] = status
+
+    role = primary_group(actor) if actor else None
+    with transaction.atomic():
+        claims = {c.pk: c for c in _load(wanted)}
+        accepted = []
+        for pk, status in wanted.items():
+            claim = claims.get(pk)
+            if claim is None:
+                results[str(pk)] = _result(pk, None, status, "failed", "Claim not found.")
+                continue
+            if claim.status == status:
+                results[str(pk)] = _result(pk, claim.status, status, "unchanged")
+                continue
+            previous = _snapshot(claim)
+            error = _check(claim, status, actor)
+            if error:
+                results[str(pk)] = _result(pk, claim.status, status, "failed", error)
+                continue
+            accepted.append((claim, previous))
+            results[str(pk)] = _result(pk, previous["status"], status, "updated")
+
+        if accepted:
+            _apply(accepted, actor, role, note, meeting)
+
+    results = list(results.values())
+    return {
+        "updated": sum(r["result"] == "updated" for r in results),
+        "unchanged": sum(r["result"] == "unchanged" for r in results),
+        "failed": sum(r["result"] == "failed" for r in results),
+        "results": results,
+    }
+
+
+def apply_meeting_decisions(meeting, actor):
+    """
+    Apply every approve/reject decision recorded at `meeting` (which must be
+    locked) in one transaction. Deferred claims are left alone and counted.
+    """
+    if meeting.status != "locked":
+        raise ValidationError("Meeting must be locked before its decisions are applied.")
+
+    decisions = dict(meeting.claim_links.values_list("claim_id", "decision"))
+    changes = {pk: d for pk, d in decisions.items() if d in ("approved", "rejected")}
+    with transaction.atomic():
+        result = apply_transitions(
+            changes, actor, note=f"Decision of {meeting}", meeting=meeting
+        )
+        log_event(actor=actor, action="meeting:DECISIONS_APPLIED", obj=meeting, meeting=meeting, meta={
+            "meeting_id": str(meeting.pk),
+            "updated": result["updated"],
+            "unchanged": result["unchanged"],
+            "failed": result["failed"],
+        })
+    return {"meeting": str(meeting.pk), "deferred": len(decisions) - len(changes), **result}
+
+
+def _load(pks):
+    if not pks:
+        return []
+    return (
+        Claim.objects.select_for_update(of=("self",))
+        .filter(pk__in=list(pks))
+        .select_related("member", "payment_record")
+        .prefetch_related(
+            Prefetch("meeting_links", queryset=ClaimMeetingLink.objects.select_related("meeting").order_by("pk")),
+            "appeals",
+        )
+    )
+
+
+def _check(claim, status, actor):
+    """Why `claim` may not move to `status` (None if it may). Sets the new status on `claim`."""
+    if actor is not None and claim.member.user_id == actor.pk:
+        return "Conflict of Interest: You cannot review or change the status of your own claim."
+
+    link = claim.latest_locked_link()
+    if status in ("approved", "rejected"):
+        if link is None:
+            return "Cannot approve/reject claim without a linked, locked committee meeting decision."
+        if link.decision != status:
+            return f"System decision ({status}) does not match the ratified meeting decision ({link.decision})."
+
+    if status == "paid":
+        payment = getattr(claim, "payment_record", None)
+        if payment is None or not payment.reconciled:
+            return "Cannot mark claim as PAID without a reconciled payment record proof."
+
+    old_status, old_submitted_at = claim.status, claim.submitted_at
+    claim.status = status
+    if status == "submitted" and not claim.submitted_at:
+        claim.submitted_at = timezone.now()
+    try:
+        claim.clean()
+        if status in REVIEW_ACTIONS:
+            ClaimReview(claim=claim, action=status).clean()
+    except ValidationError as e:
+        claim.status, claim.submitted_at = old_status, old_submitted_at
+        return " ".join(e.messages)
+    return None
+
+
+def _apply(accepted, actor, role, note, meeting):
+    claims = [claim for claim, _ in accepted]
+    pks = [claim.pk for claim in claims]
+
+    Claim.objects.bulk_update(claims, ["status", "submitted_at"], batch_size=BATCH_SIZE)
+    # Payables and the ledger follow the new statuses; the status_change
+    # entries below are the audit trail, as with set_status
+    pricing.price_claims(Claim.objects.filter(pk__in=pks))
+    claim_queue.schedule(claim_ids=pks)
+
+    fresh = {
+        c.pk: c for c in Claim.objects.filter(pk__in=pks).only(
+            "id", "member_id", "status", "submitted_at", "details", "notes",
+            "date_of_first_visit", "date_of_discharge", *pricing.PRICED_FIELDS,
+        )
+    }
+    register_claim_fingerprints([fresh[c.pk] for c in claims if c.status == "submitted"])
+
+    reviews, logs, notifications, emails = [], [], [], []
+    for claim, previous in accepted:
+        current = fresh[claim.pk]
+        for field in pricing.PRICED_FIELDS:
+            setattr(claim, field, getattr(current, field))
+        link = claim.latest_locked_link()
+        if claim.status in REVIEW_ACTIONS:
+            reviews.append(ClaimReview(claim=claim, reviewer=actor, role=role, action=claim.status, note=note))
+        logs.append(AuditLog(
+            actor=actor,
+            action=f"status_change:{claim.status}",
+            claim=claim,
+            object_type="claim",
+            object_id=str(claim.pk),
+            previous_state=previous,
+            new_state=_snapshot(claim),
+            meeting=meeting or (link.meeting if link and claim.status in ("approved", "rejected") else None),
+            meta={"note": note, "role": role, "claim_id": str(claim.pk), "bulk": True},
+        ))
+        message = f"Your claim {claim.pk} status has been updated to {claim.status.upper()}."
+        if note:
+            message += f" Note: {note}"
+        notifications.append(Notification(
+            recipient_id=claim.member.user_id,
+            title="Claim Update",
+            message=message,
+            link=f"/dashboard/member/claims/{claim.pk}",
+            type="claim",
+        ))
+        if claim.status in EMAIL_STATUSES:
+            emails.append(("claim_status", claim, {}))
+
+    ClaimReview.objects.bulk_create(reviews, batch_size=BATCH_SIZE)
+    AuditLog.objects.bulk_create(logs, batch_size=BATCH_SIZE)
+    create_notifications(notifications)
+    enqueue_emails(emails)
+
+
+def _snapshot(claim):
+    return {
+        "status": claim.status,
+        "submitted_at": claim.submitted_at.isoformat() if claim.submitted_at else None,
+        **{field: str(getattr(claim, field)) for field in pricing.PRICED_FIELDS},
+    }
+
+
+def _result(pk, old, new, result, detail=None):
+    return {"id": str(pk), "from": old, "to": new, "result": result, "detail": detail}
@@ -0,0 +1,163 @@
+# medical/services/unread_counts.py
+"""
+Per-user unread notification counters (NotificationCounter).
+
+The counter moves in the same transaction as the change it counts:
+
+    created(rows)              +n per recipient, from create_notifications()
+    mark_read(user, ids=None)  marks notifications read; -n, or 0 for "all"
+
+so a rolled-back insert never leaves the count behind. Reads go through the
+cache (only when it is shared by every process, see
+medical.services.shared_cache) and then the counter row, and never COUNT.
+The cache entry is dropped when the transaction commits, and mark-read
+pushes the new count to the user's open notification streams. `reconcile()` recounts from the
+notifications table and runs nightly to absorb any drift (e.g. rows
+deleted in the admin).
+"""
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+
+from medical.models import Notification, NotificationCounter
+from medical.services.shared_cache import is_shared
+
+CACHE_KEY = "medical:notifications:unread:{}"
+CACHE_TTL = 60 * 60
+
+
+# ---------------------------------------------------------------------------
+# Incremental updates
+# ---------------------------------------------------------------------------
+def created(rows):
+    """Count newly inserted (unread) Notification rows."""
+    per_user = Counter(row.recipient_id for row in rows if not row.read)
+    by_amount = defaultdict(list)
+    for user_id, n in per_user.items():
+        by_amount[n].append(user_id)
+
+    for n, user_ids in by_amount.items():
+        qs = NotificationCounter.objects.filter(user_id__in=user_ids)
+        if qs.update(unread=F("unread") + n) == len(user_ids):
+            continue
+        existing = set(qs.values_list("user_id", flat=True))
+        for user_id in set(user_ids) - existing:
+            _start(user_id, n)
+
+    _invalidate_on_commit(per_user)
+
+
+def _start(user_id, n):
+    """First counter row for a user: their unread rows, our `n` new ones included."""
+    qs = NotificationCounter.objects.filter(user_id=user_id)
+    unread = Notification.objects.filter(recipient_id=user_id, read=False).count()
+    try:
+        with transaction.atomic():
+            NotificationCounter.objects.create(user_id=user_id, unread=unread)
+    except IntegrityError:
+        # Row was created concurrently; it doesn't include our rows yet
+        qs.update(unread=F("unread") + n)
+
+
+def mark_read(user, notification_ids=None):
+    """
+    Mark the user's notifications read (all of them, or `notification_ids`)
+    and move their counter. Returns the number of notifications changed.
+    """
+    user_id = getattr(user, "pk", user)
+    qs = Notification.objects.filter(recipient_id=user_id, read=False)
+    if notification_ids is not None:
+        qs = qs.filter(pk__in=notification_ids)
+
+    with transaction.atomic():
+        changed = qs.update(read=True)
+        counter = NotificationCounter.objects.filter(user_id=user_id)
+        if notification_ids is None:
+            counter.update(unread=0)
+        elif changed:
+            counter.update(unread=Greatest(F("unread") - changed, Value(0)))
+
+    _invalidate([user_id])
+    transaction.on_commit(lambda: _after_read(user_id))
+    return changed
+
+
+def _after_read(user_id):
+    from medical.services.notification_stream import publish_unread
+
+    _invalidate([user_id])
+    # Other tabs / devices learn the new count from their streams
+    publish_unread(user_id, unread_count(user_id))
+
+
+# ---------------------------------------------------------------------------
+# Reads (cached)
+# ---------------------------------------------------------------------------
+def unread_count(user_id):
+    """The user's unread notification count."""
+    # A per-process cache would miss other workers' invalidations; the
+    # counter row is a primary-key lookup anyway
+    shared = is_shared()
+    key = CACHE_KEY.format(user_id)
+    count = cache.get(key) if shared else None
+    if count is None:
+        count = NotificationCounter.objects.filter(user_id=user_id).values_list("unread", flat=True).first()
+        if count is None:
+            # Never notified since the counters were introduced
+            count = Notification.objects.filter(recipient_id=user_id, read=False).count()
+        if shared:
+            cache.set(key, count, CACHE_TTL)
+    return count
+
+
+def _invalidate(user_ids):
+    cache.delete_many([CACHE_KEY.format(user_id) for user_id in user_ids])
+
+
+def _invalidate_on_commit(user_ids):
+    user_ids = list(user_ids)
+    if user_ids:
+        # Now, and again at commit: a reader may re-cache the old count in between
+        _invalidate(user_ids)
+        transaction.on_commit(lambda: _invalidate(user_ids))
+
+
+# ---------------------------------------------------------------------------
+# Reconcile
+# ---------------------------------------------------------------------------
+def reconcile(user_ids=None):
+    """
+    Recount unread notifications and correct the counters that drifted.
+    Returns (counters checked, counters corrected).
+    """
+    unread = Notification.objects.filter(read=False)
+    counters = NotificationCounter.objects.all()
+    if user_ids is not None:
+        unread = unread.filter(recipient_id__in=user_ids)
+        counters = counters.filter(user_id__in=user_ids)
+
+    with transaction.atomic():
+        # Lock first: writers that already inserted notifications wait to
+        # bump the counter until the recount is in
+        stored = dict(counters.select_for_update().values_list("user_id", "unread"))
+        actual = dict(
+            unread.order_by().values("recipient_id").annotate(n=Count("pk")).values_list("recipient_id", "n")
+        )
+
+        wrong = {
+            user_id: actual.get(user_id, 0)
+            for user_id in set(actual) | set(stored)
+            if actual.get(user_id, 0) != stored.get(user_id)
+        }
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id, unread=n) for user_id, n in wrong.items()],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["unread", "updated_at"],
+            batch_size=1000,
+        )
+        _invalidate_on_commit(wrong)
+    return len(set(actual) | set(stored)), len(wrong)
@@ -36,8 +36,13 @@ def register_claim_fingerprint(claim):
     """
     Store the hash for a claim to prevent future duplicates.
     """
-    h = calculate_claim_hash(claim)
-    ClaimFingerprint.objects.get_or_create(
-        claim=claim,
-        defaults={'hash_value': h}
-    )
+    register_claim_fingerprints([claim])
+
+def register_claim_fingerprints(claims):
+    """
+    Bulk variant of register_claim_fingerprint: one INSERT for all claims.
+    Claims that already have a fingerprint (or whose hash is taken) are skipped.
+    """
+    rows = [ClaimFingerprint(claim=c, hash_value=calculate_claim_hash(c)) for c in claims]
+    if rows:
+        ClaimFingerprint.objects.bulk_create(rows, ignore_conflicts=True)
@@ -1,11 +1,16 @@
 # --- imports ---
 # signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.db import transaction
-from .models import Claim, ClaimItem, Notification, AuditLog
+from .models import ChronicRequest, Claim, ClaimAttachment, ClaimItem, MembershipType, Setting, ReimbursementScale
+from .services import claim_queue, config_cache, dashboard_stats, duplicates, ledger, roles
+from .audit import log_event
+from .services.outbox import enqueue_email
+from .services.notifications import notify_users, notify_committee, invalidate_committee_recipients
+from .services.recompute import request_recompute, is_computed_only_save
 
 User = get_user_model()
 
@@ -13,13 +18,10 @@ User = get_user_model()
 def _notify(recipient, title, message, link=None, type_="system", actor=None, metadata=None):
     if not recipient:
         return
-    Notification.objects.create(
-        recipient=recipient, title=title, message=message, link=link,
-        type=type_, actor=actor, metadata=metadata or {}
-    )
+    notify_users([recipient], title, message, link=link, type_=type_, actor=actor, metadata=metadata)
 
-def _audit(actor, action, meta=None):
-    AuditLog.objects.create(actor=actor, action=action, meta=meta or {})
+def _audit(actor, action, meta=None, obj=None):
+    log_event(actor=actor, action=action, obj=obj, meta=meta)
 
 
 # --- groups on user create ---
@@ -32,83 +34,67 @@ def ensure_user_groups(sender, instance, created, **kwargs):
     instance.groups.add(grp)
 
 
-# --- Claim save: compute payable & notify (no recursion) ---
+# --- Claim save: compute payable & notify ---
 @receiver(post_save, sender=Claim)
-def claim_saved(sender, instance: Claim, created, **kwargs):
-    # Avoid recursion: disconnect then reconnect
-    post_save.disconnect(claim_saved, sender=Claim)
-    try:
-        with transaction.atomic():
-            # compute payable on every save
-            instance.compute_payable()
-
-            member_user = getattr(getattr(instance.member, "user", None), "pk", None)
+def claim_saved(sender, instance: Claim, created, update_fields=None, **kwargs):
+    claim_queue.schedule(claim_ids=[instance.pk])
+    duplicates.schedule([instance.pk])
+
+    # Internal saves that only write computed amounts don't re-trigger anything
+    if is_computed_only_save(update_fields):
+        return
+
+    with transaction.atomic():
+        # compute payable on every save (coalesced inside a claim_recompute() block)
+        request_recompute(instance, created=created)
+
+        member_user = getattr(getattr(instance.member, "user", None), "pk", None)
+        
+        # 1. Notify Member used to be here.
+        if created and instance.status == "submitted":
+            # Notify Applier
+            if member_user:
+                _notify(
+                    instance.member.user,
+                    "Claim Submitted",
+                    f"Your SHIF/SHA-linked claim {instance.id} has been received.",
+                    f"/dashboard/member/claims/{instance.id}",
+                    "claim"
+                )
+                # Send email notification (after commit, via outbox)
+                enqueue_email("claim_submitted", instance)
             
-            # 1. Notify Member used to be here.
-            # 2. Notify Committee
-            committee_group = Group.objects.filter(name="Committee").first()
-            committee_users = list(committee_group.user_set.all()) if committee_group else []
-
-            if created and instance.status == "submitted":
-                # Notify Applier
-                if member_user:
-                    _notify(
-                        instance.member.user,
-                        "Claim Submitted",
-                        f"Your SHIF/SHA-linked claim {instance.id} has been received.",
-                        f"/dashboard/member/claims/{instance.id}",
-                        "claim"
-                    )
-                    # Send email notification
-                    try:
-                        from .email_notifications import send_claim_submitted_email
-                        send_claim_submitted_email(instance)
-                    except Exception as e:
-                        print(f"Failed to send claim submission email: {e}")
-                
-                # Notify Committee
-                for c_user in committee_users:
-                    _notify(
-                        c_user,
-                        "New Claim Submitted",
-                        f"New {instance.claim_type} claim (SHIF-linked) from {instance.member.user.get_full_name() or instance.member.user.username}.",
-                        f"/dashboard/committee/claims/{instance.id}/",
-                        "claim"
-                    )
-                
-                # Send committee email
-                try:
-                    from .email_notifications import send_committee_notification_email
-                    send_committee_notification_email(instance, 'new_claim')
-                except Exception as e:
-                    print(f"Failed to send committee notification email: {e}")
-                    
-            elif not created:
-                # Notify Member on status change
-                if member_user:
-                    msg = f"Your claim {instance.id} status has been updated to {instance.status.upper()}."
-                    note = getattr(instance, 'status_note', None)
-                    if note:
-                        msg += f" Note: {note}"
-                        
-                    _notify(
-                        instance.member.user,
-                        "Claim Update",
-                        msg,
-                        f"/dashboard/member/claims/{instance.id}",
-                        "claim"
-                    )
-                    # Send email for status changes
-                    if instance.status in ['approved', 'rejected', 'paid']:
-                        try:
-                            from .email_notifications import send_claim_status_email
-                            send_claim_status_email(instance)
-                        except Exception as e:
-                            print(f"Failed to send claim status email: {e}")
+            # 2. Notify Committee (one bulk INSERT)
+            notify_committee(
+                "New Claim Submitted",
+                f"New {instance.claim_type} claim (SHIF-linked) from {instance.member.user.get_full_name() or instance.member.user.username}.",
+                f"/dashboard/committee/claims/{instance.id}/",
+                "claim"
+            )
             
-            _audit(None, "claims:UPSERT", {"id": str(instance.id), "status": instance.status})
-    finally:
-        post_save.connect(claim_saved, sender=Claim)
+            # Send committee email
+            enqueue_email("committee_claim", instance, notification_type="new_claim")
+
+        elif not created:
+            # Notify Member on status change
+            if member_user:
+                msg = f"Your claim {instance.id} status has been updated to {instance.status.upper()}."
+                note = getattr(instance, 'status_note', None)
+                if note:
+                    msg += f" Note: {note}"
+                    
+                _notify(
+                    instance.member.user,
+                    "Claim Update",
+                    msg,
+                    f"/dashboard/member/claims/{instance.id}",
+                    "claim"
+                )
+                # Send email for status changes
+                if instance.status in ['approved', 'rejected', 'paid']:
+                    enqueue_email("claim_status", instance)
+        
+        _audit(None, "claims:UPSERT", {"id": str(instance.id), "status": instance.status}, obj=instance)
 
 
 # --- Member save: notify Committee on newly registered, Member on active ---
@@ -118,40 +104,124 @@ from .models import Member
 def member_saved(sender, instance: Member, created, **kwargs):
     if created:
         # Send welcome email to new member
-        try:
-            from .email_notifications import send_member_registration_email
-            send_member_registration_email(instance)
-        except Exception as e:
-            print(f"Failed to send registration email: {e}")
+        enqueue_email("member_registration", instance)
         
         # Notify Committee of new registration (if not already handled by view)
         # It's safer to have it here to catch all creations
-        committee_group = Group.objects.filter(name="Committee").first()
-        if committee_group:
-            for c_user in committee_group.user_set.all():
-                _notify(
-                    c_user,
-                    "New Membership Application",
-                    f"New SHIF/SHA member registration: {instance.user.get_full_name() or instance.user.username}.",
-                    f"/dashboard/committee/members/{instance.id}/",
-                    "member"
-                )
+        notify_committee(
+            "New Membership Application",
+            f"New SHIF/SHA member registration: {instance.user.get_full_name() or instance.user.username}.",
+            f"/dashboard/committee/members/{instance.id}/",
+            "member"
+        )
         
         # Send committee email alert
-        try:
-            from .email_notifications import send_new_member_committee_email
-            send_new_member_committee_email(instance)
-        except Exception as e:
-            print(f"Failed to send new member committee email: {e}")
+        enqueue_email("new_member_committee", instance)
     else:
         # Status changes handled here or in services? 
         # Services `approve_member` handles it manually with custom message.
         # We can leave it there to avoid duplicate "Active" messages if service is used.
-        pass
+
+        # Name / membership type / status shown in the committee queue
+        claim_queue.schedule(member_ids=[instance.pk])
+
+
+# --- Committee queue: user names and membership type names are copied there ---
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) == {"last_login"}):
+        return
+    claim_queue.schedule(user_ids=[instance.pk])
+
+
+@receiver(post_save, sender=MembershipType)
+def membership_type_saved(sender, instance, created, **kwargs):
+    if not created:
+        claim_queue.schedule(membership_type_ids=[instance.pk])
+
+
+@receiver(pre_delete, sender=Claim)
+def claim_deleting(sender, instance, **kwargs):
+    # Its queue row goes with it (CASCADE); take it out of the counters first
+    claim_queue.removed([instance.pk])
+    ledger.removed([instance])
+
+
+# --- Dashboard counters for registrations and chronic requests ---
+@receiver(post_save, sender=Member)
+@receiver(post_save, sender=ChronicRequest)
+def counted_created(sender, instance, created, **kwargs):
+    if created:
+        metric = dashboard_stats.MEMBERS if sender is Member else dashboard_stats.CHRONIC_REQUESTS
+        dashboard_stats.bump(metric, instance.created_at)
+
+
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=ChronicRequest)
+def counted_deleted(sender, instance, **kwargs):
+    metric = dashboard_stats.MEMBERS if sender is Member else dashboard_stats.CHRONIC_REQUESTS
+    dashboard_stats.bump(metric, instance.created_at, count=-1)
 
 # --- ClaimItem save: recompute claim totals ---
 @receiver(post_save, sender=ClaimItem)
 def item_saved(sender, instance: ClaimItem, created, **kwargs):
-    claim = instance.claim
-    claim.recalc_total()
-    claim.compute_payable()
+    request_recompute(instance.claim, items=True)
+
+
+@receiver(post_delete, sender=ClaimItem)
+def item_deleted(sender, instance: ClaimItem, origin=None, **kwargs):
+    # Items removed because their claim is being deleted need no recompute
+    if isinstance(origin, Claim):
+        return
+    claim = Claim.objects.filter(pk=instance.claim_id).first()
+    if claim is not None:
+        request_recompute(claim, items=True)
+
+
+# --- ClaimAttachment upload: validate/process off the request path ---
+@receiver(post_save, sender=ClaimAttachment)
+def attachment_saved(sender, instance: ClaimAttachment, created, **kwargs):
+    if created and instance.status == "pending":
+        from .services.attachments import enqueue
+        enqueue(instance)
+
+
+# --- Committee recipient cache invalidation ---
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    invalidate_committee_recipients()
+
+    # Per-user role cache: forward side is user.groups, reverse is group.user_set
+    if not reverse:
+        roles.invalidate_user(instance)
+    elif pk_set:
+        for user_id in pk_set:
+            roles.invalidate_user(user_id)
+    else:
+        roles.invalidate_all()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def committee_directory_changed(sender, update_fields=None, **kwargs):
+    # Logins only touch last_login; don't churn the cache for those
+    if update_fields and set(update_fields) == {"last_login"}:
+        return
+    invalidate_committee_recipients()
+    if sender is Group:
+        roles.invalidate_all()
+
+
+# --- Rule-engine config cache invalidation ---
+@receiver(post_save, sender=Setting)
+@receiver(post_delete, sender=Setting)
+@receiver(post_save, sender=ReimbursementScale)
+@receiver(post_delete, sender=ReimbursementScale)
+def config_changed(sender, **kwargs):
+    config_cache.invalidate()
+    # Again once committed, so nothing cached mid-transaction outlives it
+    transaction.on_commit(config_cache.invalidate)
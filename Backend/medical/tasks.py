@@ -0,0 +1,182 @@
+# Backend/medical/tasks.py
+from datetime import timedelta
+
+from celery import shared_task
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ClaimAttachment, EmailOutbox
+
+OUTBOX_MAX_RETRIES = 5
+OUTBOX_RETRY_BACKOFF_MAX = 30 * 60  # seconds
+# A row still "sending" this long after it was claimed lost its worker
+OUTBOX_SENDING_TIMEOUT = timedelta(hours=1)
+ATTACHMENT_MAX_RETRIES = 3
+# An attachment still "processing" this long after it was claimed lost its worker
+ATTACHMENT_PROCESSING_TIMEOUT = timedelta(minutes=30)
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=30,
+    retry_backoff_max=OUTBOX_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+    max_retries=OUTBOX_MAX_RETRIES,
+)
+def send_outbox_email(self, outbox_id):
+    """Deliver one EmailOutbox row, retrying with exponential backoff."""
+    from .services.outbox import deliver
+
+    # Claim the row so a re-dispatched email is only sent once
+    claimed = EmailOutbox.objects.filter(pk=outbox_id, status="pending").update(
+        status="sending", last_attempt_at=timezone.now()
+    )
+    if not claimed:
+        # Already delivered / being delivered by another worker
+        return None
+    outbox = EmailOutbox.objects.get(pk=outbox_id)
+
+    try:
+        return deliver(outbox)
+    except Exception as e:
+        final = self.request.retries >= self.max_retries
+        EmailOutbox.objects.filter(pk=outbox.pk).update(
+            attempts=F("attempts") + 1,
+            last_error=str(e)[:2000],
+            status="failed" if final else "pending",
+        )
+        raise
+
+
+@shared_task
+def flush_email_outbox(older_than_minutes=5, limit=500):
+    """
+    Periodic sweeper: re-dispatch rows that never reached a worker
+    (e.g. broker down at commit time), or whose retry never came back.
+
+    Rows that failed an attempt are left alone for the whole retry backoff
+    window, so their scheduled retry isn't doubled up.
+    """
+    from .services.outbox import dispatch
+
+    now = timezone.now()
+    # The worker died mid-send: retry (the email may go out twice)
+    EmailOutbox.objects.filter(
+        status="sending", last_attempt_at__lt=now - OUTBOX_SENDING_TIMEOUT
+    ).update(status="pending")
+
+    cutoff = now - timedelta(minutes=older_than_minutes)
+    retry_cutoff = cutoff - timedelta(seconds=OUTBOX_RETRY_BACKOFF_MAX)
+    ids = list(
+        EmailOutbox.objects.filter(
+            Q(last_attempt_at__isnull=True, created_at__lt=cutoff) | Q(last_attempt_at__lt=retry_cutoff),
+            status="pending",
+            attempts__lt=OUTBOX_MAX_RETRIES,
+        ).values_list("id", flat=True)[:limit]
+    )
+    dispatch(ids)
+    return len(ids)
+
+
+@shared_task
+def rebuild_dashboard_stats():
+    """Nightly: recompute the dashboard counters from the source tables."""
+    from .services.dashboard_stats import rebuild
+
+    return rebuild()
+
+
+@shared_task
+def reconcile_unread_counts():
+    """Nightly: correct unread notification counters that drifted."""
+    from .services.unread_counts import reconcile
+
+    checked, corrected = reconcile()
+    return {"checked": checked, "corrected": corrected}
+
+
+@shared_task
+def generate_report(run_id):
+    """Render one queued ReportRun to its CSV/XLSX/PDF file."""
+    from .models import ReportRun
+    from .services.reports import generate
+
+    run = ReportRun.objects.filter(pk=run_id, status="pending").first()
+    if run is None:
+        # Already picked up by another worker
+        return None
+    generate(run)
+    return str(run.pk)
+
+
+@shared_task
+def refresh_report_tables():
+    """Nightly: rebuild the claim rollup the finance reports read."""
+    from .services.reports import refresh_tables
+
+    return refresh_tables()
+
+
+@shared_task
+def archive_old_records():
+    """Nightly: move notifications and audit entries past retention into archive files."""
+    from .services.retention import archive_all
+
+    return {kind: rows for kind, (_, rows) in archive_all().items()}
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=30,
+    retry_jitter=True,
+    max_retries=ATTACHMENT_MAX_RETRIES,
+)
+def process_attachment(self, attachment_id):
+    """Validate one staged ClaimAttachment and publish or reject it."""
+    from .services.attachments import process
+
+    # Claim the row so a re-dispatched attachment is only processed once
+    claimed = ClaimAttachment.objects.filter(pk=attachment_id, status="pending").update(
+        status="processing", last_attempt_at=timezone.now()
+    )
+    if not claimed:
+        return None
+    attachment = ClaimAttachment.objects.get(pk=attachment_id)
+
+    try:
+        return process(attachment)
+    except Exception as e:
+        final = self.request.retries >= self.max_retries
+        ClaimAttachment.objects.filter(pk=attachment_id).update(
+            status="failed" if final else "pending",
+            error=str(e)[:2000],
+        )
+        raise
+
+
+@shared_task
+def process_pending_attachments(older_than_minutes=5, limit=200):
+    """
+    Periodic sweeper: re-dispatch staged attachments that never reached a
+    worker, or whose worker died while processing them.
+    """
+    from .services.attachments import dispatch
+
+    now = timezone.now()
+    # The worker died mid-processing (a redelivered task finds the row claimed)
+    stale = now - ATTACHMENT_PROCESSING_TIMEOUT
+    ClaimAttachment.objects.filter(
+        Q(last_attempt_at__lt=stale) | Q(last_attempt_at__isnull=True, uploaded_at__lt=stale),
+        status="processing",
+    ).update(status="pending")
+
+    cutoff = now - timedelta(minutes=older_than_minutes)
+    ids = list(
+        ClaimAttachment.objects.filter(status="pending", uploaded_at__lt=cutoff)
+        .order_by("uploaded_at")
+        .values_list("id", flat=True)[:limit]
+    )
+    dispatch(ids)
+    return len(ids)
@@ -0,0 +1,142 @@
+import io
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from medical.models import AuditLog, Claim, ClaimAttachment, Member, MembershipType, Notification
+from medical.services.attachments import process
+from medical.tasks import process_attachment, process_pending_attachments
+
+User = get_user_model()
+
+PDF = (
+    b"%PDF-1.4\n1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n"
+    b"2 0 obj << /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 >> endobj\n"
+    b"3 0 obj << /Type /Page /Parent 2 0 R >> endobj\n"
+    b"4 0 obj << /Type/Page /Parent 2 0 R >> endobj\n%%EOF\n"
+)
+
+
+def png(size=(800, 600)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, "white").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def infected(file, name):
+    if b"EICAR" in file.read():
+        raise ValidationError("Virus detected.")
+
+
+class AttachmentPipelineTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        membership_type = MembershipType.objects.create(key="single", name="Single", annual_limit=250000)
+        self.user = User.objects.create_user(username="claimant", password="password")
+        member = Member.objects.create(
+            user=self.user,
+            membership_type=membership_type,
+            status="active",
+            valid_to=timezone.now().date() + timedelta(days=365),
+        )
+        self.claim = Claim.objects.create(member=member, claim_type="outpatient")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _upload(self, name, data, content_type="application/octet-stream"):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/claim-attachments/",
+                {"claim": str(self.claim.pk), "file": SimpleUploadedFile(name, data, content_type)},
+                format="multipart",
+            )
+        return response
+
+    def test_image_is_staged_then_published_with_a_thumbnail(self):
+        response = self._upload("receipt.png", png(), "image/png")
+        self.assertEqual(response.status_code, 201, response.content)
+        # The request itself only staged the upload
+        self.assertEqual(response.data["status"], "pending")
+
+        attachment = ClaimAttachment.objects.get(pk=response.data["id"])
+        self.assertEqual(attachment.status, "ready")
+        self.assertEqual(attachment.content_type, "image/png")
+        self.assertTrue(attachment.file.name.startswith("claim_attachments/receipt"))
+        self.assertNotIn("staging", attachment.file.name)
+        self.assertTrue(attachment.file.storage.exists(attachment.file.name))
+        with Image.open(attachment.thumbnail.open("rb")) as thumb:
+            self.assertLessEqual(max(thumb.size), 320)
+
+    def test_mismatched_content_is_rejected_and_removed(self):
+        response = self._upload("receipt.png", PDF)
+        attachment = ClaimAttachment.objects.get(pk=response.data["id"])
+        self.assertEqual(attachment.status, "rejected")
+        self.assertIn("doesn't match", attachment.error)
+        self.assertEqual(attachment.file.name, "")
+        self.assertTrue(AuditLog.objects.filter(claim=self.claim, action="attachment:REJECTED").exists())
+        self.assertTrue(Notification.objects.filter(recipient=self.user, title="Attachment rejected").exists())
+
+    def test_bad_extension_fails_in_the_request(self):
+        response = self._upload("script.exe", b"MZ")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ClaimAttachment.objects.exists())
+
+    def test_summary_pdf_goes_through_the_pipeline(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/claims/{self.claim.pk}/upload_summary/",
+                {"file": SimpleUploadedFile("claim_summary.pdf", PDF, "application/pdf")},
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, 201)
+        attachment = ClaimAttachment.objects.get(pk=response.data["id"])
+        self.assertEqual((attachment.status, attachment.page_count), ("ready", 2))
+
+    @override_settings(ATTACHMENT_VIRUS_SCANNER="medical.tests.test_attachments.infected")
+    def test_virus_scan_hook(self):
+        response = self._upload("summary.pdf", PDF + b"EICAR")
+        attachment = ClaimAttachment.objects.get(pk=response.data["id"])
+        self.assertEqual((attachment.status, attachment.error), ("rejected", "Virus detected."))
+
+    def test_sweeper_recovers_attachments_whose_worker_died(self):
+        with mock.patch("medical.services.attachments.dispatch"):
+            stuck = self._upload("receipt.png", png(), "image/png").data["id"]
+            busy = self._upload("other.png", png(), "image/png").data["id"]
+        ClaimAttachment.objects.filter(pk__in=[stuck, busy]).update(
+            status="processing", uploaded_at=timezone.now() - timedelta(hours=2)
+        )
+        ClaimAttachment.objects.filter(pk=stuck).update(last_attempt_at=timezone.now() - timedelta(hours=1))
+        ClaimAttachment.objects.filter(pk=busy).update(last_attempt_at=timezone.now())
+        # A redelivered task finds the row claimed and leaves it to the sweeper
+        self.assertIsNone(process_attachment.delay(stuck).get())
+
+        self.assertEqual(process_pending_attachments(), 1)
+        statuses = dict(ClaimAttachment.objects.values_list("pk", "status"))
+        self.assertEqual((statuses[uuid.UUID(stuck)], statuses[uuid.UUID(busy)]), ("ready", "processing"))
+
+    def test_failed_save_leaves_no_published_files(self):
+        with mock.patch("medical.services.attachments.dispatch"):
+            response = self._upload("receipt.png", png(), "image/png")
+        attachment = ClaimAttachment.objects.get(pk=response.data["id"])
+        with mock.patch.object(ClaimAttachment, "save", side_effect=RuntimeError), \
+                self.assertRaises(RuntimeError):
+            process(attachment)
+        files = sorted(str(p.relative_to(self.media)) for p in Path(self.media).rglob("*") if p.is_file())
+        self.assertEqual(len(files), 1)
+        self.assertIn("staging", files[0])
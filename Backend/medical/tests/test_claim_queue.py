@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from medical.models import Claim, ClaimItem, ClaimQueueEntry, Member, MembershipType
+
+User = get_user_model()
+
+
+class CommitteeQueueTests(TestCase):
+    def setUp(self):
+        self.committee = User.objects.create_user(username="chair", password="password")
+        Group.objects.create(name="Committee").user_set.add(self.committee)
+        self.client = APIClient()
+        self.client.force_authenticate(self.committee)
+
+        self.membership_type = MembershipType.objects.create(key="single", name="Single")
+        self.user = User.objects.create_user(username="jdoe", first_name="Jane", last_name="Doe")
+        self.member = Member.objects.create(user=self.user, membership_type=self.membership_type, status="active")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.claim = Claim.objects.create(
+                member=self.member, claim_type="outpatient", status="submitted",
+                shif_number="SHA-77",
+            )
+
+    def _queue(self, query=""):
+        response = self.client.get(f"/api/committee/claims/{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+    def test_queue_row_matches_claim(self):
+        [row] = self._queue()
+        self.assertEqual(row["id"], str(self.claim.id))
+        self.assertEqual(row["member_name"], "Jane Doe")
+        self.assertEqual(row["membership_type"], "Single")
+        self.claim.refresh_from_db()
+        self.assertEqual(row["total_payable"], str(self.claim.total_payable))
+        self.assertEqual(row["created_at"], self.claim.created_at)
+
+    def test_search_and_filters(self):
+        self.assertEqual(len(self._queue("?q=jane")), 1)
+        self.assertEqual(len(self._queue("?q=sha-77")), 1)
+        self.assertEqual(len(self._queue("?q=nobody")), 0)
+        self.assertEqual(len(self._queue("?status=submitted&type=outpatient")), 1)
+        self.assertEqual(len(self._queue("?status=paid")), 0)
+
+    def test_list_reads_only_the_queue_table(self):
+        with self.assertNumQueries(2):  # committee check + one page of queue rows
+            self._queue("?q=doe&status=submitted")
+
+    def test_refreshed_on_claim_member_user_and_type_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.claim.status = "reviewed"
+            self.claim.save()
+            ClaimItem.objects.create(claim=self.claim, amount=500, quantity=1)
+        entry = ClaimQueueEntry.objects.get(pk=self.claim.pk)
+        self.assertEqual(entry.status, "reviewed")
+        self.assertEqual(str(entry.total_claimed), "500.00")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.last_name = "Smith"
+            self.user.save()
+            self.member.status = "suspended"
+            self.member.save()
+            self.membership_type.name = "Single (legacy)"
+            self.membership_type.save()
+        entry.refresh_from_db()
+        self.assertEqual(entry.member_name, "Jane Smith")
+        self.assertEqual(entry.member_status, "suspended")
+        self.assertEqual(entry.membership_type, "Single (legacy)")
+        self.assertIn("smith", entry.search_text)
+
+        self.claim.delete()
+        self.assertFalse(ClaimQueueEntry.objects.exists())
+
+    def test_rebuild_command(self):
+        ClaimQueueEntry.objects.all().delete()
+        call_command("rebuild_claim_queue", stdout=StringIO())
+        self.assertEqual(len(self._queue()), 1)
@@ -1,4 +1,25 @@
 # Backend/medical/tests/test_claims.py
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from medical.models import (
+    Member, MembershipType, Claim, ClaimItem, ClaimReview, ReimbursementScale, Setting, MemberBenefitUsage,
+    NotificationCounter,
+)
+from medical.services.notifications import committee_recipients
+from medical.services.roles import user_groups
+
+User = get_user_model()
+
+
 def test_claim_creation_with_valid_data():
     """Test claim can be created with valid data"""
     pass
@@ -10,4 +31,149 @@ def test_claim_approval_permission():
     pass
 def test_claim_status_transitions():
     """Test valid status transitions"""
-    pass
\ No newline at end of file
+    pass
+
+
+class ClaimCreateRecomputeTests(TestCase):
+    """Creating a claim must compute it once and write it once."""
+
+    # Full POST /api/claims/ round trip, including response serialization
+    # (the committee and claimant notifications each bump unread counters)
+    CLAIM_CREATE_QUERIES = 34
+
+    def setUp(self):
+        cache.clear()
+        self.membership_type = MembershipType.objects.create(
+            key="single", name="Single", annual_limit=250000, fund_share_percent=80
+        )
+        self.user = User.objects.create_user(username="claimant", email="claimant@example.com", password="password")
+        self.member = Member.objects.create(
+            user=self.user,
+            membership_type=self.membership_type,
+            status="active",
+            valid_from=timezone.now().date() - timedelta(days=90),
+            valid_to=timezone.now().date() + timedelta(days=365),
+            benefits_from=timezone.now().date() - timedelta(days=1),
+        )
+        committee = Group.objects.create(name="Committee")
+        for i in range(3):
+            User.objects.create_user(username=f"committee{i}", password="password").groups.add(committee)
+        ReimbursementScale.objects.create(category="Outpatient", fund_share=80, member_share=20, ceiling=50000)
+        Setting.objects.create(key="general_limits", value={"annual_limit": 250000, "fund_share_percent": 80})
+        committee_recipients()  # warm the shared recipient cache
+        Setting.get("general_limits"), ReimbursementScale.for_category("outpatient")  # and the config cache
+        user_groups(self.user)  # and the role cache
+        # The member's ledger row for the year already exists after their first claim
+        MemberBenefitUsage.objects.create(member=self.member, year=timezone.localdate().year)
+        # ... as do everyone's unread counters after their first notification
+        NotificationCounter.objects.bulk_create(NotificationCounter(user=u) for u in User.objects.all())
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.payload = {
+            "claim_type": "outpatient",
+            "status": "submitted",
+            "details": {
+                "date_of_first_visit": timezone.now().date().isoformat(),
+                "consultation_fee": 2000,
+                "medicine_cost": 3000,
+            },
+        }
+
+    def _post(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/api/claims/", self.payload, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response, ctx.captured_queries
+
+    def test_claim_create_computes_once(self):
+        response, queries = self._post()
+        claim = Claim.objects.get(pk=response.data["id"])
+        self.assertEqual(claim.total_claimed, 5000)
+        self.assertEqual(claim.total_payable, 4000)
+        self.assertEqual(claim.member_payable, 1000)
+
+        claim_updates = [q["sql"] for q in queries if q["sql"].startswith('UPDATE "medical_claim"')]
+        self.assertEqual(len(claim_updates), 1, claim_updates)
+        config_reads = [
+            q["sql"] for q in queries
+            if 'FROM "medical_reimbursementscale"' in q["sql"] or 'FROM "medical_setting"' in q["sql"]
+        ]
+        self.assertEqual(config_reads, [])
+
+    def test_claim_create_query_count_is_fixed(self):
+        for i in range(2):
+            # A different amount each time, or the second post is a duplicate
+            self.payload["details"]["medicine_cost"] = 3000 + 1000 * i
+            _, queries = self._post()
+            self.assertEqual(len(queries), self.CLAIM_CREATE_QUERIES, "\n".join(q["sql"] for q in queries))
+
+    def test_item_changes_recompute_claim(self):
+        response, _ = self._post()
+        claim = Claim.objects.get(pk=response.data["id"])
+        item = ClaimItem.objects.create(claim=claim, category="consultation", amount=1000, quantity=3)
+        claim.refresh_from_db()
+        self.assertEqual(claim.total_claimed, 3000)
+        self.assertEqual(claim.total_payable, 2400)
+
+        item.delete()
+        claim.refresh_from_db()
+        # No items left -> falls back to the structured details
+        self.assertEqual(claim.total_claimed, 5000)
+
+
+class ClaimListQueryTests(TestCase):
+    """A page of claims costs a fixed number of queries, however many rows it has."""
+
+    # COUNT + page (+ one per expanded relation); roles come from the cache
+    LIST_QUERIES = 2
+
+    def setUp(self):
+        membership_type = MembershipType.objects.create(key="single", name="Single", annual_limit=250000)
+        self.committee = User.objects.create_user(username="chair", password="password")
+        Group.objects.create(name="Committee").user_set.add(self.committee)
+        reviewers = [User.objects.create_user(username=f"reviewer{i}") for i in range(3)]
+        for reviewer in reviewers:
+            reviewer.groups.add(Group.objects.get(name="Committee"))
+
+        claims = []
+        for i in range(50):
+            member = Member.objects.create(
+                user=User.objects.create_user(username=f"member{i}", email=f"m{i}@example.com"),
+                membership_type=membership_type,
+                status="active",
+                valid_to=timezone.now().date() + timedelta(days=365),
+            )
+            claims.append(Claim(member=member, claim_type="outpatient", status="submitted"))
+        Claim.objects.bulk_create(claims)
+        ClaimItem.objects.bulk_create(
+            ClaimItem(claim=claim, category="consultation", amount=500, quantity=1) for claim in claims
+        )
+        ClaimReview.objects.bulk_create(
+            ClaimReview(claim=claim, reviewer=reviewers[i % 3], action="reviewed", note="ok")
+            for i, claim in enumerate(claims)
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.committee)
+        # Role lookups are cached across requests; warm them once
+        self.client.get("/api/claims/?expand=all")
+
+    def test_list_is_light_by_default(self):
+        with self.assertNumQueries(self.LIST_QUERIES):
+            response = self.client.get("/api/claims/")
+        self.assertEqual(len(response.data["results"]), 50)
+        self.assertNotIn("reviews", response.data["results"][0])
+        self.assertIn("member_user_email", response.data["results"][0])
+
+    def test_expanded_page_prefetches_nested_data(self):
+        with self.assertNumQueries(self.LIST_QUERIES + 2):
+            response = self.client.get("/api/claims/?expand=reviews,items")
+        row = response.data["results"][0]
+        self.assertEqual(len(row["items"]), 1)
+        self.assertTrue(row["reviews"][0]["reviewer"]["username"].startswith("reviewer"))
+        self.assertEqual(row["reviews"][0]["role"], "Member")  # first group, from the role cache
+        self.assertNotIn("attachments", row)
+
+        with self.assertNumQueries(self.LIST_QUERIES + 3):
+            self.client.get("/api/claims/?expand=all")
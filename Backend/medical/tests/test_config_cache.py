@@ -0,0 +1,70 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from medical.models import ReimbursementScale, Setting
+from medical.services import config_cache
+
+
+@override_settings(CACHE_SHARED=True)
+class ConfigCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Setting.objects.create(key="general_limits", value={"annual_limit": 250000})
+        ReimbursementScale.objects.create(category="Outpatient", fund_share=80, member_share=20, ceiling=50000)
+
+    def test_warm_reads_are_query_free(self):
+        Setting.get("general_limits")
+        ReimbursementScale.for_category("outpatient")
+        with self.assertNumQueries(0):
+            self.assertEqual(Setting.get("general_limits")["annual_limit"], 250000)
+            self.assertEqual(Setting.get("missing", {"x": 1}), {"x": 1})
+            self.assertEqual(ReimbursementScale.for_category("OUTPATIENT").fund_share, 80)
+            self.assertIsNone(ReimbursementScale.for_category("dental"))
+
+    def test_save_and_delete_invalidate(self):
+        self.assertEqual(Setting.get("general_limits")["annual_limit"], 250000)
+        Setting.objects.update_or_create(
+            key="general_limits", defaults={"value": {"annual_limit": 300000}}
+        )
+        self.assertEqual(Setting.get("general_limits")["annual_limit"], 300000)
+
+        scale = ReimbursementScale.for_category("outpatient")
+        ReimbursementScale.objects.get(pk=scale.pk).delete()
+        self.assertIsNone(ReimbursementScale.for_category("outpatient"))
+
+    def test_setting_values_are_copies(self):
+        Setting.get("general_limits")["annual_limit"] = 1
+        self.assertEqual(Setting.get("general_limits")["annual_limit"], 250000)
+
+
+@override_settings(CACHE_SHARED=False)
+class ConfigTableVersionTests(TestCase):
+    """Without a shared cache, each process finds changes from the tables."""
+
+    def setUp(self):
+        cache.clear()
+        Setting.objects.create(key="general_limits", value={"annual_limit": 250000})
+
+    def _later(self):
+        return mock.patch(
+            "medical.services.config_cache.time.monotonic",
+            return_value=time.monotonic() + config_cache.VERSION_CHECK_INTERVAL + 1,
+        )
+
+    def test_change_saved_by_another_process_is_picked_up(self):
+        self.assertEqual(Setting.get("general_limits")["annual_limit"], 250000)
+        with self.assertNumQueries(0):
+            Setting.get("general_limits")
+
+        # Another worker's save: its signal never reaches this process
+        Setting.objects.filter(key="general_limits").update(
+            value={"annual_limit": 300000}, updated_at=timezone.now()
+        )
+        self.assertEqual(Setting.get("general_limits")["annual_limit"], 250000)
+        with self._later():
+            self.assertEqual(Setting.get("general_limits")["annual_limit"], 300000)
+        self.assertIsNone(cache.get(config_cache.VERSION_KEY))
@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from medical.models import ChronicRequest, Claim, DashboardCounter, Member, MembershipType
+from medical.services.dashboard_stats import admin_summary, committee_summary
+
+User = get_user_model()
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.membership_type = MembershipType.objects.create(key="single", name="Single")
+        self.member = Member.objects.create(
+            user=User.objects.create_user(username="owner"), membership_type=self.membership_type, status="active"
+        )
+
+    def _claim(self, status="submitted", total=1000):
+        with self.captureOnCommitCallbacks(execute=True):
+            claim = Claim.objects.create(
+                member=self.member, claim_type="outpatient", status=status,
+                details={"consultation_fee": total},
+            )
+            claim.recalc_total()
+            claim.save()
+        return claim
+
+    def _counters(self):
+        return set(DashboardCounter.objects.exclude(count=0, amount=0).values_list("day", "metric", "count", "amount"))
+
+    def test_incremental_counters_match_rebuild(self):
+        claims = [self._claim() for _ in range(3)]
+        self._claim(status="reviewed")
+        with self.captureOnCommitCallbacks(execute=True):
+            claims[0].status = "approved"
+            claims[0].save()
+            claims[1].status = "paid"
+            claims[1].save()
+        claims[2].delete()
+        ChronicRequest.objects.create(member=self.member, doctor_name="Dr A", total_amount=500)
+
+        incremental = self._counters()
+        call_command("rebuild_dashboard_stats", stdout=StringIO())
+        self.assertEqual(self._counters(), incremental)
+
+    def test_summaries(self):
+        self._claim()
+        self._claim(status="reviewed")
+        paid = self._claim()
+        with self.captureOnCommitCallbacks(execute=True):
+            paid.status = "paid"
+            paid.save()
+
+        self.assertEqual(committee_summary(), {"pending_total": 1, "today_new": 3, "reviewed_total": 1})
+
+        summary = admin_summary(timezone.localdate().year)
+        self.assertEqual(summary["total_members"], 1)
+        self.assertEqual(summary["total_claims"], 3)
+        self.assertEqual(summary["status_counts"], {"submitted": 1, "reviewed": 1, "paid": 1})
+        self.assertEqual(summary["total_payable_pending"], 1600.0)
+        self.assertEqual(summary["total_paid_out"], 800.0)
+        self.assertEqual(summary["monthly"][0]["claims"], 3)
+
+    def test_dashboard_views_are_cached(self):
+        admin = User.objects.create_user(username="root")
+        Group.objects.create(name="Admin").user_set.add(admin)
+        client = APIClient()
+        client.force_authenticate(admin)
+        self._claim()
+
+        response = client.get("/api/dashboard/admin/summary/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_claims"], 1)
+        with self.assertNumQueries(0):  # roles and counters both cached
+            client.get("/api/dashboard/admin/summary/")
@@ -0,0 +1,139 @@
+import base64
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import urlparse
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from medical.models import Claim, ClaimAttachment, DataAccessLog, Member, MembershipType
+from medical.services import direct_uploads
+from medical.tests.test_attachments import PDF
+from medical.validators import MAX_UPLOAD_SIZE
+
+User = get_user_model()
+
+
+class DirectUploadTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        membership_type = MembershipType.objects.create(key="single", name="Single", annual_limit=250000)
+        self.user = User.objects.create_user(username="claimant", password="password")
+        member = Member.objects.create(
+            user=self.user,
+            membership_type=membership_type,
+            status="active",
+            valid_to=timezone.now().date() + timedelta(days=365),
+        )
+        self.claim = Claim.objects.create(member=member, claim_type="outpatient")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _ticket(self, **overrides):
+        payload = {"claim": str(self.claim.pk), "filename": "summary.pdf",
+                   "content_type": "application/pdf", "size": len(PDF), **overrides}
+        return self.client.post("/api/claim-attachments/upload_url/", payload, format="json")
+
+    def _put(self, ticket, data=PDF):
+        # The upload goes straight to "storage": no API session involved
+        return APIClient().generic(
+            "PUT", urlparse(ticket["upload_url"]).path, data, content_type=ticket["headers"]["Content-Type"]
+        )
+
+    def test_upload_confirm_and_download(self):
+        ticket = self._ticket().data
+        self.assertEqual(ticket["method"], "PUT")
+        self.assertEqual(self._put(ticket).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/claim-attachments/confirm/", {"token": ticket["token"]}, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.data["status"], "pending")
+
+        # Confirming twice is harmless
+        again = self.client.post("/api/claim-attachments/confirm/", {"token": ticket["token"]}, format="json")
+        self.assertEqual((again.status_code, again.data["id"]), (200, response.data["id"]))
+        self.assertEqual(ClaimAttachment.objects.count(), 1)
+        # ...but the file can't be replaced behind the pipeline's back
+        self.assertEqual(self._put(ticket, b"replaced").status_code, 409)
+
+        # The pipeline checked and published it
+        attachment = ClaimAttachment.objects.get(pk=response.data["id"])
+        self.assertEqual((attachment.status, attachment.page_count), ("ready", 2))
+        self.assertNotIn("staging", attachment.file.name)
+
+        committee = User.objects.create_user(username="chair", password="password")
+        Group.objects.create(name="Committee").user_set.add(committee)
+        client = APIClient()
+        client.force_authenticate(committee)
+        link = client.get(f"/api/claim-attachments/{attachment.pk}/download_url/")
+        self.assertEqual(link.status_code, 200)
+        self.assertTrue(DataAccessLog.objects.filter(user=committee, attachment=attachment).exists())
+
+        download = APIClient().get(urlparse(link.data["url"]).path)
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(b"".join(download.streaming_content), PDF)
+
+    def test_local_upload_streams_files_past_the_request_body_limit(self):
+        # Bigger than DATA_UPLOAD_MAX_MEMORY_SIZE (2.5MB), within MAX_UPLOAD_SIZE (5MB)
+        data = PDF + b"\0" * (3 * 1024 * 1024)
+        ticket = self._ticket(size=len(data)).data
+        self.assertEqual(self._put(ticket, data).status_code, 200)
+        with default_storage.open(direct_uploads.read_ticket(ticket["token"])["key"], "rb") as f:
+            self.assertEqual(f.read(), data)
+
+        ticket = self._ticket().data
+        self.assertEqual(self._put(ticket, b"\0" * (5 * 1024 * 1024 + 1)).status_code, 413)
+        self.assertFalse(default_storage.exists(direct_uploads.read_ticket(ticket["token"])["key"]))
+
+    def test_declared_file_is_checked_before_issuing_a_url(self):
+        self.assertEqual(self._ticket(filename="tool.exe").status_code, 400)
+        self.assertEqual(self._ticket(size=50 * 1024 * 1024).status_code, 400)
+
+        other = User.objects.create_user(username="other", password="password")
+        self.client.force_authenticate(other)
+        self.assertEqual(self._ticket().status_code, 403)
+
+    def test_bad_or_expired_tokens(self):
+        ticket = self._ticket().data
+        response = self.client.post("/api/claim-attachments/confirm/", {"token": ticket["token"]}, format="json")
+        self.assertEqual(response.status_code, 400)  # nothing uploaded yet
+
+        tampered = dict(ticket, upload_url=ticket["upload_url"].replace(ticket["token"], ticket["token"] + "x"))
+        self.assertEqual(self._put(tampered).status_code, 403)
+
+        with mock.patch.object(direct_uploads, "UPLOAD_TTL", -1):
+            self.assertEqual(self._put(ticket).status_code, 403)
+        self.assertFalse(default_storage.exists(direct_uploads.read_ticket(ticket["token"])["key"]))
+
+    def test_presigned_s3_urls(self):
+        from storages.backends.s3 import S3Storage
+
+        storage = S3Storage(
+            access_key="test", secret_key="test", bucket_name="claims",
+            endpoint_url="http://minio.local:9000", region_name="us-east-1", signature_version="s3v4",
+        )
+        with mock.patch.object(direct_uploads, "default_storage", storage):
+            ticket = direct_uploads.upload_ticket(self.claim, self.user, "summary.pdf", "application/pdf", 100)
+            url = direct_uploads.download_url(ClaimAttachment(file="claim_attachments/summary.pdf"))
+
+        self.assertEqual((ticket["method"], ticket["upload_url"]), ("POST", "http://minio.local:9000/claims"))
+        fields = ticket["fields"]
+        self.assertTrue(fields["key"].startswith("claim_attachments/staging/"))
+        self.assertIn("x-amz-signature", fields)
+        policy = json.loads(base64.b64decode(fields["policy"]))
+        self.assertIn(["content-length-range", 1, MAX_UPLOAD_SIZE], policy["conditions"])
+        self.assertIn({"Content-Type": "application/pdf"}, policy["conditions"])
+        self.assertIn(f"X-Amz-Expires={direct_uploads.DOWNLOAD_TTL}", url)
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from medical.models import Claim, ClaimDuplicateKey, Member, MembershipType
+from medical.services import duplicates
+
+User = get_user_model()
+
+
+class DuplicateDetectionTests(TestCase):
+    def setUp(self):
+        self.membership_type = MembershipType.objects.create(
+            key='single', name='Single', annual_limit=1000000, fund_share_percent=80
+        )
+        self.member = self._member('first')
+        self.other_member = self._member('second')
+        self.today = timezone.now().date()
+
+    def _member(self, username):
+        return Member.objects.create(
+            user=User.objects.create_user(username=username, password='password'),
+            membership_type=self.membership_type,
+            status='active',
+            valid_to=timezone.now().date() + timedelta(days=365),
+            benefits_from=timezone.now().date() - timedelta(days=60),
+        )
+
+    def _claim(self, member=None, status='submitted', days_ago=0, **details):
+        with self.captureOnCommitCallbacks(execute=True):
+            claim = Claim.objects.create(
+                member=member or self.member,
+                claim_type='outpatient',
+                status=status,
+                date_of_first_visit=self.today - timedelta(days=days_ago),
+                details={'consultation_fee': 2000, **details},
+            )
+            claim.recalc_total()
+        return claim
+
+    def test_keys_follow_claims_after_commit(self):
+        claim = self._claim(receipt_number=' inv-00123 ', hospital_name='The Nairobi Hospital Ltd.')
+        key = ClaimDuplicateKey.objects.get(claim=claim)
+        self.assertEqual(key.receipt_number, 'INV00123')
+        self.assertEqual(key.provider, 'nairobi')
+        self.assertEqual(key.amount, 2000)  # the final total, not the pre-save 0
+        self.assertEqual(key.service_date, self.today)
+
+    def test_find_near_duplicates(self):
+        original = self._claim(receipt_number='INV-123')
+        same_receipt = self._claim(member=self.other_member, receipt_number='inv 123', consultation_fee=999)
+        close_visit = self._claim(days_ago=3)
+        self._claim(days_ago=20)                           # outside the date window
+        self._claim(status='draft', receipt_number='INV123')  # drafts don't count
+
+        matches = {m['claim_id']: m['reasons'] for m in duplicates.find(original)}
+        self.assertEqual(matches, {
+            str(same_receipt.pk): ['receipt'],
+            str(close_visit.pk): ['amount_date'],
+        })
+
+        committee = User.objects.create_user(username='chair', password='password')
+        Group.objects.create(name='Committee').user_set.add(committee)
+        client = APIClient()
+        client.force_authenticate(committee)
+        response = client.get(f'/api/claims/{original.pk}/duplicates/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_scan_reports_every_pair_once(self):
+        a = self._claim(receipt_number='INV-123')
+        b = self._claim(days_ago=2, receipt_number='INV-123')  # both reasons
+        c = self._claim(member=self.other_member, receipt_number='INV-123', consultation_fee=50)
+        self._claim(member=self.other_member, days_ago=30)
+
+        pairs = {tuple(p['claims']): p['reasons'] for p in duplicates.scan()}
+        ab, ac, bc = (tuple(sorted((str(x.pk), str(y.pk)))) for x, y in ((a, b), (a, c), (b, c)))
+        self.assertEqual(pairs, {ab: ['amount_date', 'receipt'], ac: ['receipt'], bc: ['receipt']})
+
+    def test_rebuild_and_scan_commands(self):
+        self._claim(receipt_number='INV-123')
+        self._claim(member=self.other_member, receipt_number='INV-123')
+        ClaimDuplicateKey.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_duplicate_index', stdout=out)
+        self.assertIn('2 claims', out.getvalue())
+        out = StringIO()
+        call_command('scan_duplicates', '--days', '3', stdout=out)
+        self.assertIn('1 suspected duplicate pairs', out.getvalue())
+
+    def test_exact_resubmission_is_blocked(self):
+        client = APIClient()
+        client.force_authenticate(self.member.user)
+        payload = {
+            'claim_type': 'outpatient',
+            'status': 'submitted',
+            'details': {
+                'date_of_first_visit': self.today.isoformat(),
+                'consultation_fee': 2000,
+                'receipt_number': 'R-1',
+            },
+        }
+        self.assertEqual(client.post('/api/claims/', payload, format='json').status_code, 201)
+        response = client.post('/api/claims/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('already exists', str(response.data))
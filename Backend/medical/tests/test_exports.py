@@ -0,0 +1,65 @@
+import csv
+import io
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from medical.models import Claim, Member, MembershipType
+
+User = get_user_model()
+
+
+class ClaimExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="exporter", password="password")
+        Group.objects.create(name="Committee").user_set.add(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        membership_type = MembershipType.objects.create(key="single", name="Single")
+        for i in range(3):
+            owner = User.objects.create_user(username=f"owner{i}", first_name="Owner", last_name=str(i))
+            member = Member.objects.create(user=owner, membership_type=membership_type, status="active")
+            Claim.objects.create(
+                member=member,
+                claim_type="outpatient" if i else "inpatient",
+                status="approved" if i < 2 else "submitted",
+            )
+        old = Claim.objects.get(claim_type="inpatient")
+        Claim.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+
+    def _csv(self, query=""):
+        response = self.client.get(f"/api/reports/export/{query}")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+
+    def test_csv_streams_all_claims_with_members(self):
+        rows = self._csv()
+        self.assertEqual(rows[0][:2], ["ID", "Member"])
+        self.assertEqual(sorted(r[1] for r in rows[1:]), ["Owner 0", "Owner 1", "Owner 2"])
+
+    def test_filters(self):
+        self.assertEqual(len(self._csv("?status=approved")), 3)
+        self.assertEqual(len(self._csv("?status=approved&type=outpatient")), 2)
+        since = (timezone.localdate() - timedelta(days=7)).isoformat()
+        self.assertEqual(len(self._csv(f"?date_from={since}")), 3)
+        response = self.client.get("/api/reports/export/?date_to=yesterday")
+        self.assertEqual(response.status_code, 400)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with self.assertNumQueries(2):  # committee check + one joined export query
+            self._csv()
+
+    def test_xlsx(self):
+        response = self.client.get("/api/reports/export/?export_format=xlsx")
+        self.assertEqual(response.status_code, 200)
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        sheet = workbook["Claims"]
+        self.assertEqual(sheet.max_row, 4)
+        self.assertEqual(sheet["B1"].value, "Member")
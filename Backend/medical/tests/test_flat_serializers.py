@@ -0,0 +1,106 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.request import Request
+
+from medical.models import Claim, DataAccessLog, Member, MemberDependent, MembershipType, Notification
+from medical.serializers import (
+    ClaimFlatSerializer, ClaimListSerializer, DataAccessLogFlatSerializer, DataAccessLogSerializer,
+    MemberFlatSerializer, MemberSerializer, NotificationFlatSerializer, NotificationSerializer,
+)
+from medical.services.flat import FlatSerializer
+
+User = get_user_model()
+
+
+class FlatSerializerTests(TestCase):
+    """Flat list rows must be identical to what the DRF serializers produce."""
+
+    def setUp(self):
+        membership_type = MembershipType.objects.create(key="single", name="Single", annual_limit=250000)
+        self.owner = User.objects.create_user(
+            username="owner", first_name="Jane", last_name="Wanjiru", email="jane@example.com"
+        )
+        self.member = Member.objects.create(
+            user=self.owner, membership_type=membership_type, status="active",
+            valid_to=timezone.now().date() + timedelta(days=365),
+        )
+        MemberDependent.objects.create(member=self.member, full_name="Baby", relationship="child",
+                                       date_of_birth=date(2020, 1, 1))
+        Member.objects.create(user=User.objects.create_user(username="nobody"), status="pending")
+
+        self.claim = Claim.objects.create(
+            member=self.member, claim_type="outpatient", status="submitted", notes="Malaria",
+            details={"diagnosis": "Malaria", "consultation_fee": 2000}, total_claimed=2000,
+        )
+        self.committee = User.objects.create_user(username="chair")
+        Group.objects.create(name="Committee").user_set.add(self.committee)
+
+        Notification.objects.create(recipient=self.owner, title="Hello", message="m", metadata={"a": 1})
+        DataAccessLog.objects.create(user=self.committee, claim=self.claim, reason="Review")
+        DataAccessLog.objects.create(user=None, claim=self.claim, reason="Deleted user")
+
+    def _context(self, user):
+        request = Request(APIRequestFactory().get("/"))
+        request.user = user
+        return {"request": request}
+
+    def _assert_same(self, queryset, drf_class, flat_class, user):
+        context = self._context(user)
+        expected = drf_class(queryset, many=True, context=context).data
+        flat = flat_class(context=context)
+        actual = flat.many(flat.values(queryset))
+        self.assertEqual(actual, [dict(row) for row in expected])
+        self.assertEqual([list(row) for row in actual], [list(row) for row in expected])  # key order
+        return actual
+
+    def test_claims_match_including_pii_redaction(self):
+        qs = Claim.objects.select_related("member__user")
+        rows = self._assert_same(qs, ClaimListSerializer, ClaimFlatSerializer, self.committee)
+        self.assertEqual(rows[0]["notes"], "[REDACTED - MEDICAL PRIVACY]")
+        self.assertEqual(rows[0]["details"]["diagnosis"], "[REDACTED]")
+
+        rows = self._assert_same(qs, ClaimListSerializer, ClaimFlatSerializer, self.owner)
+        self.assertEqual(rows[0]["notes"], "Malaria")
+
+    def test_members_notifications_and_access_logs_match(self):
+        members = self._assert_same(
+            Member.objects.order_by("user__username"), MemberSerializer, MemberFlatSerializer, self.committee
+        )
+        self.assertEqual(members[1]["dependants"][0]["full_name"], "Baby")
+        self._assert_same(Notification.objects.all(), NotificationSerializer, NotificationFlatSerializer,
+                          self.owner)
+        self._assert_same(DataAccessLog.objects.all(), DataAccessLogSerializer, DataAccessLogFlatSerializer,
+                          self.committee)
+
+    def test_unsupported_fields_must_be_handled(self):
+        class Incomplete(FlatSerializer):
+            serializer_class = MemberSerializer
+
+        with self.assertRaises(ImproperlyConfigured):
+            Incomplete.compiled()
+
+    def test_list_endpoints_use_one_query_per_page(self):
+        client = APIClient()
+        client.force_authenticate(self.committee)
+        client.get("/api/members/")  # warm the role cache
+        # COUNT + page (+ dependants of the page)
+        with self.assertNumQueries(3):
+            response = client.get("/api/members/")
+        self.assertEqual(response.data["count"], 2)
+        with self.assertNumQueries(2):
+            response = client.get("/api/data-access-logs/")
+        self.assertEqual(response.data["results"][0]["reason"], "Deleted user")
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_serializers", "--rows", "5", "10", "--repeat", "1", stdout=out)
+        self.assertIn("MemberViewSet.list", out.getvalue())
+        self.assertEqual(Member.objects.count(), 2)  # seeded rows rolled back
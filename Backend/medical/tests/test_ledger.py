@@ -0,0 +1,151 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from medical.models import Member, MembershipType, Claim, MemberBenefitUsage, ReimbursementScale
+from medical.services.ledger import resync, usage_for
+from medical.services.rules import enforce_annual_limit
+
+User = get_user_model()
+
+
+class BenefitLedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ledgeruser', password='password')
+        self.membership_type = MembershipType.objects.create(
+            key='single', name='Single', annual_limit=250000, fund_share_percent=80
+        )
+        self.member = Member.objects.create(
+            user=self.user,
+            membership_type=self.membership_type,
+            status='active',
+            valid_to=timezone.now().date() + timedelta(days=365),
+            benefits_from=timezone.now().date() - timedelta(days=60)
+        )
+        ReimbursementScale.objects.create(category='Inpatient', fund_share=80, member_share=20, ceiling=500000)
+        self.year = timezone.localdate().year
+
+    def _claim(self, total, status='submitted', **details):
+        return Claim.objects.create(
+            member=self.member,
+            claim_type='inpatient',
+            status=status,
+            details={'inpatient_total': total, **details},
+        )
+
+    def _usage(self):
+        return usage_for(self.member.id, self.year)
+
+    def test_status_transitions_move_amount_between_buckets(self):
+        claim = self._claim(10000)
+        claim.recalc_total()
+        claim.save()
+        usage = self._usage()
+        self.assertEqual(usage.pending_total, Decimal('8000'))
+        self.assertEqual(usage.used_total, 0)
+
+        claim.status = 'approved'
+        claim.save()
+        usage = self._usage()
+        self.assertEqual(usage.pending_total, 0)
+        self.assertEqual(usage.approved_total, Decimal('8000'))
+
+        claim.status = 'rejected'
+        claim.save()
+        usage = self._usage()
+        self.assertEqual(usage.committed_total, 0)
+
+    def test_critical_illness_topup(self):
+        claim = self._claim(300000, status='approved')
+        claim.recalc_total()
+        claim.save()
+        self.assertTrue(self._usage().critical_topup)
+
+        claim.status = 'rejected'
+        claim.save()
+        self.assertFalse(self._usage().critical_topup)
+
+    def test_deleting_a_claim_releases_its_usage(self):
+        kept = self._claim(1000)
+        kept.recalc_total()
+        kept.save()
+        claim = self._claim(10000)
+        claim.recalc_total()
+        claim.save()
+        critical = self._claim(300000, status='approved')
+        critical.recalc_total()
+        critical.save()
+        self.assertEqual(self._usage().pending_total, Decimal('8800'))
+
+        claim.delete()
+        critical.delete()
+        usage = self._usage()
+        self.assertEqual(usage.pending_total, Decimal('800'))
+        self.assertEqual((usage.approved_total, usage.critical_claims), (0, 0))
+
+    def test_payable_capped_by_ledger_usage(self):
+        self.membership_type.annual_limit = 10000
+        self.membership_type.save()
+        first = self._claim(10000, status='approved')
+        first.recalc_total()
+        first.save()
+        self.assertEqual(first.total_payable, Decimal('8000'))
+
+        second = self._claim(10000)
+        second.recalc_total()
+        second.save()
+        second.refresh_from_db()
+        self.assertEqual(second.total_payable, Decimal('2000'))
+
+    def test_enforce_annual_limit(self):
+        self.membership_type.annual_limit = 30000
+        self.membership_type.save()
+        previous = self._claim(25000, status='paid')
+        previous.recalc_total()
+        previous.save()
+
+        claim = self._claim(5000)
+        claim.recalc_total()
+        claim.save()
+        enforce_annual_limit(claim)  # 20k paid + 4k fits in 30k
+
+        claim.total_payable = 15000
+        with self.assertRaises(ValidationError):
+            enforce_annual_limit(claim)
+
+    def test_bulk_update_resync(self):
+        claims = [self._claim(1000) for _ in range(3)]
+        for c in claims:
+            c.recalc_total()
+            c.save()
+        ids = [c.pk for c in claims]
+        Claim.objects.filter(pk__in=ids).update(status='paid')
+        self.assertEqual(resync(ids), 3)
+        usage = self._usage()
+        self.assertEqual(usage.paid_total, Decimal('2400'))
+        self.assertEqual(usage.pending_total, 0)
+
+    def test_rebuild_command_matches_incremental(self):
+        for total, status in [(1000, 'submitted'), (5000, 'approved'), (250000, 'paid'), (700, 'rejected')]:
+            c = self._claim(total, status=status)
+            c.recalc_total()
+            c.save()
+        expected = self._usage()
+
+        MemberBenefitUsage.objects.all().delete()
+        Claim.objects.update(ledger_bucket=None, ledger_amount=0, ledger_critical=False)
+        call_command('rebuild_benefit_ledger', stdout=StringIO())
+
+        rebuilt = self._usage()
+        for field in ('pending_total', 'approved_total', 'paid_total', 'critical_claims'):
+            self.assertEqual(getattr(rebuilt, field), getattr(expected, field), field)
+        # Applied state restored, so a further save applies no double delta
+        paid = Claim.objects.get(status='paid')
+        paid.save()
+        self.assertEqual(self._usage().paid_total, expected.paid_total)
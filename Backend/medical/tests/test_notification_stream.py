@@ -0,0 +1,186 @@
+import asyncio
+import json
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from medical.models import Notification, NotificationCounter
+from medical.services import notification_stream, unread_counts
+from medical.services.notifications import notify_users
+from medical.services.unread_counts import unread_count
+
+User = get_user_model()
+
+
+def _event(chunk):
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+@override_settings(CACHE_SHARED=True)
+class UnreadCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="bell", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_count_is_cached_until_it_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_users([self.user, self.user], "Hello", "m")
+        self.assertEqual(unread_count(self.user.pk), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/notifications/unread-count/").data["unread"], 2)
+
+        notification = Notification.objects.filter(recipient=self.user).first()
+        self.client.post(f"/api/notifications/{notification.pk}/mark_read/")
+        self.assertEqual(self.client.get("/api/notifications/unread-count/").data["unread"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_users([self.user], "Again", "m")
+        self.assertEqual(self.client.get("/api/notifications/unread-count/").data["unread"], 2)
+        self.client.post("/api/notifications/mark-read/")
+        self.assertEqual(self.client.get("/api/notifications/unread-count/").data["unread"], 0)
+
+
+@override_settings(NOTIFICATION_STREAM_URL=None, NOTIFICATION_STREAM_LOCAL=True)
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="listener", password="password")
+
+    def _notify(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_users([self.user], title, "m")
+
+    async def test_stream_pushes_new_notifications(self):
+        await sync_to_async(self._notify)("Before connecting")
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get("/api/notifications/stream/")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        chunks = response.streaming_content.__aiter__()
+        self.assertTrue((await chunks.__anext__()).startswith(b"retry:"))
+        self.assertEqual(_event(await chunks.__anext__()), ("unread", {"unread": 1}))
+
+        # Wait for the stream to subscribe, then create a notification
+        pending = asyncio.ensure_future(chunks.__anext__())
+        broker = notification_stream.get_broker()
+        while not broker.subscriber_count(self.user.pk):
+            await asyncio.sleep(0.01)
+        await sync_to_async(self._notify)("Claim approved")
+
+        event, data = _event(await asyncio.wait_for(pending, timeout=5))
+        self.assertEqual(event, "notification")
+        self.assertEqual(data["notification"]["title"], "Claim approved")
+        await chunks.aclose()
+
+    async def test_notifications_created_while_connecting_are_delivered(self):
+        async def unread():
+            # Created after the stream subscribed, before the count is read
+            await sync_to_async(self._notify)("Meanwhile")
+            return 1
+
+        chunks = notification_stream.stream(self.user.pk, unread)
+        await chunks.__anext__()
+        self.assertEqual(_event((await chunks.__anext__()).encode()), ("unread", {"unread": 1}))
+        event, data = _event((await asyncio.wait_for(chunks.__anext__(), timeout=5)).encode())
+        self.assertEqual((event, data["notification"]["title"]), ("notification", "Meanwhile"))
+        await chunks.aclose()
+
+    async def test_heartbeat_while_idle_and_unsubscribe_on_close(self):
+        async def unread():
+            return 0
+
+        chunks = notification_stream.stream(self.user.pk, unread, heartbeat=0.01)
+        await chunks.__anext__()
+        await chunks.__anext__()
+        self.assertEqual(await chunks.__anext__(), ": keepalive\n\n")
+        broker = notification_stream.get_broker()
+        self.assertEqual(broker.subscriber_count(self.user.pk), 1)
+        await chunks.aclose()
+        self.assertEqual(broker.subscriber_count(self.user.pk), 0)
+
+    async def test_requires_login(self):
+        response = await self.async_client.get("/api/notifications/stream/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_unavailable_under_wsgi(self):
+        # A sync worker would be held until it timed out; the bell polls instead
+        self.client.force_login(self.user)
+        response = self.client.get("/api/notifications/stream/")
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("ASGI", response.json()["detail"])
+
+    @override_settings(NOTIFICATION_STREAM_LOCAL=False)
+    async def test_unavailable_without_a_shared_broker(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get("/api/notifications/stream/")
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("NOTIFICATION_STREAM_URL", response.json()["detail"])
+
+
+@override_settings(CACHE_SHARED=True)
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="counted")
+        self.other = User.objects.create_user(username="other")
+
+    def _counter(self, user):
+        return NotificationCounter.objects.filter(user=user).values_list("unread", flat=True).first()
+
+    def test_counters_follow_creates_and_reads(self):
+        # Unread rows from before the counter existed are picked up
+        Notification.objects.create(recipient=self.user, title="Old", message="m")
+        notify_users([self.user, self.user, self.other], "Hello", "m")
+        self.assertEqual((self._counter(self.user), self._counter(self.other)), (3, 1))
+        notify_users([self.user], "Again", "m")
+        self.assertEqual(self._counter(self.user), 4)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.user.pk), 4)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 4)
+
+        first = Notification.objects.filter(recipient=self.user).first()
+        self.assertEqual(unread_counts.mark_read(self.user, [first.pk]), 1)
+        self.assertEqual(unread_counts.mark_read(self.user, [first.pk]), 0)  # already read
+        self.assertEqual(unread_count(self.user.pk), 3)
+        unread_counts.mark_read(self.user)
+        self.assertEqual((self._counter(self.user), unread_count(self.user.pk)), (0, 0))
+
+    def test_rolled_back_notifications_are_not_counted(self):
+        notify_users([self.user], "Kept", "m")
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            notify_users([self.user], "Lost", "m")
+            raise RuntimeError
+        self.assertEqual(unread_count(self.user.pk), 1)
+
+    def test_reconcile_corrects_drift(self):
+        notify_users([self.user, self.other], "Hello", "m")
+        Notification.objects.filter(recipient=self.user).delete()  # e.g. from the admin
+        NotificationCounter.objects.filter(user=self.other).update(unread=7)
+
+        out = StringIO()
+        call_command("reconcile_unread_counts", stdout=out)
+        self.assertIn("2 checked, 2 corrected", out.getvalue())
+        self.assertEqual((unread_count(self.user.pk), unread_count(self.other.pk)), (0, 1))
+        self.assertEqual(unread_counts.reconcile(), (2, 0))
+
+    @override_settings(CACHE_SHARED=False)
+    def test_per_process_cache_is_bypassed(self):
+        notify_users([self.user], "Hello", "m")
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.user.pk), 1)
+        # Read on another worker: nothing here to invalidate
+        NotificationCounter.objects.filter(user=self.user).update(unread=0)
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.user.pk), 0)
+        self.assertIsNone(cache.get(unread_counts.CACHE_KEY.format(self.user.pk)))
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from medical.models import Notification, NotificationCounter
+from medical.services.notifications import (
+    COMMITTEE_RECIPIENTS_CACHE_KEY, committee_recipients, committee_emails, notify_committee,
+)
+
+User = get_user_model()
+
+
+@override_settings(CACHE_SHARED=True)
+class CommitteeFanOutTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.committee = Group.objects.create(name="Committee")
+        self.users = []
+        for i in range(5):
+            u = User.objects.create_user(username=f"committee{i}", email=f"c{i}@example.com", password="password")
+            u.groups.add(self.committee)
+            self.users.append(u)
+
+    def test_fan_out_is_a_single_insert(self):
+        committee_recipients()  # warm the cache
+        NotificationCounter.objects.bulk_create(NotificationCounter(user=u) for u in self.users)
+        # One INSERT, plus one UPDATE of the recipients' unread counters
+        with self.assertNumQueries(2):
+            rows = notify_committee("New Claim Submitted", "msg", "/x", "claim")
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(
+            Notification.objects.filter(title="New Claim Submitted").count(), 5
+        )
+
+    def test_recipients_shared_with_email_path(self):
+        committee_recipients()
+        with self.assertNumQueries(0):
+            emails = committee_emails()
+        self.assertEqual(sorted(emails), [f"c{i}@example.com" for i in range(5)])
+
+    def test_membership_change_invalidates_cache(self):
+        self.assertEqual(len(committee_recipients()), 5)
+        self.users[0].groups.remove(self.committee)
+        self.assertEqual(len(committee_recipients()), 4)
+
+        newcomer = User.objects.create_user(username="newcomer", password="password")
+        newcomer.groups.add(self.committee)
+        self.assertEqual(len(committee_recipients()), 5)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_not_cached_when_cache_is_per_process(self):
+        # Another worker's invalidation would never reach this process's cache
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(len(committee_recipients()), 5)
+        self.assertIsNone(cache.get(COMMITTEE_RECIPIENTS_CACHE_KEY))
@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from datetime import timedelta
+from medical.models import Member, MembershipType, EmailOutbox
+from medical.tasks import flush_email_outbox, send_outbox_email
+
+User = get_user_model()
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.membership_type = MembershipType.objects.create(
+            key='single', name='Single', annual_limit=250000, fund_share_percent=80
+        )
+        self.user = User.objects.create_user(
+            username='outboxuser', email='outbox@example.com', password='password'
+        )
+
+    def _create_member(self):
+        return Member.objects.create(
+            user=self.user,
+            membership_type=self.membership_type,
+            status='pending',
+            benefits_from=timezone.now().date() + timedelta(days=60),
+        )
+
+    def test_email_is_queued_not_sent_inside_transaction(self):
+        """Saving a member writes outbox rows but sends nothing before commit."""
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            member = self._create_member()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertTrue(callbacks)
+        kinds = set(EmailOutbox.objects.filter(object_id=str(member.id)).values_list("kind", flat=True))
+        self.assertEqual(kinds, {"member_registration", "new_member_committee"})
+        self.assertFalse(EmailOutbox.objects.exclude(status="pending").exists())
+
+    def test_email_delivered_on_commit(self):
+        """On commit the (eager) worker delivers and marks the rows."""
+        with self.captureOnCommitCallbacks(execute=True):
+            member = self._create_member()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["outbox@example.com"])
+        welcome = EmailOutbox.objects.get(object_id=str(member.id), kind="member_registration")
+        self.assertEqual(welcome.status, "sent")
+        self.assertEqual(welcome.attempts, 1)
+        # No Committee group -> nothing to send
+        committee = EmailOutbox.objects.get(object_id=str(member.id), kind="new_member_committee")
+        self.assertEqual(committee.status, "skipped")
+
+    def test_delivery_failure_is_retried_then_marked_failed(self):
+        with mock.patch("medical.email_notifications.send_mail", side_effect=OSError("smtp down")):
+            with self.captureOnCommitCallbacks(execute=True):
+                member = self._create_member()
+
+        welcome = EmailOutbox.objects.get(object_id=str(member.id), kind="member_registration")
+        self.assertEqual(welcome.status, "failed")
+        self.assertGreater(welcome.attempts, 1)
+        self.assertIn("smtp down", welcome.last_error)
+
+    def test_redispatched_email_is_sent_once(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            member = self._create_member()
+        welcome = EmailOutbox.objects.get(object_id=str(member.id), kind="member_registration")
+
+        # e.g. the on-commit dispatch and the sweeper both reach a worker
+        send_outbox_email.delay(str(welcome.pk))
+        send_outbox_email.delay(str(welcome.pk))
+        self.assertEqual(len(mail.outbox), 1)
+        welcome.refresh_from_db()
+        self.assertEqual((welcome.status, welcome.attempts), ("sent", 1))
+
+        # A row another worker has claimed is skipped
+        EmailOutbox.objects.filter(pk=welcome.pk).update(status="sending")
+        self.assertIsNone(send_outbox_email.delay(str(welcome.pk)).result)
+
+    def test_sweeper_skips_rows_waiting_for_a_retry(self):
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=False):
+            member = self._create_member()
+        rows = EmailOutbox.objects.filter(object_id=str(member.id))
+        never_tried, retrying = rows
+        rows.update(created_at=now - timedelta(hours=2))
+        EmailOutbox.objects.filter(pk=retrying.pk).update(attempts=1, last_attempt_at=now - timedelta(minutes=10))
+        stuck = EmailOutbox.objects.create(kind="member_registration", object_id=str(member.id), status="sending")
+        EmailOutbox.objects.filter(pk=stuck.pk).update(last_attempt_at=now - timedelta(hours=2))
+
+        with mock.patch("medical.services.outbox.dispatch") as dispatch:
+            self.assertEqual(flush_email_outbox(), 2)
+        self.assertEqual(sorted(dispatch.call_args[0][0]), sorted([never_tried.pk, stuck.pk]))
+        self.assertEqual(EmailOutbox.objects.get(pk=stuck.pk).status, "pending")
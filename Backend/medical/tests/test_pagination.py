@@ -0,0 +1,80 @@
+import base64
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from medical.models import Notification, Member, MembershipType, Claim
+
+User = get_user_model()
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="pager", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Notification.objects.bulk_create([
+            Notification(recipient=self.user, title=f"n{i}", message="m") for i in range(7)
+        ])
+        # Ties on created_at must not drop or repeat rows
+        stamp = timezone.now()
+        Notification.objects.filter(title__in=["n2", "n3", "n4"]).update(created_at=stamp)
+
+    def _walk(self, url):
+        seen, pages = [], 0
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(any("COUNT(" in q["sql"] for q in ctx.captured_queries))
+            seen += [n["title"] for n in response.data["results"]]
+            url = response.data["next"]
+            pages += 1
+        return seen, pages
+
+    def test_cursor_walk_covers_every_row_once(self):
+        seen, pages = self._walk("/api/notifications/?pagination=cursor&page_size=3")
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(seen), sorted(f"n{i}" for i in range(7)))
+        expected = list(
+            Notification.objects.order_by("-created_at", "-id").values_list("title", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_page_numbers_still_default(self):
+        response = self.client.get("/api/notifications/")
+        self.assertEqual(response.data["count"], 7)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/notifications/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_a_malformed_pk(self):
+        for name in ("Committee", "Admin"):
+            Group.objects.create(name=name).user_set.add(self.user)
+        cursor = base64.urlsafe_b64encode(b"2024-01-01T00:00:00+00:00|junk").decode().rstrip("=")
+        for url in ("/api/notifications/", "/api/claims/", "/api/committee/claims/", "/api/dashboard/admin/audit/"):
+            response = self.client.get(f"{url}?cursor={cursor}")
+            self.assertEqual(response.status_code, 404, url)
+
+    def test_committee_claims_pages_instead_of_truncating(self):
+        Group.objects.create(name="Committee").user_set.add(self.user)
+        member = Member.objects.create(
+            user=User.objects.create_user(username="m"),
+            membership_type=MembershipType.objects.create(key="single", name="Single"),
+            status="active",
+        )
+        with self.captureOnCommitCallbacks(execute=True):  # fills the committee queue
+            for _ in range(4):
+                Claim.objects.create(member=member, claim_type="outpatient", status="submitted")
+
+        response = self.client.get("/api/committee/claims/?page_size=3")
+        self.assertEqual(len(response.data["results"]), 3)
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
@@ -0,0 +1,156 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from medical.models import Claim, ClaimItem, Member, MembershipType, ReimbursementScale
+from medical.services.config_cache import get_scale
+from medical.services.ledger import usage_for
+from medical.services.pricing import reprice
+
+User = get_user_model()
+
+
+class BatchPricingTests(TestCase):
+    def setUp(self):
+        self.membership_type = MembershipType.objects.create(
+            key='single', name='Single', annual_limit=1000000, fund_share_percent=80
+        )
+        self.member = self._member('pricer')
+        self.scale = ReimbursementScale.objects.create(
+            category='Inpatient', fund_share=80, member_share=20, ceiling=500000
+        )
+        self.year = timezone.localdate().year
+
+    def _member(self, username):
+        return Member.objects.create(
+            user=User.objects.create_user(username=username, password='password'),
+            membership_type=self.membership_type,
+            status='active',
+            valid_to=timezone.now().date() + timedelta(days=365),
+            benefits_from=timezone.now().date() - timedelta(days=60),
+        )
+
+    def _claim(self, total, member=None, status='submitted', **fields):
+        claim = Claim.objects.create(
+            member=member or self.member,
+            claim_type='inpatient',
+            status=status,
+            details={'inpatient_total': total},
+            **fields,
+        )
+        claim.recalc_total()
+        claim.save()
+        return claim
+
+    def _saved_amounts(self, claim):
+        claim.refresh_from_db()
+        return claim.total_claimed, claim.total_payable, claim.member_payable
+
+    def test_matches_per_claim_pricing(self):
+        claims = [
+            self._claim(10000),
+            self._claim(400000),  # hits the ceiling once it is lowered
+            self._claim(5000, other_insurance={'shif': 1000}),
+            self._claim(5000, override_amount=Decimal('1234')),
+            self._claim(5000, excluded=True),
+        ]
+        with_items = self._claim(0)
+        ClaimItem.objects.create(claim=with_items, amount=Decimal('300'), quantity=3)
+
+        self.scale.fund_share = 60
+        self.scale.ceiling = 100000
+        self.scale.save()
+
+        summary = reprice()
+        self.assertEqual(summary['claims'], 6)
+        batch = [self._saved_amounts(c) for c in claims + [with_items]]
+
+        for claim in claims + [with_items]:
+            claim.recalc_total()
+            claim.save()
+        self.assertEqual(batch, [self._saved_amounts(c) for c in claims + [with_items]])
+        self.assertEqual(batch[1][1], Decimal('100000'))
+        self.assertEqual(batch[5][0], Decimal('900'))
+
+    def test_annual_limit_accumulates_oldest_first(self):
+        self.membership_type.annual_limit = 10000
+        self.membership_type.save()
+        other_member = self._member('other')
+        claims = [self._claim(10000) for _ in range(3)]
+        unrelated = self._claim(10000, member=other_member)
+
+        # Re-price from scratch: each claim is at 8000 before the limit
+        Claim.objects.update(total_payable=0, member_payable=0)
+        reprice()
+
+        payables = [self._saved_amounts(c)[1] for c in claims]
+        self.assertEqual(payables, [Decimal('8000'), Decimal('2000'), Decimal('0')])
+        self.assertEqual(self._saved_amounts(unrelated)[1], Decimal('8000'))
+        self.assertEqual(usage_for(self.member.id, self.year).pending_total, Decimal('10000'))
+        self.assertEqual(usage_for(other_member.id, self.year).pending_total, Decimal('8000'))
+
+    def test_annual_limit_agrees_with_per_claim_pricing(self):
+        self.membership_type.annual_limit = 10000
+        self.membership_type.save()
+        claims = [self._claim(10000), self._claim(10000)]
+        self.assertEqual([self._saved_amounts(c)[1] for c in claims], [Decimal('8000'), Decimal('2000')])
+
+        self.scale.fund_share = 100
+        self.scale.save()
+        summary = reprice(dry_run=True)
+        batch = {change['id']: change['total_payable']['new'] for change in summary['changes']}
+
+        for claim in claims:  # what compute_payable() gives, saved oldest first
+            claim.save()
+        saved = [self._saved_amounts(c)[1] for c in claims]
+        self.assertEqual(saved, [Decimal('8000'), Decimal('2000')])
+        self.assertEqual([batch.get(str(c.pk), amount) for c, amount in zip(claims, saved)], saved)
+
+    def test_dry_run_saves_nothing(self):
+        claim = self._claim(10000)
+        Claim.objects.filter(pk=claim.pk).update(total_payable=1)
+
+        summary = reprice(dry_run=True)
+        self.assertEqual(summary['changed'], 1)
+        self.assertEqual(summary['changes'][0]['total_payable'], {'old': Decimal('1.00'), 'new': Decimal('8000.00')})
+        self.assertEqual(self._saved_amounts(claim)[1], Decimal('1'))
+
+    def test_query_count_does_not_grow_with_claims(self):
+        for _ in range(3):
+            self._claim(1000)
+        get_scale('inpatient')  # warm the config cache
+        # claims, item totals, ledger rows (+ savepoint and release)
+        with self.assertNumQueries(5):
+            reprice(dry_run=True)
+
+        for _ in range(20):
+            self._claim(1000, member=self._member(f'm{_}'))
+        with self.assertNumQueries(5):
+            reprice(dry_run=True)
+
+    def test_command_and_preview_api(self):
+        claim = self._claim(10000)
+        Claim.objects.filter(pk=claim.pk).update(total_payable=1)
+
+        committee = User.objects.create_user(username='committee', password='password')
+        Group.objects.create(name='Committee').user_set.add(committee)
+        client = APIClient()
+        client.force_authenticate(committee)
+
+        response = client.get('/api/claims/reprice_preview/?status=submitted')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['changed'], 1)
+        self.assertEqual(client.get('/api/claims/reprice_preview/?status=bogus').status_code, 400)
+        self.assertEqual(self._saved_amounts(claim)[1], Decimal('1'))
+
+        out = StringIO()
+        call_command('reprice_claims', stdout=out)
+        self.assertIn('Changed 1 of 1 claims', out.getvalue())
+        self.assertEqual(self._saved_amounts(claim)[1], Decimal('8000'))
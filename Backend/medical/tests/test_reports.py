@@ -0,0 +1,131 @@
+import csv
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from medical.models import Claim, ClaimReportRow, Member, MembershipType, PaymentRecord, ReportRun
+from medical.services.reports import REPORTS, clean_params, refresh_tables
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ReportTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="finance", password="password")
+        Group.objects.create(name="Committee").user_set.add(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        gold = MembershipType.objects.create(key="gold", name="Gold")
+        silver = MembershipType.objects.create(key="silver", name="Silver")
+        now = timezone.now()
+        for i, (mtype, hospital, status) in enumerate([
+            (gold, "Aga Khan", "paid"),
+            (gold, "Aga  Khan ", "paid"),
+            (silver, "Nairobi Hospital", "paid"),
+            (silver, "Nairobi Hospital", "rejected"),
+            (silver, None, "submitted"),
+        ]):
+            member = Member.objects.create(
+                user=User.objects.create_user(username=f"m{i}"), membership_type=mtype, status="active"
+            )
+            claim = Claim.objects.create(
+                member=member, claim_type="inpatient", status=status,
+                details={"hospital_name": hospital} if hospital else {},
+                submitted_at=now - timedelta(days=4),
+            )
+            Claim.objects.filter(pk=claim.pk).update(total_claimed=1000 * (i + 1), total_payable=800 * (i + 1))
+            if status == "paid":
+                PaymentRecord.objects.create(
+                    claim=claim, payment_method="eft", reference_number=f"R{i}",
+                    amount=800 * (i + 1), payment_date=now - timedelta(days=2 * i),
+                )
+
+    def _rows(self, report, **params):
+        return REPORTS[report]["build"](clean_params(report, params))
+
+    def test_reports_read_from_rollup(self):
+        refresh_tables()
+        self.assertEqual(ClaimReportRow.objects.count(), 5 - 1)  # the two Aga Khan claims share a row
+
+        payout = self._rows("payout_by_membership_type")
+        self.assertEqual(payout, [["Gold", 2, Decimal("2400")], ["Silver", 1, Decimal("2400")]])
+
+        # Names are whitespace-normalized; rejected claims don't count
+        self.assertEqual(self._rows("top_providers"), [
+            ["Aga Khan", 2, Decimal("3000"), Decimal("2400")],
+            ["Nairobi Hospital", 1, Decimal("3000"), Decimal("2400")],
+        ])
+        self.assertEqual(len(self._rows("top_providers", limit=1)), 1)
+
+        [turnaround] = self._rows("turnaround")
+        self.assertEqual(turnaround[2], 3)
+        self.assertEqual(turnaround[3], 2.0)  # 4, 2 and 0 days
+
+        # Reports don't touch the claims table
+        Claim.objects.all().delete()
+        self.assertEqual(sum(r[3] for r in self._rows("claims_by_month")), 5)
+
+    def test_generate_download_and_reuse(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/reports/", {"report": "claims_by_month", "format": "csv"}, format="json"
+            )
+        self.assertEqual(response.status_code, 202)
+        run = ReportRun.objects.get(pk=response.data["id"])
+        self.assertEqual(run.status, "done")
+
+        response = self.client.get(f"/api/reports/{run.pk}/")
+        self.assertTrue(response.data["download_url"].endswith(f"/api/reports/{run.pk}/download/"))
+        response = self.client.get(f"/api/reports/{run.pk}/download/")
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], REPORTS["claims_by_month"]["columns"])
+        self.assertEqual(len(rows), 1 + 3)  # paid, rejected, submitted
+
+        # Same parameters -> same run, until the rollup is refreshed
+        response = self.client.post("/api/reports/", {"report": "claims_by_month", "format": "csv"}, format="json")
+        self.assertEqual((response.status_code, response.data["id"]), (200, str(run.pk)))
+        refresh_tables()
+        response = self.client.post("/api/reports/", {"report": "claims_by_month", "format": "csv"}, format="json")
+        self.assertEqual(response.status_code, 202)
+
+    def test_xlsx_and_pdf(self):
+        refresh_tables()
+        for fmt, magic in (("xlsx", b"PK"), ("pdf", b"%PDF")):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    "/api/reports/",
+                    {"report": "top_providers", "format": fmt, "params": {"date_from": "2000-01"}},
+                    format="json",
+                )
+            run = ReportRun.objects.get(pk=response.data["id"])
+            self.assertEqual(run.status, "done", run.error)
+            with run.file.open("rb") as f:
+                self.assertEqual(f.read(len(magic)), magic)
+
+    def test_validation(self):
+        for body in (
+            {"report": "nope"},
+            {"report": "turnaround", "format": "doc"},
+            {"report": "turnaround", "params": {"date_from": "last year"}},
+            {"report": "turnaround", "params": {"date_from": "2024-13"}},
+            {"report": "turnaround", "params": {"date_to": "2024-02-30"}},
+            {"report": "turnaround", "params": ["x"]},
+        ):
+            response = self.client.post("/api/reports/", body, format="json")
+            self.assertEqual(response.status_code, 400, body)
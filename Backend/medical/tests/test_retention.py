@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from medical.models import ArchiveBatch, AuditLog, Claim, Member, MembershipType, Notification, NotificationCounter
+from medical.services import retention
+from medical.services.notifications import notify_users
+from medical.services.unread_counts import unread_count
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def _age(qs, days):
+    qs.update(created_at=timezone.now() - timedelta(days=days))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, NOTIFICATION_RETENTION_DAYS=90, AUDIT_LOG_RETENTION_DAYS=365)
+class RetentionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="retained")
+        self.member = Member.objects.create(
+            user=self.user, membership_type=MembershipType.objects.create(key="single", name="Single"),
+            status="active",
+        )
+
+    def _notifications(self, title, n, read, days):
+        notify_users([self.user] * n, title, "m")
+        qs = Notification.objects.filter(title=title)
+        qs.update(read=read)
+        _age(qs, days)
+        return qs
+
+    def test_read_notifications_past_retention_are_archived(self):
+        self._notifications("Old read", 3, read=True, days=120)
+        self._notifications("Old unread", 2, read=False, days=120)
+        self._notifications("Recent read", 1, read=True, days=10)
+        NotificationCounter.objects.filter(user=self.user).update(unread=2)
+        archived = list(Notification.objects.filter(title="Old read").values_list("pk", flat=True))
+
+        result = retention.archive_all(batch_size=2)
+
+        self.assertEqual(result["notifications"], (2, 3))
+        self.assertEqual(
+            sorted(Notification.objects.values_list("title", flat=True)),
+            ["Old unread", "Old unread", "Recent read"],
+        )
+        self.assertEqual(unread_count(self.user.pk), 2)
+
+        batches = ArchiveBatch.objects.filter(kind="notifications")
+        self.assertEqual(sorted(b.row_count for b in batches), [1, 2])
+        rows = [row for batch in batches for row in retention.read_archive(batch)]
+        self.assertEqual(sorted(row["id"] for row in rows), sorted(str(pk) for pk in archived))
+        self.assertEqual({(row["title"], row["recipient_id"], row["read"]) for row in rows},
+                         {("Old read", self.user.pk, True)})
+
+        self.assertEqual(retention.archive_all()["notifications"], (0, 0))
+
+    def test_audit_entries_of_open_claims_are_kept(self):
+        open_claim = Claim.objects.create(member=self.member, claim_type="outpatient")
+        paid_claim = Claim.objects.create(member=self.member, claim_type="outpatient")
+        Claim.objects.filter(pk__in=[open_claim.pk, paid_claim.pk]).update(status="submitted")
+        Claim.objects.filter(pk=paid_claim.pk).update(status="paid")
+        AuditLog.objects.create(action="settings:UPDATE")
+        _age(AuditLog.objects.all(), 400)
+        AuditLog.objects.create(action="recent")
+
+        out = StringIO()
+        call_command("archive_old_records", "--dry-run", stdout=out)
+        due = AuditLog.objects.exclude(action="recent").exclude(claim=open_claim).count()
+        self.assertGreaterEqual(due, 2)  # the paid claim's entries and the settings entry
+        self.assertIn(f"0 notifications, {due} audit entries", out.getvalue())
+
+        call_command("archive_old_records", stdout=StringIO())
+        kept = AuditLog.objects.all()
+        self.assertTrue(kept.filter(claim=open_claim).exists())
+        self.assertFalse(kept.filter(claim=paid_claim).exists())
+        self.assertEqual(set(kept.filter(claim__isnull=True).values_list("action", flat=True)), {"recent"})
+        self.assertEqual(ArchiveBatch.objects.get(kind="audit_logs").row_count, due)
+
+    def test_failed_delete_leaves_no_archive_file(self):
+        self._notifications("Old read", 1, read=True, days=120)
+        files = self._archive_files()
+        with mock.patch("django.db.models.query.QuerySet.delete", side_effect=RuntimeError), \
+                self.assertRaises(RuntimeError):
+            retention.archive_all()
+        self.assertFalse(ArchiveBatch.objects.exists())
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertEqual(self._archive_files(), files)
+
+    def _archive_files(self):
+        return sorted(str(p) for p in Path(MEDIA_ROOT).glob("archives/**/*.gz"))
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from medical.models import Claim, ClaimReview, Member, MembershipType
+from medical.services import roles
+from medical.services.roles import user_groups
+
+User = get_user_model()
+
+
+def group_queries(queries):
+    return [q["sql"] for q in queries if '"auth_group"' in q["sql"] or '"auth_user_groups"' in q["sql"]]
+
+
+@override_settings(CACHE_SHARED=True)
+class RoleResolverTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.committee = Group.objects.create(name="Committee")
+        self.reviewer = User.objects.create_user(username="reviewer", password="password")
+        self.reviewer.groups.add(self.committee)
+
+        membership_type = MembershipType.objects.create(key="single", name="Single")
+        member = Member.objects.create(
+            user=User.objects.create_user(username="owner"), membership_type=membership_type, status="active"
+        )
+        claims = Claim.objects.bulk_create([Claim(member=member, claim_type="outpatient") for _ in range(50)])
+        ClaimReview.objects.bulk_create([
+            ClaimReview(claim=c, reviewer=self.reviewer, role="committee", action="reviewed") for c in claims
+        ])
+
+    def test_listing_claims_resolves_groups_once(self):
+        client = APIClient()
+        client.force_login(self.reviewer)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get("/api/claims/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 50)
+        self.assertLessEqual(len(group_queries(ctx.captured_queries)), 2)
+
+        # Next request: a fresh user object, served from the shared cache
+        with CaptureQueriesContext(connection) as ctx:
+            client.get("/api/claims/")
+        self.assertEqual(group_queries(ctx.captured_queries), [])
+
+    def test_membership_changes_invalidate(self):
+        self.assertIn("Committee", user_groups(User.objects.get(pk=self.reviewer.pk)))
+        self.reviewer.groups.remove(self.committee)
+        self.assertNotIn("Committee", user_groups(User.objects.get(pk=self.reviewer.pk)))
+
+        self.committee.user_set.add(self.reviewer)
+        self.assertIn("Committee", user_groups(User.objects.get(pk=self.reviewer.pk)))
+
+    def test_admin_role_update_invalidates(self):
+        admin = User.objects.create_user(username="admin", password="password")
+        admin.groups.add(Group.objects.create(name="Admin"))
+        client = APIClient()
+        client.force_login(admin)
+
+        self.assertIn("Committee", user_groups(User.objects.get(pk=self.reviewer.pk)))
+        response = client.post(
+            f"/api/admin/users/{self.reviewer.pk}/roles/",
+            {"make_committee": False, "make_member": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_groups(User.objects.get(pk=self.reviewer.pk)), ("Member",))
+
+
+class PerProcessCacheTests(TestCase):
+    """Two gunicorn workers, each with its own local-memory cache."""
+
+    def setUp(self):
+        self.workers = [LocMemCache(f"worker-{i}", {}) for i in range(2)]
+        self.committee = Group.objects.create(name="Committee")
+        self.user = User.objects.create_user(username="revoked")
+        self.user.groups.add(self.committee)
+
+    def _request(self, worker):
+        """Resolve the user's groups as a fresh request on `worker` would."""
+        with mock.patch.object(roles, "cache", self.workers[worker]):
+            return user_groups(User.objects.get(pk=self.user.pk))
+
+    def _revoke_on(self, worker):
+        with mock.patch.object(roles, "cache", self.workers[worker]):
+            self.user.groups.remove(self.committee)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_revoked_role_is_seen_by_every_worker(self):
+        self.assertIn("Committee", self._request(1))
+        self._revoke_on(0)
+        self.assertNotIn("Committee", self._request(0))
+        self.assertNotIn("Committee", self._request(1))
+        self.assertIsNone(self.workers[1].get(roles.ROLES_KEY.format(self.user.pk)))
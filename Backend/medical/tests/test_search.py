@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from medical.services.search import USER_FIELDS, search
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="annabel", first_name="Annabel", email="a@example.com")
+        User.objects.create_user(username="joanna", last_name="Ann", email="j@example.com")
+        User.objects.create_user(username="zed", first_name="Zed", email="ann@example.com")
+        User.objects.create_user(username="bob", first_name="Bob", email="bob@example.com")
+
+    def test_filters_any_field_case_insensitively(self):
+        found = search(User.objects.all(), "ANN", USER_FIELDS)
+        self.assertEqual(set(found.values_list("username", flat=True)), {"annabel", "joanna", "zed"})
+        self.assertEqual(search(User.objects.all(), "  ", USER_FIELDS).count(), 4)
+
+    def test_ranks_exact_then_prefix_then_substring(self):
+        ranked = search(User.objects.all(), "ann", USER_FIELDS).order_by("-search_rank", "username")
+        # exact last name, prefix of first name/email, substring only
+        self.assertEqual(list(ranked.values_list("username", flat=True))[0], "joanna")
+        self.assertEqual(set(list(ranked.values_list("username", flat=True))[1:]), {"annabel", "zed"})
+
+    def test_admin_user_list_uses_ranked_search(self):
+        admin = User.objects.create_user(username="root")
+        Group.objects.create(name="Admin").user_set.add(admin)
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.get("/api/admin/users/?q=ann")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([u["username"] for u in response.data["results"]][0], "joanna")
+        self.assertEqual(len(response.data["results"]), 3)
@@ -0,0 +1,204 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from medical.models import (
+    AuditLog, Claim, ClaimAppeal, ClaimMeetingLink, ClaimReview, CommitteeMeeting,
+    EmailOutbox, Member, MembershipType, Notification, ReimbursementScale,
+)
+from medical.services.ledger import usage_for
+from medical.services.recompute import claim_recompute
+from medical.services.transitions import apply_transitions
+
+User = get_user_model()
+
+
+class TransitionTestCase(TestCase):
+    def setUp(self):
+        self.membership_type = MembershipType.objects.create(
+            key='single', name='Single', annual_limit=1000000, fund_share_percent=80
+        )
+        self.member = self._member('claimant')
+        self.committee = User.objects.create_user(username='chair', password='password')
+        Group.objects.create(name='Committee').user_set.add(self.committee)
+        self.meeting = CommitteeMeeting.objects.create(date=timezone.now(), status='locked')
+
+    def _member(self, username):
+        return Member.objects.create(
+            user=User.objects.create_user(username=username, password='password'),
+            membership_type=self.membership_type,
+            status='active',
+            valid_to=timezone.now().date() + timedelta(days=365),
+            benefits_from=timezone.now().date() - timedelta(days=60),
+        )
+
+    def _claim(self, total=10000, status='reviewed', decision=None, member=None):
+        claim = Claim.objects.create(
+            member=member or self.member,
+            claim_type='inpatient',
+            status=status,
+            date_of_discharge=timezone.now().date(),
+            details={'inpatient_total': total},
+        )
+        claim.recalc_total()
+        claim.save()
+        if decision:
+            ClaimMeetingLink.objects.create(meeting=self.meeting, claim=claim, decision=decision)
+        return claim
+
+
+class BulkTransitionTests(TransitionTestCase):
+    def test_applies_valid_transitions_and_reports_the_rest(self):
+        approved = self._claim(decision='approved')
+        rejected = self._claim(decision='rejected')
+        unlinked = self._claim()
+        mismatched = self._claim(decision='rejected')
+        appealed = self._claim(decision='approved')
+        ClaimAppeal.objects.create(claim=appealed, appealed_by=self.member, reason='Too low')
+        done = self._claim(status='approved')
+        notifications = Notification.objects.count()
+        emails = EmailOutbox.objects.filter(kind='claim_status').count()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = apply_transitions({
+                approved.pk: 'approved',
+                rejected.pk: 'rejected',
+                unlinked.pk: 'approved',
+                mismatched.pk: 'approved',
+                appealed.pk: 'approved',
+                done.pk: 'approved',
+                'not-a-claim': 'approved',
+            }, self.committee, note='Minute 4.2')
+
+        self.assertEqual((result['updated'], result['unchanged'], result['failed']), (2, 1, 4))
+        outcome = {r['id']: r for r in result['results']}
+        self.assertIn('locked committee meeting', outcome[str(unlinked.pk)]['detail'])
+        self.assertIn('does not match', outcome[str(mismatched.pk)]['detail'])
+        self.assertIn('under appeal', outcome[str(appealed.pk)]['detail'])
+
+        statuses = dict(Claim.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[approved.pk], 'approved')
+        self.assertEqual(statuses[rejected.pk], 'rejected')
+        self.assertEqual(statuses[unlinked.pk], 'reviewed')
+        self.assertEqual(statuses[appealed.pk], 'reviewed')
+
+        self.assertEqual(
+            set(ClaimReview.objects.values_list('claim_id', 'action', 'note')),
+            {(approved.pk, 'approved', 'Minute 4.2'), (rejected.pk, 'rejected', 'Minute 4.2')},
+        )
+        log = AuditLog.objects.get(claim=approved, action='status_change:approved')
+        self.assertEqual(log.meeting, self.meeting)
+        self.assertEqual(log.previous_state['status'], 'reviewed')
+        self.assertEqual(Notification.objects.count() - notifications, 2)
+        self.assertEqual(EmailOutbox.objects.filter(kind='claim_status').count() - emails, 2)
+        self.assertEqual(
+            set(Claim.objects.filter(queue_entry__status='approved').values_list('pk', flat=True)),
+            {approved.pk, done.pk},
+        )
+
+        # The ledger follows: rejected claims stop counting, approved move buckets
+        usage = usage_for(self.member.pk, timezone.localdate().year)
+        approved.refresh_from_db()
+        done.refresh_from_db()
+        self.assertEqual(usage.approved_total, approved.total_payable + done.total_payable)
+
+    def test_payables_match_set_status(self):
+        self.membership_type.annual_limit = 10000
+        self.membership_type.save()
+        twin = self._member('twin')
+        bulk = [self._claim(decision='approved') for _ in range(2)]
+        single = [self._claim(decision='approved', member=twin) for _ in range(2)]
+        ReimbursementScale.objects.create(category='Inpatient', fund_share=100, member_share=0, ceiling=500000)
+
+        apply_transitions({c.pk: 'approved' for c in bulk}, self.committee)
+        for claim in single:  # what ClaimViewSet.set_status does, one claim at a time
+            claim.status = 'approved'
+            with claim_recompute():
+                claim.save(update_fields=['status', 'submitted_at'])
+
+        def amounts(claims):
+            return [
+                tuple(Claim.objects.filter(pk=c.pk).values_list('total_payable', 'member_payable').get())
+                for c in claims
+            ]
+        self.assertEqual(amounts(bulk), amounts(single))
+        self.assertEqual([a[0] for a in amounts(bulk)], [8000, 2000])
+        year = timezone.localdate().year
+        self.assertEqual(usage_for(self.member.pk, year).approved_total, usage_for(twin.pk, year).approved_total)
+        self.assertFalse(AuditLog.objects.filter(action='claims:REPRICE').exists())
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def run(n):
+            claims = [self._claim(decision='approved') for _ in range(n)]
+            with CaptureQueriesContext(connection) as ctx:
+                result = apply_transitions({c.pk: 'approved' for c in claims}, self.committee)
+            self.assertEqual(result['updated'], n)
+            return len(ctx.captured_queries)
+
+        run(1)  # warm the role/settings caches
+        self.assertEqual(run(2), run(8))
+
+    def test_endpoint_accepts_ids_or_a_mapping(self):
+        first = self._claim(status='draft')
+        second = self._claim(decision='approved')
+        client = APIClient()
+        client.force_authenticate(self.committee)
+
+        response = client.post('/api/claims/bulk_status/', {'ids': [str(first.pk)], 'status': 'submitted'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        first.refresh_from_db()
+        self.assertIsNotNone(first.submitted_at)
+        self.assertTrue(hasattr(first, 'fingerprint'))
+
+        response = client.post('/api/claims/bulk_status/', {'changes': {str(second.pk): 'approved'}}, format='json')
+        self.assertEqual(response.data['results'][0]['result'], 'updated')
+
+        response = client.post('/api/claims/bulk_status/', {'ids': [str(first.pk)], 'status': 'bogus'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_own_claims_are_refused(self):
+        claim = self._claim(decision='approved')
+        result = apply_transitions({claim.pk: 'approved'}, self.member.user)
+        self.assertEqual(result['failed'], 1)
+        self.assertIn('Conflict of Interest', result['results'][0]['detail'])
+
+
+class MeetingDecisionTests(TransitionTestCase):
+    def test_applies_every_decision_of_a_locked_meeting(self):
+        approved = [self._claim(decision='approved') for _ in range(3)]
+        rejected = self._claim(decision='rejected')
+        deferred = self._claim(decision='deferred')
+        client = APIClient()
+        client.force_authenticate(self.committee)
+
+        response = client.post(f'/api/meetings/{self.meeting.pk}/apply_decisions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['updated'], response.data['deferred']), (4, 1))
+
+        statuses = dict(Claim.objects.values_list('pk', 'status'))
+        self.assertTrue(all(statuses[c.pk] == 'approved' for c in approved))
+        self.assertEqual(statuses[rejected.pk], 'rejected')
+        self.assertEqual(statuses[deferred.pk], 'reviewed')
+        self.assertEqual(
+            AuditLog.objects.filter(meeting=self.meeting, action__startswith='status_change:').count(), 4
+        )
+        self.assertTrue(AuditLog.objects.filter(meeting=self.meeting, action='meeting:DECISIONS_APPLIED').exists())
+
+        # Running it again finds nothing left to do
+        response = client.post(f'/api/meetings/{self.meeting.pk}/apply_decisions/')
+        self.assertEqual((response.data['updated'], response.data['unchanged']), (0, 4))
+
+    def test_meeting_must_be_locked(self):
+        self.meeting.status = 'ratified'
+        self.meeting.save()
+        client = APIClient()
+        client.force_authenticate(self.committee)
+        response = client.post(f'/api/meetings/{self.meeting.pk}/apply_decisions/')
+        self.assertEqual(response.status_code, 400)
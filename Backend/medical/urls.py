@@ -22,6 +22,7 @@ router.register(r"meeting-claims", views.ClaimMeetingLinkViewSet, basename="meet
 router.register(r"appeals", views.ClaimAppealViewSet, basename="appeals")
 router.register(r"payment-records", views.PaymentRecordViewSet, basename="payment-records")
 router.register(r"data-access-logs", views.DataAccessLogViewSet, basename="data-access-logs")
+router.register(r"reports", views.ReportViewSet, basename="reports")
 
 urlpatterns = [
 
@@ -55,7 +56,10 @@ urlpatterns = [
     # uploads / reports
     path("reports/export/", views.export_claims_csv),
     path("claims/bulk_status/", views.bulk_change_status),
+    path("claims/reprice_preview/", views.reprice_preview, name="claims-reprice-preview"),
     path("claims/<uuid:claim_id>/upload_summary/", views.upload_summary_pdf, name="upload-summary-pdf"),
+    path("attachments/local-upload/<str:token>/", views.local_attachment_upload, name="attachment-local-upload"),
+    path("attachments/local-download/<str:token>/", views.local_attachment_download, name="attachment-local-download"),
 
     # admin summary / audit
     path("dashboard/admin/summary/", views.admin_dashboard_summary, name="admin-dashboard-summary"),
@@ -69,11 +73,12 @@ urlpatterns = [
     # Notifications
     path("notifications/unread-count/", views.unread_notifications_count, name="notifications-unread-count"),
     path("notifications/mark-read/", views.mark_notifications_read, name="notifications-mark-read"),
+    path("notifications/stream/", views.notification_stream, name="notifications-stream"),
 
     # Admin users & roles
     path("admin/users/", views.admin_users_list, name="admin-users"),
-    path("admin/users/<uuid:user_id>/roles/", views.admin_update_user_roles, name="admin-user-roles"),
-    path("admin/users/<uuid:user_id>/active/", views.admin_toggle_user_active, name="admin-user-active"),
+    path("admin/users/<int:user_id>/roles/", views.admin_update_user_roles, name="admin-user-roles"),
+    path("admin/users/<int:user_id>/active/", views.admin_toggle_user_active, name="admin-user-active"),
 
     # router
     path("", include(router.urls)),
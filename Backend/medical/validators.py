@@ -1,38 +1,59 @@
-# Backend/medical/validators.py (create this file)
+# Backend/medical/validators.py
+import os
+
 import magic
 from PIL import Image
 from django.core.exceptions import ValidationError
 
-def validate_file_upload(file):
-    # Size check
-    if file.size > 5 * 1024 * 1024:  # 5MB
+MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5MB
+
+ALLOWED_MIMES = {
+    'application/pdf': ['.pdf'],
+    'image/jpeg': ['.jpg', '.jpeg'],
+    'image/png': ['.png']
+}
+ALLOWED_EXTENSIONS = sorted({ext for exts in ALLOWED_MIMES.values() for ext in exts})
+
+
+def validate_upload_basics(file):
+    """Size and extension only: cheap enough to run in the upload request."""
+    if file.size > MAX_UPLOAD_SIZE:
         raise ValidationError("File too large (max 5MB)")
-    
-    # Extension check
+
     ext = os.path.splitext(file.name)[1].lower()
-    if ext not in ['.pdf', '.jpg', '.jpeg', '.png']:
+    if ext not in ALLOWED_EXTENSIONS:
         raise ValidationError(f"File type {ext} not allowed")
-    
-    # MIME type verification
-    mime = magic.from_buffer(file.read(1024), mime=True)
+    return ext
+
+
+def sniff_mime(file, name):
+    """MIME type from the file's content; must agree with the extension of `name`."""
+    ext = os.path.splitext(name)[1].lower()
+    mime = magic.from_buffer(file.read(2048), mime=True)
     file.seek(0)
-    
-    allowed_mimes = {
-        'application/pdf': ['.pdf'],
-        'image/jpeg': ['.jpg', '.jpeg'],
-        'image/png': ['.png']
-    }
-    
-    if mime not in allowed_mimes or ext not in allowed_mimes[mime]:
+
+    if mime not in ALLOWED_MIMES or ext not in ALLOWED_MIMES[mime]:
         raise ValidationError("File content doesn't match extension")
-    
+    return mime
+
+
+def verify_image(file):
+    try:
+        img = Image.open(file)
+        img.verify()
+        file.seek(0)
+    except Exception:
+        raise ValidationError("Corrupted or invalid image file")
+
+
+def validate_file_upload(file):
+    validate_upload_basics(file)
+
+    # MIME type verification
+    mime = sniff_mime(file, file.name)
+
     # For images, verify integrity
     if mime.startswith('image/'):
-        try:
-            img = Image.open(file)
-            img.verify()
-            file.seek(0)
-        except Exception:
-            raise ValidationError("Corrupted or invalid image file")
-    
-    return file
\ No newline at end of file
+        verify_image(file)
+
+    return file
@@ -1,16 +1,17 @@
 # Backend/medical/views.py
 from django.contrib.auth import authenticate, login, logout, get_user_model
 from django.contrib.auth.models import Group
-from django.db import transaction, models, connection
-from django.db.models import Q, Sum, Count
-from django.db.models.functions import TruncMonth
+from django.core.exceptions import ValidationError
+from django.db import transaction, connection
+from django.db.models import Prefetch, Q, Count
 from django.forms.models import model_to_dict
-from django.http import JsonResponse, HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.views.decorators.csrf import ensure_csrf_cookie
-from rest_framework import viewsets, permissions, status
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from django.views.decorators.http import require_http_methods
+from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
@@ -19,10 +20,10 @@ from datetime import date
 
 from .models import (
     Member, MembershipType, MemberDependent,
-    Claim, ClaimItem, ClaimReview, AuditLog,
+    Claim, ClaimItem, ClaimReview, ClaimQueueEntry, AuditLog,
     Notification, ReimbursementScale, Setting,
     ChronicRequest, ClaimAttachment, DataAccessLog,
-    CommitteeMeeting, MeetingAttendance, ClaimMeetingLink, ClaimAppeal, PaymentRecord
+    CommitteeMeeting, MeetingAttendance, ClaimMeetingLink, ClaimAppeal, PaymentRecord, ReportRun
 )
 from .serializers import (
     MemberSerializer, MembershipTypeSerializer, ClaimSerializer, ClaimItemSerializer,
@@ -30,10 +31,17 @@ from .serializers import (
     SettingSerializer, ChronicRequestSerializer, ClaimAttachmentSerializer,
     AuditLogSerializer, MemberDependentSerializer, AdminUserSerializer,
     CommitteeMeetingSerializer, MeetingAttendanceSerializer, ClaimMeetingLinkSerializer, 
-    ClaimAppealSerializer, PaymentRecordSerializer, DataAccessLogSerializer
+    ClaimAppealSerializer, PaymentRecordSerializer, DataAccessLogSerializer, ReportRunSerializer,
+    ClaimListSerializer, requested_expansions,
+    ClaimFlatSerializer, NotificationFlatSerializer, MemberFlatSerializer, DataAccessLogFlatSerializer
 )
-from .permissions import IsSelfOrAdmin, IsClaimOwnerOrCommittee, IsCommittee, IsAdmin, IsTrustee
-from .audit import log_claim_event
+from .permissions import IsSelfOrAdmin, IsClaimOwnerOrCommittee, IsCommittee, IsAdmin, IsTrustee, _in_group
+from .audit import log_claim_event, log_event
+from .services.roles import user_groups, has_any_group, primary_group, invalidate_user as invalidate_user_roles
+from .pagination import CreatedAtPagination, AccessedAtPagination, KeysetPagination
+from .services.recompute import claim_recompute, request_recompute
+from .services.search import search, CLAIM_QUEUE_FIELDS, USER_FIELDS
+from .services.flat import FlatListMixin
 
 User = get_user_model()
 
@@ -47,7 +55,7 @@ class MembershipTypeViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsCommittee]
 
 
-class MemberViewSet(viewsets.ModelViewSet):
+class MemberViewSet(FlatListMixin, viewsets.ModelViewSet):
     """
     Core member management.
 
@@ -60,6 +68,7 @@ class MemberViewSet(viewsets.ModelViewSet):
     """
     queryset = Member.objects.select_related("user", "membership_type").all()
     serializer_class = MemberSerializer
+    flat_serializer_class = MemberFlatSerializer
     permission_classes = [permissions.IsAuthenticated]
     
 
@@ -82,7 +91,7 @@ class MemberViewSet(viewsets.ModelViewSet):
         user = self.request.user
 
         # Committee / Admin see all, with optional ?status filter
-        if user.is_superuser or user.groups.filter(name__in=["Admin", "Committee"]).exists():
+        if _in_group(user, ["Admin", "Committee"]):
             status_f = self.request.GET.get("status")
             if status_f:
                 qs = qs.filter(status=status_f)
@@ -108,12 +117,9 @@ class MemberViewSet(viewsets.ModelViewSet):
         from medical.services.membership import reject_member
         member = reject_member(member, reason)
 
-        # Send rejection email
-        try:
-            from .email_notifications import send_application_rejected_email
-            send_application_rejected_email(member)
-        except Exception as e:
-            print(f"Error sending rejection email: {e}")
+        # Send rejection email (after commit, via outbox)
+        from medical.services.outbox import enqueue_email
+        enqueue_email("application_rejected", member)
 
         return Response(MemberSerializer(member).data)
     
@@ -133,25 +139,21 @@ class MemberViewSet(viewsets.ModelViewSet):
         member.save()
         
         # Log the revocation
-        AuditLog.objects.create(
+        log_event(
             actor=request.user,
             action=f"membership:REVOKED",
-            meta={"member_id": member.id, "reason": reason}
+            obj=member,
+            meta={"member_id": str(member.id), "reason": reason}
         )
         
         # Notify member
-        _notify =lambda recipient, title, message, link=None, type_="system": (
-            Notification.objects.create(
-                recipient=recipient, title=title, message=message,
-                link=link, type=type_, actor=request.user
-            )
-        )
-        _notify(
+        notify(
             member.user,
             "Membership Revoked",
             f"Your membership has been revoked. {reason}",
             "/dashboard/member",
-            "member"
+            "member",
+            actor=request.user,
         )
         
         return Response(MemberSerializer(member).data)
@@ -330,20 +332,14 @@ def member_rules(request):
         messages.append(f"Waiting period in effect. {remaining} days remaining.")
 
     # 4️⃣ BENEFIT LIMIT CHECK
-    # Total claims PAID this year
-    year_start = today.replace(month=1, day=1)
-    total_paid = Claim.objects.filter(
-        member=member,
-        status="approved",
-        paid_amount__isnull=False,
-        created_at__date__gte=year_start
-    ).aggregate(total=models.Sum("paid_amount"))["total"] or 0
-
-    annual_limit = 250000
+    # Approved + paid this year, from the benefit usage ledger
+    from medical.services.ledger import usage_for
+    from medical.services.rules import annual_limit as member_annual_limit
+    usage = usage_for(member.id, today.year)
+    total_paid = usage.used_total
 
-    # Extra 200k if critical illness flag exists
-    if hasattr(member, "critical_illness") and member.critical_illness:
-        annual_limit += 200000
+    # Extra 200k once a critical-illness claim has been approved
+    annual_limit = member_annual_limit(member, critical=usage.critical_topup)
 
     remaining_balance = annual_limit - total_paid
 
@@ -365,12 +361,33 @@ def member_rules(request):
 
 # ============================================================
 #                CLAIMS MANAGEMENT
-class ClaimViewSet(viewsets.ModelViewSet):
+class ClaimViewSet(FlatListMixin, viewsets.ModelViewSet):
     queryset = Claim.objects.select_related(
         "member__user", "member__membership_type"
-    ).prefetch_related("items", "attachments")
+    )
     serializer_class = ClaimSerializer
+    flat_serializer_class = ClaimFlatSerializer
     permission_classes = [permissions.IsAuthenticated, IsClaimOwnerOrCommittee]
+    pagination_class = CreatedAtPagination
+
+    # Nested relations ClaimSerializer renders; reviews name their reviewer
+    NESTED_PREFETCHES = {
+        "items": "items",
+        "attachments": Prefetch("attachments", queryset=ClaimAttachment.objects.select_related("uploaded_by")),
+        "reviews": Prefetch("reviews", queryset=ClaimReview.objects.select_related("reviewer")),
+    }
+
+    def get_serializer_class(self):
+        # Lists are light by default; ?expand= adds nested data back
+        if self.action == "list":
+            return ClaimListSerializer
+        return super().get_serializer_class()
+
+    def get_flat_serializer(self):
+        # Nested data needs the full serializer
+        if requested_expansions(self.request):
+            return None
+        return super().get_flat_serializer()
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
@@ -380,7 +397,7 @@ class ClaimViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         # Log data access if committee member views a claim they don't own
-        if request.user.groups.filter(name__in=["Committee", "Admin"]).exists():
+        if has_any_group(request.user, ["Committee", "Admin"]):
             if instance.member.user != request.user:
                 DataAccessLog.objects.create(
                     user=request.user,
@@ -397,32 +414,42 @@ class ClaimViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return qs.none()
 
-        if user.is_superuser or user.groups.filter(name__in=["Admin", "Committee"]).exists():
+        if self.action == "list":
+            nested = requested_expansions(self.request)
+        elif self.action in ("retrieve", "update", "partial_update"):
+            nested = self.NESTED_PREFETCHES
+        else:
+            nested = ("items", "attachments")
+        qs = qs.prefetch_related(*(self.NESTED_PREFETCHES[name] for name in nested))
+
+        if _in_group(user, ["Admin", "Committee"]):
             return qs
         return qs.filter(member__user=user)
 
     @transaction.atomic
     def perform_create(self, serializer):
-        # 1. Save claim first (signals will handle 'created' notifications if status=submitted)
-        claim = serializer.save()
-        
-        # 2. Validation (if fails, atomic transaction rolls back)
-        from medical.services.rules import validate_claim_before_submit
-        validate_claim_before_submit(claim)
+        # All recomputes requested below are coalesced into one pass + one UPDATE
+        with claim_recompute():
+            # 1. Save claim first (signals will handle 'created' notifications if status=submitted)
+            claim = serializer.save()
 
-        # 3. Enforce submission timestamp if submitted
-        if claim.status == "submitted" and claim.submitted_at is None:
-            claim.submitted_at = timezone.now()
-            claim.save(update_fields=["status", "submitted_at"])
-            
-            # Phase 2B: Register Fingerprint
+            # 2. Validation (if fails, atomic transaction rolls back)
+            from medical.services.rules import validate_claim_before_submit
+            validate_claim_before_submit(claim)
+
+            # 3. Enforce submission timestamp if submitted
+            if claim.status == "submitted" and claim.submitted_at is None:
+                claim.submitted_at = timezone.now()
+                claim.save(update_fields=["status", "submitted_at"])
+
+            # 4. Compute totals
+            request_recompute(claim, totals=True)
+
+        # Phase 2B: Register Fingerprint (the hash covers the final total_claimed)
+        if claim.status == "submitted":
             from medical.services.verification import register_claim_fingerprint
             register_claim_fingerprint(claim)
 
-        # 4. Compute totals
-        claim.recalc_total()
-        claim.compute_payable()
-        
         # Phase 2A/4 Hardening: Enforce DB-level Byelaw constraints
         try:
             claim.full_clean()
@@ -436,15 +463,15 @@ class ClaimViewSet(viewsets.ModelViewSet):
             actor=self.request.user,
             action=action,
             note="Claim submitted" if action == "submitted" else "Claim created",
-            role=self.request.user.groups.values_list("name", flat=True).first(),
+            role=primary_group(self.request.user),
             meta={"claim_id": str(claim.id)}
         )
 
     @transaction.atomic
     def perform_update(self, serializer):
-        claim = serializer.save()
-        claim.recalc_total()
-        claim.compute_payable()
+        with claim_recompute():
+            claim = serializer.save()
+            request_recompute(claim, totals=True)
         try:
             claim.full_clean()
         except ValidationError as e:
@@ -508,13 +535,15 @@ class ClaimViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        claim.save(update_fields=["status", "submitted_at"])
-        
-        # Phase 2B: Register Fingerprint if status changed to submitted
-        if claim.status == "submitted":
-            from medical.services.verification import register_claim_fingerprint
-            register_claim_fingerprint(claim)
-        claim.compute_payable()
+        with transaction.atomic():
+            # post_save requests the payable recompute; applied once when the block exits
+            with claim_recompute():
+                claim.save(update_fields=["status", "submitted_at"])
+
+            # Phase 2B: Register Fingerprint if status changed to submitted (totals are final here)
+            if claim.status == "submitted":
+                from medical.services.verification import register_claim_fingerprint
+                register_claim_fingerprint(claim)
 
         # Phase 2B: Deep Audit (Final Snapshot)
         new_state = model_to_dict(claim)
@@ -527,7 +556,7 @@ class ClaimViewSet(viewsets.ModelViewSet):
             note=note,
             previous_state=previous_state,
             new_state=new_state,
-            role=request.user.groups.values_list("name", flat=True).first()
+            role=primary_group(request.user)
         )
         
         return Response({
@@ -536,6 +565,13 @@ class ClaimViewSet(viewsets.ModelViewSet):
             "message": f"Claim status updated to {claim.status}"
         })
 
+    @action(detail=True, methods=["get"], permission_classes=[permissions.IsAuthenticated, IsCommittee])
+    def duplicates(self, request, pk=None):
+        """Claims that look like duplicates of this one (same receipt, or same member/amount/visit window)."""
+        from medical.services.duplicates import find
+
+        return Response({"results": find(self.get_object())})
+
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated, IsTrustee])
     def ratify_large_claim(self, request, pk=None):
         """
@@ -558,7 +594,12 @@ class ClaimViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"], permission_classes=[permissions.IsAuthenticated])
     def audit(self, request, pk=None):
         claim = self.get_object()
-        qs = AuditLog.objects.filter(meta__claim_id=str(claim.id)).order_by("created_at")
+        # The timeline shows claim events; the claims:UPSERT rows written on
+        # every save stay in the system-wide audit log only
+        qs = (
+            AuditLog.objects.filter(claim=claim).exclude(action="claims:UPSERT")
+            .select_related("actor").order_by("created_at")
+        )
         data = AuditLogSerializer(qs, many=True).data
         return Response({"results": data})
     
@@ -584,15 +625,20 @@ def upload_summary_pdf(request, claim_id):
 
     # Verify ownership or committee status
     user = request.user
-    is_committee = user.groups.filter(name__in=["Admin", "Committee"]).exists() or user.is_superuser
+    is_committee = _in_group(user, ["Admin", "Committee"])
     if not is_committee and claim.member.user != user:
         return Response({"detail": "Permission denied."}, status=403)
 
     file_obj = request.FILES.get("file")
     if not file_obj:
         return Response({"detail": "No file uploaded."}, status=400)
+    from medical.validators import validate_upload_basics
+    try:
+        validate_upload_basics(file_obj)
+    except ValidationError as e:
+        return Response({"detail": " ".join(e.messages)}, status=400)
 
-    # Save as ClaimAttachment
+    # Save as ClaimAttachment (staged; checked and published by a worker)
     attachment = ClaimAttachment.objects.create(
         claim=claim,
         uploaded_by=user,
@@ -602,6 +648,7 @@ def upload_summary_pdf(request, claim_id):
 
     return Response({
         "id": str(attachment.id),
+        "status": attachment.status,
         "message": "Summary PDF uploaded successfully"
     }, status=status.HTTP_201_CREATED)
 
@@ -615,36 +662,21 @@ class ClaimItemViewSet(viewsets.ModelViewSet):
     serializer_class = ClaimItemSerializer
     permission_classes = [permissions.IsAuthenticated, IsClaimOwnerOrCommittee]
 
+    # Item post_save/post_delete signals request the claim recompute
+    @transaction.atomic
     def perform_create(self, serializer):
-        item = serializer.save()
-        item.claim.recalc_total()
-        item.claim.compute_payable()
+        with claim_recompute():
+            serializer.save()
 
+    @transaction.atomic
     def perform_update(self, serializer):
-        item = serializer.save()
-        item.claim.recalc_total()
-        item.claim.compute_payable()
+        with claim_recompute():
+            serializer.save()
 
+    @transaction.atomic
     def perform_destroy(self, instance):
-        claim = instance.claim
-        instance.delete()
-        claim.recalc_total()
-        claim.compute_payable()
-
-    def enforce_annual_limit(claim):
-        member = claim.member
-        year = timezone.now().year
-        
-        spent = Claim.objects.filter(
-            member=member,
-            status__in=["approved", "paid"],
-            created_at__year=year
-        ).aggregate(Sum("total_payable"))["total_payable__sum"] or 0
-
-        limit = member.membership_type.annual_limit or 250000
-
-        if (spent + claim.total_payable) > limit:
-            raise ValidationError("Annual limit exceeded.")
+        with claim_recompute():
+            instance.delete()
 
 
 
@@ -670,8 +702,12 @@ class ClaimReviewViewSet(viewsets.ModelViewSet):
                  {"detail": "Conflict of Interest: You cannot submit a review for your own claim."}
              )
 
-        from medical.services.rules import enforce_annual_limit
-        enforce_annual_limit(claim)
+        if review.action in ("approved", "paid"):
+            from medical.services.rules import enforce_annual_limit
+            try:
+                enforce_annual_limit(claim)
+            except ValidationError as e:
+                raise serializers.ValidationError({"detail": e.messages[0]})
 
         if review.action == "approved":
             claim.status = "approved"
@@ -702,11 +738,11 @@ class ClaimReviewViewSet(viewsets.ModelViewSet):
                     {"detail": f"Review action ({review.action}) does not match the ratified meeting decision ({latest_link.decision})."}
                 )
 
-        claim.save(update_fields=["status"])
-        claim.compute_payable()
+        with claim_recompute():
+            claim.save(update_fields=["status"])
 
         role = (
-            self.request.user.groups.values_list("name", flat=True).first()
+            primary_group(self.request.user)
             or ("admin" if self.request.user.is_superuser else "member")
         )
 
@@ -741,7 +777,7 @@ class ClaimAttachmentViewSet(viewsets.ModelViewSet):
             actor=self.request.user,
             action="attachment_uploaded",
             note=obj.file.name if hasattr(obj.file, "name") else "Attachment uploaded",
-            role=self.request.user.groups.values_list("name", flat=True).first()
+            role=primary_group(self.request.user)
                 or ("admin" if self.request.user.is_superuser else "member"),
             meta={"attachment_id": str(obj.id)}
         )
@@ -749,7 +785,7 @@ class ClaimAttachmentViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         # Log data access for direct attachment view
-        if request.user.groups.filter(name__in=["Committee", "Admin"]).exists():
+        if has_any_group(request.user, ["Committee", "Admin"]):
             if instance.claim.member.user != request.user:
                 DataAccessLog.objects.create(
                     user=request.user,
@@ -759,11 +795,145 @@ class ClaimAttachmentViewSet(viewsets.ModelViewSet):
                 )
         return super().retrieve(request, *args, **kwargs)
 
+    # ---- direct-to-storage uploads (see medical.services.direct_uploads) ----
+
+    @action(detail=False, methods=["post"])
+    def upload_url(self, request):
+        """
+        Step 1 of a direct upload: {claim, filename, content_type, size} ->
+        {upload_url, method, headers, [fields,] token, expires_in}. The client
+        sends the file to upload_url (a PUT, or with S3 a multipart POST of
+        `fields` and then `file`), then POSTs the token to confirm/.
+        """
+        from medical.services import direct_uploads
+
+        claim = get_object_or_404(Claim.objects.select_related("member__user"), pk=request.data.get("claim"))
+        self.check_object_permissions(request, claim)
+        try:
+            ticket = direct_uploads.upload_ticket(
+                claim,
+                request.user,
+                request.data.get("filename"),
+                request.data.get("content_type"),
+                request.data.get("size"),
+                request=request,
+            )
+        except ValidationError as e:
+            return Response({"detail": " ".join(e.messages)}, status=400)
+        return Response(ticket)
+
+    @action(detail=False, methods=["post"])
+    def confirm(self, request):
+        """Step 2: register the uploaded file; it is then checked by the attachment pipeline."""
+        from medical.services import direct_uploads
+
+        try:
+            obj, created = direct_uploads.confirm(request.data.get("token", ""), request.user)
+        except ValidationError as e:
+            return Response({"detail": " ".join(e.messages)}, status=400)
+        if created:
+            log_claim_event(
+                claim=obj.claim,
+                actor=request.user,
+                action="attachment_uploaded",
+                note=obj.file.name,
+                role=primary_group(request.user)
+                    or ("admin" if request.user.is_superuser else "member"),
+                meta={"attachment_id": str(obj.id), "direct": True}
+            )
+        return Response(
+            self.get_serializer(obj).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=["get"])
+    def download_url(self, request, pk=None):
+        """A short-lived link to the file, so downloads don't stream through the API."""
+        from medical.services import direct_uploads
 
-class DataAccessLogViewSet(viewsets.ReadOnlyModelViewSet):
+        instance = self.get_object()
+        if instance.status != "ready":
+            return Response({"detail": f"Attachment is {instance.status}."}, status=409)
+        if has_any_group(request.user, ["Committee", "Admin"]):
+            if instance.claim.member.user != request.user:
+                DataAccessLog.objects.create(
+                    user=request.user,
+                    claim=instance.claim,
+                    attachment=instance,
+                    reason="Downloading attachment"
+                )
+        return Response({
+            "url": direct_uploads.download_url(instance, request=request),
+            "expires_in": direct_uploads.DOWNLOAD_TTL,
+        })
+
+
+@csrf_exempt
+@require_http_methods(["PUT"])
+def local_attachment_upload(request, token):
+    """
+    Stand-in for the presigned S3 upload when attachments live on the local
+    filesystem (development, tests). The signed token is the authorisation.
+    """
+    import tempfile
+
+    from django.conf import settings
+    from django.core.files.base import File
+    from django.core.files.storage import default_storage
+    from medical.services import direct_uploads
+    from medical.validators import MAX_UPLOAD_SIZE
+
+    try:
+        ticket = direct_uploads.read_ticket(token)
+    except ValidationError as e:
+        return JsonResponse({"detail": " ".join(e.messages)}, status=403)
+    # Once confirmed the file belongs to the attachment pipeline
+    if ClaimAttachment.objects.filter(pk=ticket["id"]).exists():
+        return JsonResponse({"detail": "Upload already confirmed."}, status=409)
+    too_large = JsonResponse({"detail": "File too large (max 5MB)"}, status=413)
+    try:
+        if int(request.META.get("CONTENT_LENGTH") or 0) > MAX_UPLOAD_SIZE:
+            return too_large
+    except ValueError:
+        pass
+
+    # Read the stream in chunks: request.body is capped at DATA_UPLOAD_MAX_MEMORY_SIZE
+    with tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE) as body:
+        size = 0
+        while chunk := request.read(64 * 1024):
+            size += len(chunk)
+            if size > MAX_UPLOAD_SIZE:
+                return too_large
+            body.write(chunk)
+        body.seek(0)
+
+        if default_storage.exists(ticket["key"]):
+            default_storage.delete(ticket["key"])
+        default_storage.save(ticket["key"], File(body))
+    return HttpResponse(status=200)
+
+
+@require_http_methods(["GET"])
+def local_attachment_download(request, token):
+    """Stand-in for a presigned S3 GET on the local filesystem."""
+    from django.core.files.storage import default_storage
+    from medical.services import direct_uploads
+
+    try:
+        key = direct_uploads.read_download(token)
+    except ValidationError as e:
+        return JsonResponse({"detail": " ".join(e.messages)}, status=403)
+    if not default_storage.exists(key):
+        raise Http404
+    return FileResponse(default_storage.open(key, "rb"), as_attachment=True, filename=key.rsplit("/", 1)[-1])
+
+
+class DataAccessLogViewSet(FlatListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = DataAccessLog.objects.select_related("user", "claim", "attachment").all()
     serializer_class = DataAccessLogSerializer
+    flat_serializer_class = DataAccessLogFlatSerializer
     permission_classes = [permissions.IsAuthenticated, IsCommittee]
+    pagination_class = AccessedAtPagination
 
 
 
@@ -783,7 +953,7 @@ class ChronicRequestViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return qs.none()
 
-        if user.is_superuser or user.groups.filter(name__in=["Admin", "Committee"]).exists():
+        if _in_group(user, ["Admin", "Committee"]):
             return qs
         return qs.filter(member__user=user)
 
@@ -805,9 +975,11 @@ class ChronicRequestViewSet(viewsets.ModelViewSet):
 #                NOTIFICATIONS
 # ============================================================
 
-class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+class NotificationViewSet(FlatListMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationSerializer
+    flat_serializer_class = NotificationFlatSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtPagination
     queryset = Notification.objects.all().order_by("-created_at")
 
     def get_queryset(self):
@@ -819,42 +991,68 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=True, methods=["post"])
     def mark_read(self, request, pk=None):
+        from medical.services.unread_counts import mark_read
+
         notif = self.get_object()
-        notif.read = True
-        notif.save(update_fields=["read"])
+        mark_read(request.user, [notif.pk])
         return Response({"ok": True, "id": str(notif.id)})
 
     @action(detail=False, methods=["post"])
     def mark_all_read(self, request):
-        Notification.objects.filter(
-            recipient=request.user,
-            read=False
-        ).update(read=True)
+        from medical.services.unread_counts import mark_read
+
+        mark_read(request.user)
         return Response({"ok": True})
 
 
 def notify(user, title, message, link=None, typ="system", actor=None, metadata=None):
-    Notification.objects.create(
-        recipient=user,
-        title=title,
-        message=message,
-        link=link,
-        type=typ,
-        actor=actor,
-        metadata=metadata or {},
-    )
+    from medical.services.notifications import notify_users
+    notify_users([user], title, message, link=link, type_=typ, actor=actor, metadata=metadata)
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def mark_notifications_read(request):
-    Notification.objects.filter(recipient=request.user, read=False).update(read=True)
+    from medical.services.unread_counts import mark_read
+
+    mark_read(request.user)
     return Response({"ok": True, "message": "All notifications marked as read"})
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def unread_notifications_count(request):
-    count = Notification.objects.filter(recipient=request.user, read=False).count()
-    return Response({"unread": count})
+    from medical.services.unread_counts import unread_count
+
+    return Response({"unread": unread_count(request.user.pk)})
+
+
+async def notification_stream(request):
+    """
+    Server-sent events: the unread count, then each new notification as it
+    is created (medical.services.notification_stream). Replaces polling
+    unread-count; needs the ASGI app so an open stream doesn't hold a worker,
+    and answers 503 where it can't be served.
+    """
+    from asgiref.sync import sync_to_async
+    from medical.services import notification_stream as sse
+    from medical.services.unread_counts import unread_count
+
+    if request.method != "GET":
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    reason = sse.unavailable_reason(request)
+    if reason:
+        # The client falls back to polling unread-count
+        return JsonResponse({"detail": reason}, status=503)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    async def unread():
+        return await sync_to_async(unread_count)(user.pk)
+
+    response = StreamingHttpResponse(sse.stream(user.pk, unread), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: don't buffer the stream
+    return response
 
 
 # ============================================================
@@ -905,14 +1103,26 @@ class CommitteeMeetingViewSet(viewsets.ModelViewSet):
         meeting.save()
 
         # Audit
-        AuditLog.objects.create(
+        log_event(
             actor=request.user,
             action="meeting:LOCKED",
+            obj=meeting,
             meta={"meeting_id": str(meeting.id), "date": str(meeting.date)}
         )
 
         return Response(CommitteeMeetingSerializer(meeting).data)
 
+    @action(detail=True, methods=["post"])
+    def apply_decisions(self, request, pk=None):
+        """Transition every claim linked to this locked meeting per its decision."""
+        from medical.services.transitions import apply_meeting_decisions
+
+        meeting = self.get_object()
+        try:
+            return Response(apply_meeting_decisions(meeting, request.user))
+        except ValidationError as e:
+            return Response({"detail": " ".join(e.messages)}, status=400)
+
 
 class MeetingAttendanceViewSet(viewsets.ModelViewSet):
     queryset = MeetingAttendance.objects.all()
@@ -1011,9 +1221,10 @@ class PaymentRecordViewSet(viewsets.ModelViewSet):
         payment.save()
 
         # Audit
-        AuditLog.objects.create(
+        log_event(
             actor=request.user,
             action="payment:RECONCILED",
+            obj=payment,
             meta={"payment_id": str(payment.id), "claim_id": str(payment.claim.id)}
         )
 
@@ -1021,19 +1232,64 @@ class PaymentRecordViewSet(viewsets.ModelViewSet):
 
 
 # ============================================
-#                REPORTS (placeholder)
+#                REPORTS
 # ============================================
 
 class ReportViewSet(viewsets.ViewSet):
-    permission_classes = [IsAuthenticated]
+    """
+    Finance reports, generated in the background from the claim rollup
+    (medical.services.reports).
+
+    GET  /reports/                     available reports + recent runs
+    POST /reports/                     {"report", "format": csv|xlsx|pdf, "params": {...}}
+    GET  /reports/<id>/                run status
+    GET  /reports/<id>/download/       the generated file
+    """
+    permission_classes = [IsAuthenticated, IsCommittee]
 
     def list(self, request):
+        from medical.services.reports import REPORTS, FORMATS
+
+        recent = ReportRun.objects.filter(requested_by=request.user)[:20]
         return Response({
-            "message": "Reporting endpoints coming soon.",
-            "available": []
+            "available": [
+                {"key": key, "title": r["title"], "columns": r["columns"]}
+                for key, r in REPORTS.items()
+            ],
+            "formats": FORMATS,
+            "recent": ReportRunSerializer(recent, many=True, context={"request": request}).data,
         })
 
+    def create(self, request):
+        from medical.services.reports import request_report
 
+        run, created = request_report(
+            request.data.get("report"),
+            request.data.get("params") or {},
+            request.data.get("format") or "csv",
+            user=request.user,
+        )
+        data = ReportRunSerializer(run, context={"request": request}).data
+        return Response(data, status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK)
+
+    def retrieve(self, request, pk=None):
+        run = get_object_or_404(ReportRun, pk=pk)
+        return Response(ReportRunSerializer(run, context={"request": request}).data)
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        from django.http import FileResponse
+        from medical.services.reports import CONTENT_TYPES
+
+        run = get_object_or_404(ReportRun, pk=pk)
+        if run.status != "done" or not run.file:
+            return Response({"detail": f"Report is {run.status}."}, status=status.HTTP_409_CONFLICT)
+        return FileResponse(
+            run.file.open("rb"),
+            as_attachment=True,
+            filename=f"{run.report}.{run.format}",
+            content_type=CONTENT_TYPES[run.format],
+        )
 
 
 # ============================================================
@@ -1046,7 +1302,7 @@ def me(request):
     """Return info about the logged-in user to frontend"""
     user = request.user
     try:
-        groups = list(user.groups.values_list("name", flat=True))
+        groups = list(user_groups(user))
     except Exception:
         groups = []
 
@@ -1097,27 +1353,12 @@ def benefit_balance(request):
     except Member.DoesNotExist:
         return Response({"detail": "Member not found"}, status=404)
 
-    year_start = date.today().replace(month=1, day=1)
-    year_end = date.today().replace(month=12, day=31)
+    from medical.services.ledger import usage_for
+    from medical.services.rules import annual_limit as member_annual_limit
 
-    total_used = (
-        Claim.objects.filter(
-            member=member,
-            status__in=["approved", "paid"],
-            created_at__range=[year_start, year_end],
-        )
-        .aggregate(total=Sum("total_payable"))
-        .get("total")
-        or 0
-    )
-
-    critical_topup = 200000 if member.claims.filter(
-        status="approved",
-        claim_type="inpatient",
-        total_claimed__gte=200000
-    ).exists() else 0
-
-    annual_limit = 250000 + critical_topup
+    usage = usage_for(member.id, timezone.localdate().year)
+    total_used = usage.used_total
+    annual_limit = member_annual_limit(member, critical=usage.critical_topup)
     remaining = max(0, annual_limit - total_used)
 
     return Response({
@@ -1377,37 +1618,38 @@ def committee_claims(request):
     type_f = request.GET.get("type")
     q = request.GET.get("q")
 
-    qs = Claim.objects.select_related(
-        "member__user", "member__membership_type"
-    ).order_by("-created_at")
+    # Served from the denormalized queue table (medical.services.claim_queue)
+    qs = ClaimQueueEntry.objects.all()
 
     if status_f:
         qs = qs.filter(status=status_f)
     if type_f:
         qs = qs.filter(claim_type=type_f)
     if q:
-        qs = qs.filter(
-            Q(member__user__username__icontains=q) |
-            Q(member__user__first_name__icontains=q) |
-            Q(member__user__last_name__icontains=q) |
-            Q(shif_number__icontains=q)
-        )
-
-    data = []
-    for c in qs[:300]:
-        data.append({
-            "id": str(c.id),
-            "member_name": f"{c.member.user.first_name} {c.member.user.last_name}".strip() or c.member.user.username,
-            "membership_type": c.member.membership_type.name if c.member.membership_type else None,
-            "claim_type": c.claim_type,
-            "status": c.status,
-            "total_claimed": str(c.total_claimed),
-            "total_payable": str(c.total_payable),
-            "member_payable": str(c.member_payable),
-            "created_at": c.created_at,
-            "submitted_at": c.submitted_at,
-        })
-    return Response({"results": data})
+        # Stays in queue (created_at) order so cursor pages keep working
+        qs = search(qs, q, CLAIM_QUEUE_FIELDS, rank=False)
+
+    # Keyset pages; the first page is as large as the old hard cap
+    paginator = KeysetPagination()
+    paginator.page_size = 300
+
+    rows = paginator.paginate_queryset(qs.values(
+        "pk", "member_name", "membership_type", "claim_type", "status",
+        "total_claimed", "total_payable", "member_payable", "created_at", "submitted_at",
+    ), request)
+    data = [{
+        "id": str(r["pk"]),
+        "member_name": r["member_name"],
+        "membership_type": r["membership_type"],
+        "claim_type": r["claim_type"],
+        "status": r["status"],
+        "total_claimed": str(r["total_claimed"]),
+        "total_payable": str(r["total_payable"]),
+        "member_payable": str(r["member_payable"]),
+        "created_at": r["created_at"],
+        "submitted_at": r["submitted_at"],
+    } for r in rows]
+    return paginator.get_paginated_response(data)
 
 
 @api_view(["GET"])
@@ -1472,31 +1714,16 @@ def committee_claim_detail(request, pk):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsCommittee])
 def export_claims_csv(request):
-    qs = Claim.objects.all().order_by("-created_at")
-
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = 'attachment; filename="sgss_claims.csv"'
-
-    import csv
-    writer = csv.writer(response)
-    writer.writerow([
-        "ID", "Member", "Type", "Total Claimed",
-        "Total Payable", "Member Payable", "Status", "Created"
-    ])
-
-    for c in qs:
-        writer.writerow([
-            str(c.id),
-            c.member.user.get_full_name(),
-            c.claim_type,
-            c.total_claimed,
-            c.total_payable,
-            c.member_payable,
-            c.status,
-            c.created_at,
-        ])
+    """
+    Stream claims as CSV (default) or XLSX (?export_format=xlsx).
+    Filters: ?date_from, ?date_to (YYYY-MM-DD), ?status=a,b, ?type
+    """
+    from medical.services.exports import filter_claims, claim_rows, csv_response, xlsx_response
 
-    return response
+    rows = claim_rows(filter_claims(request.query_params))
+    if request.query_params.get("export_format") == "xlsx":
+        return xlsx_response(rows, "sgss_claims.xlsx")
+    return csv_response(rows, "sgss_claims.csv")
 
 
 @api_view(["GET"])
@@ -1510,12 +1737,8 @@ def admin_users_list(request):
 
     q = request.GET.get("q")
     if q:
-        qs = qs.filter(
-            Q(username__icontains=q)
-            | Q(first_name__icontains=q)
-            | Q(last_name__icontains=q)
-            | Q(email__icontains=q)
-        )
+        # Best matches first
+        qs = search(qs, q, USER_FIELDS).order_by("-search_rank", "username")
 
     role = request.GET.get("role")
     if role:
@@ -1577,6 +1800,8 @@ def admin_update_user_roles(request, user_id):
         user.groups.remove(member_group)
 
     user.save()
+    # The m2m signals already do this; be explicit since roles gate every request
+    invalidate_user_roles(user)
     return Response(AdminUserSerializer(user).data)
 
 
@@ -1605,14 +1830,47 @@ def admin_toggle_user_active(request, user_id):
 @api_view(["POST"])
 @permission_classes([IsAuthenticated, IsCommittee])
 def bulk_change_status(request):
-    ids = request.data.get("ids", [])
-    status_val = request.data.get("status")
+    """
+    Move many claims through the governance pipeline at once.
+    Body: {"ids": [...], "status": "..."} or {"changes": {claim_id: status}},
+    optional "note". Claims failing a check are skipped and reported.
+    """
+    from medical.services.transitions import apply_transitions
 
-    if status_val not in dict(Claim.STATUS_CHOICES):
-        return Response({"detail": "Invalid status."}, status=400)
+    changes = request.data.get("changes")
+    if changes is None:
+        status_val = request.data.get("status")
+        if status_val not in dict(Claim.STATUS_CHOICES):
+            return Response({"detail": "Invalid status."}, status=400)
+        changes = {claim_id: status_val for claim_id in request.data.get("ids", [])}
+    elif not isinstance(changes, dict):
+        return Response({"detail": "changes must map claim ids to statuses."}, status=400)
 
-    Claim.objects.filter(id__in=ids).update(status=status_val)
-    return Response({"detail": "Bulk update complete."})
+    result = apply_transitions(changes, request.user, note=request.data.get("note"))
+    return Response({"detail": "Bulk update complete.", **result})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsCommittee])
+def reprice_preview(request):
+    """
+    Dry run of re-pricing claims with the current scales and limits
+    (`manage.py reprice_claims` applies it). Nothing is saved.
+    Filters: ?status=a,b (default: open claims), ?year, ?type, ?member
+    """
+    from medical.services.pricing import reprice, select_claims
+
+    params = request.query_params
+    try:
+        claims = select_claims(
+            statuses=[s for s in (params.get("status") or "").split(",") if s],
+            year=params.get("year"),
+            claim_type=params.get("type"),
+            member_id=params.get("member"),
+        )
+        return Response(reprice(claims, dry_run=True))
+    except ValidationError as e:
+        return Response({"detail": e.messages}, status=400)
 
 
 @api_view(["GET"])
@@ -1648,16 +1906,15 @@ def member_dashboard_info(request):
 @permission_classes([IsAuthenticated])
 def committee_dashboard_info(request):
     if not (
-        request.user.groups.filter(name="Committee").exists()
+        has_any_group(request.user, ["Committee"])
         or request.user.is_superuser
     ):
         return Response({"detail": "Not committee"}, status=403)
 
+    from medical.services.dashboard_stats import committee_summary
+
     member = Member.objects.filter(user=request.user).first()
-    today = timezone.now().date()
-    pending = Claim.objects.filter(status="submitted").count()
-    today_new = Claim.objects.filter(created_at__date=today).count()
-    reviewed = Claim.objects.filter(status="reviewed").count()
+    counts = committee_summary()
 
     return Response({
         "full_name": request.user.get_full_name(),
@@ -1666,82 +1923,27 @@ def committee_dashboard_info(request):
         "membership_no": str(member.id) if member else None,
         "shif_number": member.shif_number if member else None,
         "membership_type": member.membership_type.name if member and member.membership_type else None,
-        "pending_total": pending,
-        "today_new": today_new,
-        "reviewed_total": reviewed,
+        **counts,
     })
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdmin])
 def admin_dashboard_summary(request):
-    today = timezone.now().date()
-    year = today.year
+    # Read from the dashboard counters (medical.services.dashboard_stats)
+    from medical.services.dashboard_stats import admin_summary
 
-    claims_qs = Claim.objects.filter(created_at__year=year)
-
-    total_members = Member.objects.count()
-    total_claims = claims_qs.count()
-
-    status_qs = (
-        claims_qs.values("status")
-        .annotate(count=Count("id"))
-    )
-    status_counts = {row["status"]: row["count"] for row in status_qs}
-
-    pending_qs = claims_qs.exclude(status__in=["paid", "rejected"])
-    total_payable_pending = (
-        pending_qs.aggregate(total=Sum("total_payable"))["total"] or 0
-    )
-
-    paid_qs = claims_qs.filter(status="paid")
-    total_paid_out = (
-        paid_qs.aggregate(total=Sum("total_payable"))["total"] or 0
-    )
-
-    chronic_requests = ChronicRequest.objects.filter(
-        created_at__year=year
-    ).count()
-
-    monthly_qs = (
-        claims_qs
-        .annotate(month=TruncMonth("created_at"))
-        .values("month")
-        .annotate(
-            claims=Count("id"),
-            total_payable=Sum("total_payable"),
-        )
-        .order_by("month")
-    )
-
-    monthly = [
-        {
-            "month": row["month"].strftime("%Y-%m-01"),
-            "month_label": row["month"].strftime("%b"),
-            "claims": row["claims"],
-            "total_payable": float(row["total_payable"] or 0),
-        }
-        for row in monthly_qs
-    ]
-
-    return Response({
-        "year": year,
-        "total_members": total_members,
-        "total_claims": total_claims,
-        "status_counts": status_counts,
-        "total_payable_pending": float(total_payable_pending),
-        "total_paid_out": float(total_paid_out),
-        "chronic_requests": chronic_requests,
-        "monthly": monthly,
-    })
+    return Response(admin_summary(timezone.localdate().year))
 
 
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated, IsAdmin])
 def audit_all_logs(request):
-    logs = AuditLog.objects.all().order_by("-created_at")[:500]
+    paginator = KeysetPagination()
+    paginator.page_size = 500
+    logs = paginator.paginate_queryset(AuditLog.objects.select_related("actor"), request)
     data = AuditLogSerializer(logs, many=True).data
-    return Response({"results": data})
+    return paginator.get_paginated_response(data)
 
 
 
@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Long-lived responses such as the notification stream
+(/api/notifications/stream/) should be served through this app by an ASGI
+server, where an idle stream is a suspended coroutine rather than a
+blocked WSGI worker.
 """
 
 import os
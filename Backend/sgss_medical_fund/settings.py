@@ -16,6 +16,7 @@ import os
 import dj_database_url
 import environ
 from datetime import timedelta
+from celery.schedules import crontab
 import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
 
@@ -162,6 +163,29 @@ if not DEBUG and DATABASES['default'].get('ENGINE') == 'django.db.backends.postg
     # Recommended for Render to prevent connection exhaustion
     DATABASES['default']['CONN_MAX_AGE'] = 600
 
+# --- Cache ---
+# Shared between workers in production via CACHE_URL=redis://host:6379/1;
+# defaults to per-process local memory.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+# Cross-request caches are only used when every process sees the same cache
+# (medical.services.shared_cache). Local memory counts as shared under DEBUG
+# (runserver, tests: one process); set explicitly for e.g. a single-worker deploy.
+CACHE_SHARED = env.bool(
+    'CACHE_SHARED',
+    default=DEBUG or CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache',
+)
+
+# Notification push stream (medical.services.notification_stream): Redis
+# pub/sub so every process can publish, e.g. redis://host:6379/2. Without it
+# the in-process broker only sees notifications created in the same process,
+# so it's used only when NOTIFICATION_STREAM_LOCAL (default: DEBUG, i.e.
+# runserver) says there is just one; otherwise the stream answers 503 and the
+# bell polls. The stream also needs an ASGI server (see gunicorn.conf.py).
+NOTIFICATION_STREAM_URL = env('NOTIFICATION_STREAM_URL', default=None)
+NOTIFICATION_STREAM_LOCAL = env.bool('NOTIFICATION_STREAM_LOCAL', default=DEBUG)
+
 # AUTH_USER_MODEL
 # Note: AUTH_USER_MODEL should only be set when implementing a custom user model.
 # The previous setting 'auth.user' was incorrect (should be 'auth.User' if needed, but that's the default).
@@ -270,15 +294,79 @@ else:
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='noreply@sgssmedicalfund.org')
 
 
+# --- Celery (background jobs) ---
+# Without a broker configured, Celery uses the in-memory transport and runs
+# tasks eagerly (after commit) in the web process — used in dev and tests.
+# Production: CELERY_BROKER_URL=redis://... and run `celery -A sgss_medical_fund worker -B`.
+CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='memory://')
+CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default=None)
+CELERY_TASK_ALWAYS_EAGER = env.bool(
+    'CELERY_TASK_ALWAYS_EAGER',
+    default=CELERY_BROKER_URL.startswith('memory://'),
+)
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TIMEZONE = 'UTC'
+CELERY_BEAT_SCHEDULE = {
+    'flush-email-outbox': {
+        'task': 'medical.tasks.flush_email_outbox',
+        'schedule': 300.0,
+    },
+    'rebuild-dashboard-stats': {
+        'task': 'medical.tasks.rebuild_dashboard_stats',
+        'schedule': crontab(hour=2, minute=15),
+    },
+    'reconcile-unread-counts': {
+        'task': 'medical.tasks.reconcile_unread_counts',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    'refresh-report-tables': {
+        'task': 'medical.tasks.refresh_report_tables',
+        'schedule': crontab(hour=2, minute=45),
+    },
+    'process-pending-attachments': {
+        'task': 'medical.tasks.process_pending_attachments',
+        'schedule': 300.0,
+    },
+    'archive-old-records': {
+        'task': 'medical.tasks.archive_old_records',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
+
+# Retention (days) before rows move out of the hot tables into archive files
+# (medical.services.retention). Unread notifications and audit entries about
+# open claims are kept.
+NOTIFICATION_RETENTION_DAYS = env.int('NOTIFICATION_RETENTION_DAYS', default=90)
+AUDIT_LOG_RETENTION_DAYS = env.int('AUDIT_LOG_RETENTION_DAYS', default=365)
+
+# Optional virus scan for uploaded attachments: dotted path to a callable
+# scan(file, name) that raises django.core.exceptions.ValidationError to reject
+ATTACHMENT_VIRUS_SCANNER = env('ATTACHMENT_VIRUS_SCANNER', default=None)
+
+
 # settings.py
+# Django 5.1+ only reads STORAGES (DEFAULT_FILE_STORAGE is ignored)
 if not DEBUG and env('AWS_ACCESS_KEY_ID', default=''):
-    DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+    STORAGES = {
+        'default': {'BACKEND': 'storages.backends.s3.S3Storage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
     AWS_ACCESS_KEY_ID = env('AWS_ACCESS_KEY_ID')
     AWS_SECRET_ACCESS_KEY = env('AWS_SECRET_ACCESS_KEY')
-    AWS_STORAGE_BUCKET_NAME = 'sgss-medical-fund'
-    AWS_S3_REGION_NAME = 'us-east-1'
+    AWS_STORAGE_BUCKET_NAME = env('AWS_STORAGE_BUCKET_NAME', default='sgss-medical-fund')
+    AWS_S3_REGION_NAME = env('AWS_S3_REGION_NAME', default='us-east-1')
+    # S3-compatible stores such as MinIO
+    AWS_S3_ENDPOINT_URL = env('AWS_S3_ENDPOINT_URL', default=None)
+    AWS_S3_SIGNATURE_VERSION = 's3v4'
     AWS_S3_FILE_OVERWRITE = False
     AWS_DEFAULT_ACL = None
+    # Attachments are private: url() returns short-lived signed links
+    AWS_QUERYSTRING_AUTH = True
+
+# Lifetime (seconds) of direct upload / download links for claim attachments
+ATTACHMENT_UPLOAD_URL_TTL = env.int('ATTACHMENT_UPLOAD_URL_TTL', default=15 * 60)
+ATTACHMENT_DOWNLOAD_URL_TTL = env.int('ATTACHMENT_DOWNLOAD_URL_TTL', default=5 * 60)
 
 
 
@@ -42,11 +42,49 @@ export default function NotificationBell() {
     }
   };
 
-  // Poll unread count
+  // Live unread count from the notification stream (server-sent events);
+  // falls back to polling where EventSource is unavailable or keeps failing
   useEffect(() => {
-    fetchUnreadCount();
-    const id = setInterval(fetchUnreadCount, 20000);
-    return () => clearInterval(id);
+    let pollId: ReturnType<typeof setInterval> | undefined;
+    const startPolling = () => {
+      if (pollId) return;
+      fetchUnreadCount();
+      pollId = setInterval(fetchUnreadCount, 20000);
+    };
+
+    if (typeof EventSource === "undefined") {
+      startPolling();
+      return () => clearInterval(pollId);
+    }
+
+    const source = new EventSource(`${api.defaults.baseURL}notifications/stream/`, {
+      withCredentials: true,
+    });
+    let failures = 0;
+    source.addEventListener("unread", (e) => {
+      failures = 0;
+      setUnread(JSON.parse((e as MessageEvent).data).unread || 0);
+    });
+    source.addEventListener("notification", (e) => {
+      const { notification } = JSON.parse((e as MessageEvent).data);
+      setUnread((u) => u + 1);
+      setItems((prev) => [notification, ...prev.filter((n) => n.id !== notification.id)]);
+    });
+    source.onerror = () => {
+      // A refused stream (e.g. 503 where the server can't stream) closes
+      // for good: poll right away. Otherwise EventSource reconnects by
+      // itself; give up after repeated failures
+      failures += 1;
+      if (source.readyState === EventSource.CLOSED || failures >= 3) {
+        source.close();
+        startPolling();
+      }
+    };
+
+    return () => {
+      source.close();
+      clearInterval(pollId);
+    };
   }, []);
 
   const toggleOpen = () => {